@@ -0,0 +1,96 @@
+"""
+Profilo dei tempi di import e controllo del budget di avvio.
+
+Ogni modulo viene importato in un interprete nuovo con ``-X importtime``;
+lo script riporta il tempo di import, i moduli più costosi e i pacchetti
+pesanti caricati, e termina con codice 1 se un budget è superato o se un
+modulo "headless" carica pandas o lo stack della dashboard:
+
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py dashboard.app --top 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+
+# Budget di avvio (ms) e pacchetti che il modulo non deve caricare
+BUDGETS = {
+    'simulator': (50, ('numpy', 'pandas', 'dash', 'plotly')),
+    'simulator.production': (400, ('pandas', 'dash', 'plotly')),
+    'simulator.sensitivity': (400, ('pandas', 'dash', 'plotly')),
+    'simulator.kpi': (400, ('pandas', 'dash', 'plotly')),
+    'simulator.seasons': (400, ('pandas', 'dash', 'plotly')),
+    'simulator.rollups': (400, ('pandas', 'dash', 'plotly')),
+    'simulator.engine': (1500, ('dash', 'plotly')),
+    'dashboard.app': (4000, ()),
+}
+HEAVY_PACKAGES = ('numpy', 'pandas', 'yaml', 'flask', 'plotly', 'dash', 'dash_bootstrap_components', 'IPython')
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed)
+print(' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))
+"""
+
+
+def profile_import(module):
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns
+    -------
+    tuple
+        Import time in ms, the (cumulative ms, module) pairs reported by
+        ``-X importtime`` from the most expensive, and the set of top-level
+        packages loaded.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    elapsed, packages = completed.stdout.splitlines()[-2:]
+    timings = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        timings.append((int(cumulative) / 1000, name.strip()))
+    return float(elapsed), sorted(timings, reverse=True), set(packages.split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('modules', nargs='*', default=list(BUDGETS))
+    parser.add_argument('--top', type=int, default=8, help="moduli più costosi da mostrare")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in args.modules:
+        elapsed, timings, packages = profile_import(module)
+        budget, forbidden = BUDGETS.get(module, (None, ()))
+        heavy = [name for name in HEAVY_PACKAGES if name in packages]
+        print(f"{module}: {elapsed:.0f} ms" + (f" (budget {budget} ms)" if budget else ""))
+        print(f"  pacchetti pesanti: {', '.join(heavy) or 'nessuno'}")
+        for ms, name in timings[:args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+
+        if budget is not None and elapsed > budget:
+            failures.append(f"{module}: {elapsed:.0f} ms oltre il budget di {budget} ms")
+        loaded = [name for name in forbidden if name in packages]
+        if loaded:
+            failures.append(f"{module}: carica {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"[BUDGET] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
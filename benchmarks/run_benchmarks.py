@@ -0,0 +1,186 @@
+"""
+Benchmark dei percorsi critici del simulatore e della dashboard.
+
+Misura la generazione dei dati ambientali, il modello di produzione, il
+modello finanziario e i due callback della dashboard (chiamati direttamente)
+per 1, 10, 100 e 1000 anni simulati e per tutte le colture. I risultati
+vengono salvati in JSON per confrontare versioni diverse:
+
+    python benchmarks/run_benchmarks.py --output benchmarks/results/nuovo.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/base.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+import numpy as np
+import pandas as pd
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.production import AgriculturalProductionGenerator, CROP_PARAMETERS
+from simulator.financial import build_financial_data
+
+YEARS = (1, 10, 100, 1000)
+QUICK_YEARS = (1, 10)
+CROPS = tuple(CROP_PARAMETERS)
+START_DATE = pd.Timestamp('2000-01-01')
+SEED = 1234
+
+
+def _end_date(years):
+    return (START_DATE + pd.DateOffset(years=years) - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def _measure(func, repeats, setup=None):
+    """Tempi (s) di ``repeats`` esecuzioni di ``func``; ``setup`` non è cronometrato."""
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _repeats_for(years):
+    return 5 if years <= 10 else 3 if years <= 100 else 1
+
+
+def benchmark_simulator(years_list, crops):
+    """Generatore ambientale, modello di produzione e modello finanziario."""
+    results = {}
+    for years in years_list:
+        end_date = _end_date(years)
+        repeats = _repeats_for(years)
+        env_gen = EnvironmentalDataGenerator('Benchmark', START_DATE, end_date, seed=SEED)
+        results[f'environmental.generate[years={years}]'] = _measure(env_gen.generate, repeats)
+        env_data = env_gen.generate()
+
+        for crop in crops:
+            prod_gen = AgriculturalProductionGenerator(env_data, crop, 100)
+            results[f'production.simulate[years={years},crop={crop}]'] = _measure(prod_gen.simulate, repeats)
+            prod_data = prod_gen.simulate()
+            results[f'financial.build[years={years},crop={crop}]'] = _measure(
+                lambda: build_financial_data(env_data, prod_data, crop, 100, rng=np.random.default_rng(SEED)),
+                repeats,
+            )
+    return results
+
+
+def benchmark_callbacks(years_list, crops):
+    """I callback della dashboard, a cache fredda (la simulazione è inclusa)."""
+    import dashboard.callbacks as callbacks
+
+    # Nessun riuso da disco: si misura il calcolo, non la lettura
+    callbacks.engine.store = None
+    results = {}
+    for years in years_list:
+        repeats = _repeats_for(years)
+        for crop in crops:
+            handle = callbacks.make_handle(SEED, START_DATE.strftime('%Y-%m-%d'), _end_date(years), crop, 100)
+            results[f'callbacks.update_kpi_cards[years={years},crop={crop}]'] = _measure(
+                lambda: callbacks.build_kpi_cards(handle), repeats, setup=callbacks.engine.cache.clear
+            )
+            for tab_id, (_, build_updates) in callbacks.TAB_UPDATES.items():
+                # Il Monte Carlo su orizzonti molto lunghi esce dal budget di un benchmark
+                if tab_id == 'tab-forecast' and years > 10:
+                    continue
+                results[f'callbacks.render_tab_content[years={years},crop={crop},tab={tab_id}]'] = _measure(
+                    lambda: build_updates(handle), repeats, setup=callbacks.engine.cache.clear
+                )
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(years_list, crops, include_callbacks=True):
+    timings = benchmark_simulator(years_list, crops)
+    if include_callbacks:
+        timings.update(benchmark_callbacks(years_list, crops))
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': {
+            name: {
+                'min': min(values),
+                'median': statistics.median(values),
+                'repeats': len(values),
+            }
+            for name, values in timings.items()
+        },
+    }
+
+
+def compare(current, baseline, threshold):
+    """Benchmark più lenti del ``threshold`` rispetto a ``baseline`` (per mediana)."""
+    regressions = []
+    for name, stats in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        ratio = stats['median'] / previous['median']
+        if ratio > threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true', help=f"solo {QUICK_YEARS} anni")
+    parser.add_argument('--crops', nargs='+', default=list(CROPS), choices=CROPS)
+    parser.add_argument('--no-callbacks', action='store_true', help="salta i callback della dashboard")
+    parser.add_argument('--output', help="file JSON dei risultati (default: benchmarks/results/<revisione>.json)")
+    parser.add_argument('--compare', help="JSON di riferimento con cui confrontare i risultati")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="rapporto oltre il quale un benchmark è una regressione (default 1.2)")
+    args = parser.parse_args(argv)
+
+    report = run(QUICK_YEARS if args.quick else YEARS, args.crops, not args.no_callbacks)
+
+    output = args.output or os.path.join(
+        ROOT_DIR, 'benchmarks', 'results', f"{report['meta']['revision'] or 'locale'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    for name, stats in sorted(report['results'].items()):
+        print(f"{name:<90} {stats['median'] * 1000:10.2f} ms")
+    print(f"Risultati salvati in {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f"[REGRESSIONE] {name}: {ratio:.2f}x")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
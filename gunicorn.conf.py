@@ -0,0 +1,19 @@
+# Configurazione di gunicorn letta da config/settings.yaml (sezione server):
+#
+#     gunicorn -c gunicorn.conf.py dashboard.wsgi:server
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from simulator.config import get_setting  # noqa: E402
+
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+bind = get_setting('server', 'bind', '0.0.0.0:8050')
+workers = int(os.environ.get('WEB_CONCURRENCY', get_setting('server', 'workers', 4)))
+# Thread per worker: le richieste dello stesso utente (grafici, KPI) arrivano in parallelo
+threads = get_setting('server', 'threads', 4)
+worker_class = 'gthread'
+timeout = get_setting('server', 'timeout', 120)
+preload_app = get_setting('server', 'preload', True)
+accesslog = '-'
@@ -8,12 +8,23 @@ sys.path.append(src_dir)
 
 import dash
 import dash_bootstrap_components as dbc
-from dash import html
+from dash import html, dcc
 from dashboard.components.headers import create_header
 from dashboard.components.control_panel import create_control_panel
 from dashboard.components.kpi_section import create_kpi_section
 from dashboard.components.tabs import create_tabs
-from dashboard.callbacks import register_callbacks
+from dashboard.callbacks import register_callbacks, engine
+from dashboard.instrumentation import register_instrumentation
+from simulator.config import get_setting
+from simulator.metrics import metrics
+
+try:
+    import orjson  # noqa: F401
+    import plotly.io as pio
+    # Risposte delle callback serializzate con orjson (array numpy senza conversione in liste)
+    pio.json.config.default_engine = 'orjson'
+except ImportError:
+    pass
 
 # Inizializzazione dell'app
 app = dash.Dash(
@@ -24,6 +35,8 @@ server = app.server
 
 # Layout dell'app
 app.layout = html.Div([
+    # Riferimento alla simulazione corrente; i dati restano sul server
+    dcc.Store(id="simulation-handle"),
     create_header(),
     html.Div([
         dbc.Row([
@@ -39,5 +52,18 @@ app.layout = html.Div([
 # Registrazione dei callback
 register_callbacks(app)
 
+# Metriche per fase su /metrics (vedi config/settings.yaml)
+metrics.enabled = get_setting('instrumentation', 'enabled', True)
+if metrics.enabled:
+    register_instrumentation(
+        server, engine, get_setting('instrumentation', 'endpoint', '/metrics'),
+        profiling=get_setting('instrumentation', 'profiling', False),
+    )
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Solo per lo sviluppo: in produzione il server è gunicorn (vedi wsgi.py)
+    app.run(
+        host=get_setting('server', 'host', '127.0.0.1'),
+        port=get_setting('server', 'port', 8050),
+        debug=get_setting('server', 'debug', False),
+    )
@@ -1,317 +1,514 @@
 from dash.dependencies import Input, Output, State
-import plotly.express as px
-import pandas as pd
+from dash.exceptions import PreventUpdate
+from dash import Patch, ctx, no_update
+import json
 import numpy as np
-PRICE_MAP = {
-    'grano': 230,
-    'soia': 510,
-    'orzo': 215,
-    'girasole': 420,
-    'mais': 200
-}
-BASE_VAR_COST_MAP = {
-    'grano': 800,
-    'soia': 900,
-    'orzo': 750,
-    'girasole': 850,
-    'mais': 1000
-}
-from simulator.environmental import EnvironmentalDataGenerator
-from simulator.production import AgriculturalProductionGenerator
+from simulator.engine import SimulationEngine, LRUCache
+from simulator.streaming import LiveSimulation
 from datetime import datetime
+import uuid
 import dash_bootstrap_components as dbc
-from dash import html, dcc
+from dashboard.components.kpi_section import create_kpi_card
+from dashboard.components.tabs import TAB_IDS, SENSITIVITY_PARAMETERS, SENSITIVITY_METRICS
+from dashboard.figures import date_strings, ols_line, trace_values
+from dashboard.downsample import downsample_indices, window
+from simulator.config import get_setting, resolve_path
+from simulator.results import ResultsStore
+from simulator.metrics import timer
+from simulator.jobs import JobManager, DONE, FAILED
+from simulator.production import CROP_REGISTRY
+from simulator.sensitivity import sensitivity_sweep
+
+# Risultati pesanti (Monte Carlo) salvati su disco e riutilizzati tra riavvii
+RESULTS_DIR = get_setting('storage', 'results_dir')
+results_store = ResultsStore(resolve_path(RESULTS_DIR)) if RESULTS_DIR else None
+
+# Motore di simulazione condiviso: i callback leggono lo stesso risultato
+# invece di rieseguire la pipeline a ogni click o cambio di scheda.
+engine = SimulationEngine('Azienda Agricola', maxsize=32, ttl=600, store=results_store)
+
+# Numero di traiettorie meteo per la scheda Previsioni
+FORECAST_TRAJECTORIES = 5000
+# Processi del Monte Carlo per ogni worker del server (None = tutte le CPU)
+FORECAST_WORKERS = get_setting('server', 'montecarlo_workers')
+
+# Risoluzione massima dei grafici temporali (vedi config/settings.yaml)
+MAX_POINTS = get_setting('dashboard', 'max_points', 2000)
+DOWNSAMPLE_METHOD = get_setting('dashboard', 'downsample_method', 'minmax')
+
+# Job in background per le analisi lunghe (Monte Carlo della scheda Previsioni)
+jobs = JobManager(
+    max_workers=get_setting('dashboard', 'job_workers', 1),
+    ttl=get_setting('dashboard', 'job_ttl', 600),
+)
+
+# Punti per asse della mappa di calore di sensibilità
+SENSITIVITY_POINTS = get_setting('dashboard', 'sensitivity_points', 100)
+
+# Simulazioni live in corso, per sessione del browser
+STREAM_CHUNK_DAYS = get_setting('dashboard', 'stream_chunk_days', 7)
+STREAM_CHUNKS_PER_TICK = get_setting('dashboard', 'stream_chunks_per_tick', 1)
+live_sessions = LRUCache(maxsize=64, ttl=1800)
+
+# Serie mostrata da ciascun grafico temporale: (tabella del risultato, colonna)
+LINE_SERIES = {
+    'temp-graph': ('env_data', 'temperature'),
+    'hum-graph': ('env_data', 'humidity'),
+    'prec-graph': ('env_data', 'precipitation'),
+    'solar-graph': ('env_data', 'solar_radiation'),
+    'yield-graph': ('prod_data', 'yield'),
+    'yield-cum-graph': ('prod_data', 'cum_yield'),
+    'revenue-graph': ('financial_data', 'revenue'),
+    'costs-graph': ('financial_data', 'costs'),
+    'profit-graph': ('financial_data', 'profit'),
+}
+# Serie aggregate per settimana/mese con la media invece della somma
+MEAN_SERIES = {'temperature', 'humidity', 'solar_radiation'}
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        return datetime.strptime(value.split('T')[0], "%Y-%m-%d").strftime("%Y-%m-%d")
+    return value
+
+
+def make_handle(n_clicks, start_date, end_date, crop_type, farm_size):
+    """
+    Riferimento leggero alla simulazione, salvato in un dcc.Store lato client.
+    I dati restano sul server: il seme dipende dal numero di click su
+    "Aggiorna Dashboard", quindi ogni aggiornamento produce una nuova
+    estrazione condivisa da KPI e grafici.
+    """
+    return {
+        'start_date': _parse_date(start_date),
+        'end_date': _parse_date(end_date),
+        'crop_type': crop_type,
+        'farm_size': farm_size,
+        'seed': n_clicks or 0,
+    }
+
+
+def load_simulation(handle):
+    """Restituisce il risultato (eventualmente in cache) della simulazione."""
+    with timer('callback.load_simulation'):
+        return engine.run(**handle)
+
+
+def load_forecast(handle, progress=None):
+    """Restituisce il risultato (eventualmente in cache) della simulazione Monte Carlo."""
+    with timer('callback.load_forecast'):
+        return engine.monte_carlo(
+            **handle, n_trajectories=FORECAST_TRAJECTORIES, n_workers=FORECAST_WORKERS, progress=progress
+        )
+
+
+def forecast_ready(handle):
+    """Vero se il Monte Carlo di ``handle`` è già in cache o su disco."""
+    return engine.has_monte_carlo(**handle, n_trajectories=FORECAST_TRAJECTORIES)
+
+
+def submit_forecast(handle):
+    """
+    Avvia (o riusa, se già in corso per gli stessi input) il job in
+    background del Monte Carlo di ``handle``.
+    """
+    return jobs.submit(('forecast', json.dumps(handle, sort_keys=True)), load_forecast, handle)
+
+
+def _set_trace(patch, x, y, trace=0):
+    patch['data'][trace]['x'] = x
+    patch['data'][trace]['y'] = y
+    return patch
+
+
+def load_series(handle, graph_id, granularity='D'):
+    """
+    Date e valori completi della serie mostrata da ``graph_id``, giornalieri
+    o aggregati per settimana/mese (``granularity``). Gli aggregati e la resa
+    cumulativa vengono dall'indice ``rollups`` del risultato, costruito una
+    volta per simulazione.
+    """
+    frame, column = LINE_SERIES[graph_id]
+    result = load_simulation(handle)
+    if column == 'cum_yield':
+        return result.rollups.rollup('yield', granularity, cumulative=True)
+    if granularity != 'D':
+        return result.rollups.rollup(column, granularity, how='mean' if column in MEAN_SERIES else 'sum')
+    data = getattr(result, frame)
+    return data['date'].to_numpy(), data[column].to_numpy()
+
+
+def series_patch(handle, graph_id, x_range=None, granularity='D'):
+    """
+    Patch con la serie di ``graph_id`` ridotta a circa ``MAX_POINTS`` punti
+    nell'intervallo visibile ``x_range`` (tutta la serie se None), mantenendo
+    picchi e valori estremi.
+    """
+    dates, values = load_series(handle, graph_id, granularity)
+    with timer('figures.downsample'):
+        visible = window(dates, x_range)
+        dates, values = dates[visible], values[visible]
+        keep = downsample_indices(values, MAX_POINTS, DOWNSAMPLE_METHOD)
+        return _set_trace(Patch(), date_strings(dates[keep]), trace_values(values[keep]))
+
+
+def parse_x_range(relayout_data):
+    """
+    Intervallo dell'asse x da ``relayoutData``: None se l'utente ha
+    ripristinato la vista completa, PreventUpdate se l'evento non riguarda x.
+    """
+    relayout_data = relayout_data or {}
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    if relayout_data.get('xaxis.autorange') or relayout_data.get('autosize'):
+        return None
+    raise PreventUpdate
+
+
+def _new_series_patch(handle, graph_id, granularity='D'):
+    # Una nuova simulazione (o granularità) riparte dalla vista completa
+    patch = series_patch(handle, graph_id, granularity=granularity)
+    patch['layout']['xaxis']['autorange'] = True
+    return patch
+
+
+def environmental_updates(handle, granularity='D'):
+    return [
+        _new_series_patch(handle, graph_id, granularity)
+        for graph_id in ['temp-graph', 'hum-graph', 'prec-graph', 'solar-graph']
+    ]
+
+
+def production_updates(handle, granularity='D'):
+    prod_data = load_simulation(handle).prod_data
+    daily_yield = prod_data['yield'].to_numpy()
+    temperature = prod_data['temperature'].to_numpy()
+
+    yield_patch = _new_series_patch(handle, 'yield-graph', granularity)
+    yield_patch['layout']['title']['text'] = f"Resa Giornaliera di {handle['crop_type'].capitalize()}"
+
+    # La nuvola di punti è sottocampionata a passo costante; la retta usa tutti i dati
+    step = max(1, -(-len(daily_yield) // MAX_POINTS))
+    scatter_patch = _set_trace(Patch(), trace_values(temperature[::step]), trace_values(daily_yield[::step]))
+    _set_trace(scatter_patch, *ols_line(temperature, daily_yield), trace=1)
+
+    cumulative_patch = _new_series_patch(handle, 'yield-cum-graph', granularity)
+    return [yield_patch, scatter_patch, cumulative_patch]
+
+
+def financial_updates(handle, granularity='D'):
+    rollups = load_simulation(handle).rollups
+    patches = [
+        _new_series_patch(handle, graph_id, granularity)
+        for graph_id in ['revenue-graph', 'costs-graph', 'profit-graph']
+    ]
+    pie_patch = Patch()
+    pie_patch['data'][0]['values'] = [rollups.total('revenue'), rollups.total('costs')]
+    return patches + [pie_patch]
+
+
+def forecast_updates(handle):
+    # Bande percentili da traiettorie meteo Monte Carlo
+    mc = load_forecast(handle)
+    patches = []
+    for label, metric in [('Resa', 'yield'), ('Profitto', 'profit'), ('Costi', 'costs'), ('ROI', 'roi')]:
+        patch = Patch()
+        patch['data'][0]['y'] = [mc.bands[metric][p] for p in mc.percentiles]
+        patch['layout']['title']['text'] = f"Previsione {label} ({mc.n_trajectories} traiettorie)"
+        patches.append(patch)
+    return patches
+
+
+def sensitivity_axis(name, crop_type, n_points=SENSITIVITY_POINTS):
+    """Valori esplorati per il parametro ``name``: intorno al valore della coltura."""
+    if name == 'farm_size':
+        return np.geomspace(10, 1000, n_points)
+    if name == 'optimal_temp':
+        return np.linspace(-5, 5, n_points)
+    spread = 0.5 if name == 'water_requirement' else 0.3
+    return CROP_REGISTRY[crop_type][name] * np.linspace(1 - spread, 1 + spread, n_points)
+
+
+def sensitivity_updates(handle, x_param, y_param, metric):
+    """Mappa di calore di ``metric`` sui parametri ``x_param`` e ``y_param``."""
+    if x_param == y_param:
+        raise PreventUpdate
+    env_data = load_simulation(handle).env_data
+    crop_type = handle['crop_type']
+    result = sensitivity_sweep(
+        env_data['temperature'].to_numpy(), env_data['precipitation'].to_numpy(), crop_type,
+        {name: sensitivity_axis(name, crop_type) for name in (x_param, y_param)},
+        farm_size=handle['farm_size'], dates=env_data['date'].to_numpy(),
+    )
+    labels = {option['value']: option['label'] for option in SENSITIVITY_PARAMETERS + SENSITIVITY_METRICS}
+
+    # Arrotondati: 10 000 celle a piena precisione raddoppiano il payload
+    patch = Patch()
+    patch['data'][0]['x'] = np.round(result.axes[x_param], 4)
+    patch['data'][0]['y'] = np.round(result.axes[y_param], 4)
+    patch['data'][0]['z'] = np.round(result.grid(metric, x_param, y_param), 2)
+    patch['data'][0]['colorbar']['title'] = {'text': labels[metric]}
+    patch['layout']['title']['text'] = f"Sensibilità: {labels[metric]} ({crop_type.capitalize()})"
+    patch['layout']['xaxis'] = {'title': {'text': labels[x_param]}, 'type': 'log' if x_param == 'farm_size' else 'linear'}
+    patch['layout']['yaxis'] = {'title': {'text': labels[y_param]}, 'type': 'log' if y_param == 'farm_size' else 'linear'}
+    return patch
+
+
+# Grafici di ciascuna scheda e funzione che ne calcola gli aggiornamenti
+TAB_UPDATES = {
+    "tab-environmental": (['temp-graph', 'hum-graph', 'prec-graph', 'solar-graph'], environmental_updates),
+    "tab-production": (['yield-graph', 'yield-temp-graph', 'yield-cum-graph'], production_updates),
+    "tab-financial": (['revenue-graph', 'costs-graph', 'profit-graph', 'profit-pie-graph'], financial_updates),
+    "tab-forecast": (['forecast-yield-graph', 'forecast-profit-graph', 'forecast-costs-graph', 'forecast-roi-graph'],
+                     forecast_updates),
+}
+
+# Schede calcolate da un job in background invece che nel callback
+BACKGROUND_TABS = {"tab-forecast"}
+
+# Il cambio di scheda avviene nel browser: nessun round-trip verso il server
+SWITCH_TAB_JS = """
+function(active_tab) {
+    return %s.map(function(tab) {
+        return tab === active_tab ? {} : {"display": "none"};
+    });
+}
+""" % json.dumps(TAB_IDS)
+
+
+def build_kpi_cards(handle):
+    """Schede KPI per la simulazione indicata da ``handle``."""
+    return kpi_cards(load_simulation(handle).kpis.snapshot())
+
+
+def kpi_cards(kpis):
+    """Schede KPI a partire da uno snapshot di ``KPIAggregator``."""
+    production_trend = kpis['production_trend']
+    efficiency_trend = kpis['efficiency_trend']
+    costs_trend = kpis['costs_trend']
+    profit_trend = kpis['profit_trend']
+
+    production_str = f"{kpis['total_yield']:,.1f} t"
+    efficiency_str = f"{kpis['efficiency']:.1f}%"
+    costs_str = f"€ {int(kpis['total_costs']):,}"
+    profit_str = f"€ {int(kpis['total_profit']):,}"
+
+    return [
+        dbc.Col(create_kpi_card("Produzione", production_str, production_trend, "bi-basket", production_trend >= 0), md=3),
+        dbc.Col(create_kpi_card("Efficienza", efficiency_str, efficiency_trend, "bi-graph-up", efficiency_trend >= 0), md=3),
+        dbc.Col(create_kpi_card("Costi", costs_str, costs_trend, "bi-currency-euro", costs_trend < 0), md=3),
+        dbc.Col(create_kpi_card("Profitto", profit_str, profit_trend, "bi-piggy-bank", profit_trend >= 0), md=3)
+    ]
+
+
+def live_simulation(session):
+    """
+    Simulazione live della sessione. Se questo processo non la conosce
+    (scaduta o servita da un altro worker) riprende dal checkpoint salvato
+    nel browser, senza rieseguire i giorni già elaborati.
+    """
+    live = live_sessions.get(session['id'])
+    if live is None or live.position != session['position']:
+        live = LiveSimulation(engine.location, chunk_size=STREAM_CHUNK_DAYS,
+                              checkpoint=session.get('checkpoint'), **session['handle'])
+        live_sessions.put(session['id'], live)
+    return live
+
+
+def _register_tab(app, tab_id, graph_ids, build_updates):
+    @app.callback(
+        [Output(graph_id, "figure") for graph_id in graph_ids] +
+        [Output(f"rendered-{tab_id}", "data")],
+        [Input("simulation-handle", "data"),
+         Input("card-tabs", "active_tab"),
+         Input("granularity", "value")],
+        [State(f"rendered-{tab_id}", "data")]
+    )
+    def render_tab_content(handle, active_tab, granularity, rendered):
+        # Le schede nascoste o già aggiornate (stessa simulazione e
+        # granularità) non ricevono dati
+        view = dict(handle, granularity=granularity) if handle else None
+        if handle is None or active_tab != tab_id or rendered == view:
+            raise PreventUpdate
+        with timer(f'callback.render_tab.{tab_id}'):
+            return build_updates(handle, granularity) + [view]
+
+
+def _register_zoom(app, graph_id):
+    @app.callback(
+        Output(graph_id, "figure", allow_duplicate=True),
+        [Input(graph_id, "relayoutData")],
+        [State("simulation-handle", "data"),
+         State("granularity", "value")],
+        prevent_initial_call=True
+    )
+    def rescale_on_zoom(relayout_data, handle, granularity):
+        # Ricampiona solo l'intervallo visibile quando l'utente fa zoom
+        x_range = parse_x_range(relayout_data)
+        if handle is None:
+            raise PreventUpdate
+        with timer('callback.zoom'):
+            return series_patch(handle, graph_id, x_range, granularity)
+
+
+def _register_forecast_job(app):
+    graph_ids = TAB_UPDATES["tab-forecast"][0]
+    figures = [Output(graph_id, "figure", allow_duplicate=True) for graph_id in graph_ids]
+    job_outputs = [Output("rendered-tab-forecast", "data", allow_duplicate=True),
+                   Output("forecast-job", "data", allow_duplicate=True),
+                   Output("forecast-interval", "disabled", allow_duplicate=True),
+                   Output("forecast-progress", "value", allow_duplicate=True),
+                   Output("forecast-progress", "label", allow_duplicate=True)]
+    unchanged = [no_update] * len(graph_ids)
+
+    @app.callback(
+        figures + job_outputs,
+        [Input("simulation-handle", "data"),
+         Input("card-tabs", "active_tab")],
+        [State("rendered-tab-forecast", "data"),
+         State("forecast-job", "data")],
+        prevent_initial_call='initial_duplicate'
+    )
+    def start_forecast(handle, active_tab, rendered, job_state):
+        # Input cambiati: il job della simulazione precedente non serve più
+        if job_state and job_state['handle'] != handle:
+            jobs.cancel(job_state['id'])
+            job_state = None
+            stopped = unchanged + [no_update, None, True, 0, ""]
+        else:
+            stopped = None
+
+        if handle is None or active_tab != "tab-forecast" or rendered == handle:
+            if stopped is None:
+                raise PreventUpdate
+            return stopped
+        if job_state:
+            # Job già in corso per questa simulazione
+            raise PreventUpdate
+        if forecast_ready(handle):
+            return forecast_updates(handle) + [handle, None, True, 100, ""]
+        job = submit_forecast(handle)
+        return unchanged + [no_update, {'id': job.id, 'handle': handle}, False, 0, ""]
+
+    @app.callback(
+        figures + job_outputs,
+        [Input("forecast-interval", "n_intervals")],
+        [State("forecast-job", "data")],
+        prevent_initial_call=True
+    )
+    def poll_forecast(n_intervals, job_state):
+        if not job_state:
+            raise PreventUpdate
+        handle = job_state['handle']
+        job = jobs.get(job_state['id'])
+        if job is None:
+            # Job scaduto o avviato da un altro worker: lo si riprende qui
+            # (il risultato, se già calcolato, è su disco)
+            job = submit_forecast(handle)
+            job_state = {'id': job.id, 'handle': handle}
+        if not job.done:
+            return unchanged + [no_update, job_state, False, job.progress * 100, f"{job.progress:.0%}"]
+        if job.status == DONE:
+            with timer('callback.render_tab.tab-forecast'):
+                return forecast_updates(handle) + [handle, None, True, 100, ""]
+        label = f"Errore: {job.error}" if job.status == FAILED else ""
+        return unchanged + [no_update, None, True, 0, label]
+
+
+def _register_sensitivity(app):
+    @app.callback(
+        Output("sensitivity-graph", "figure"),
+        [Input("simulation-handle", "data"),
+         Input("card-tabs", "active_tab"),
+         Input("sensitivity-x", "value"),
+         Input("sensitivity-y", "value"),
+         Input("sensitivity-metric", "value")]
+    )
+    def render_sensitivity(handle, active_tab, x_param, y_param, metric):
+        # La griglia si ricalcola solo quando la scheda è visibile
+        if handle is None or active_tab != "tab-sensitivity":
+            raise PreventUpdate
+        with timer('callback.render_tab.tab-sensitivity'):
+            return sensitivity_updates(handle, x_param, y_param, metric)
+
 
 def register_callbacks(app):
-    
+
     @app.callback(
-        Output("tab-content", "children"),
-        [Input("card-tabs", "active_tab"),
-         Input("update-button", "n_clicks")],
+        Output("simulation-handle", "data"),
+        [Input("update-button", "n_clicks")],
         [State("date-range-picker", "start_date"),
          State("date-range-picker", "end_date"),
          State("crop-type-dropdown", "value"),
          State("farm-size-input", "value")]
     )
-    def render_tab_content(active_tab, n_clicks, start_date, end_date, crop_type, farm_size):
-        # Conversione delle date
-        if isinstance(start_date, str):
-            start_date = datetime.strptime(start_date.split('T')[0], "%Y-%m-%d").strftime("%Y-%m-%d")
-        if isinstance(end_date, str):
-            end_date = datetime.strptime(end_date.split('T')[0], "%Y-%m-%d").strftime("%Y-%m-%d")
-            
-        # Genera i dati
-        env_gen = EnvironmentalDataGenerator('Azienda Agricola', start_date, end_date)
-        env_data = env_gen.generate()
-        prod_gen = AgriculturalProductionGenerator(env_data, crop_type, farm_size)
-        prod_data = prod_gen.simulate()
-        
-        # Prezzo di vendita per la coltura selezionata
-        price_per_ton = PRICE_MAP.get(crop_type, 250)
-        if crop_type not in PRICE_MAP:
-            print(f"[WARN] Prezzo non definito per {crop_type}. Uso 250 €/t di default.")
-
-        business_fixed_cost = 15000
-        land_rent_per_ha = 300
-        land_rent = land_rent_per_ha * farm_size
-        base_var_cost = BASE_VAR_COST_MAP.get(crop_type, 800)
-        variable_cost_per_ha = max(
-            base_var_cost / (1 + 0.4 * np.log1p(farm_size)),
-            0.5 * base_var_cost
-        )
-        variable_cost = variable_cost_per_ha * farm_size
-        total_cost = business_fixed_cost + land_rent + variable_cost
-        base_daily_cost = total_cost / len(env_data)
-        daily_cost_series = base_daily_cost * (
-            1 + np.random.normal(loc=0, scale=0.1, size=len(env_data))
-        )
-        financial_data = pd.DataFrame({
-            'date': env_data['date'],
-            'revenue': prod_data['yield'] * price_per_ton,
-            'costs': daily_cost_series,
-            'profit': (prod_data['yield'] * price_per_ton) - daily_cost_series,
-        })
-        
-        # Crea il contenuto in base alla scheda attiva
-        if active_tab == "tab-environmental":
-            return [
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='temp-graph',
-                        figure=px.line(env_data, x='date', y='temperature', title='Temperatura Giornaliera')
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='hum-graph',
-                        figure=px.line(env_data, x='date', y='humidity', title='Umidità Giornaliera')
-                    ), md=6)
-                ]),
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='prec-graph',
-                        figure=px.line(env_data, x='date', y='precipitation', title='Precipitazioni Giornaliere')
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='solar-graph',
-                        figure = px.line(env_data, x='date', y='solar_radiation', title='Radiazione Solare Giornaliera')
-                    ), md=6)
-                ])
-            ]
-        
-        elif active_tab == "tab-production":
-            return [
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='yield-graph',
-                        figure=px.line(prod_data, x='date', y='yield', title=f'Resa Giornaliera di {crop_type.capitalize()}')
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='yield-temp-graph',
-                        figure=px.scatter(pd.merge(prod_data, env_data, on='date'), 
-                                         x='temperature_x', y='yield', title='Correlazione Temperatura-Resa',
-                                         trendline='ols')
-                    ), md=6)
-                ]),
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='yield-cum-graph',
-                        figure=px.area(prod_data.assign(cum_yield=prod_data['yield'].cumsum()), 
-                                       x='date', y='cum_yield', title='Resa Cumulativa')
-                    ), md=12)
-                ])
-            ]
-        
-        elif active_tab == "tab-financial":
-            return [
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='revenue-graph',
-                        figure=px.line(financial_data, x='date', y='revenue', title='Ricavi Giornalieri')
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='costs-graph',
-                        figure=px.line(financial_data, x='date', y='costs', title='Costi Giornalieri')
-                    ), md=6)
-                ]),
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='profit-graph',
-                        figure=px.line(financial_data, x='date', y='profit', title='Profitto Giornaliero')
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='profit-pie-graph',
-                        figure=px.pie(
-                            names=['Ricavi', 'Costi'], 
-                            values=[financial_data['revenue'].sum(), financial_data['costs'].sum()],
-                            title='Ripartizione Finanziaria'
-                        )
-                    ), md=6)
-                ])
-            ]
-        
-        elif active_tab == "tab-forecast":
-            mean_yield = prod_data['yield'].mean()
-            mean_profit = financial_data['profit'].mean()
-            mean_cost = financial_data['costs'].mean()
-
-            scenario_labels = ['Pessimistico', 'Neutro', 'Ottimistico']
-            yield_mult   = np.array([0.8, 1.0, 1.2])
-            profit_mult  = np.array([0.7, 1.0, 1.3])
-            cost_mult    = np.array([1.2, 1.0, 0.9])
-
-            scenario_yield  = mean_yield  * yield_mult
-            scenario_profit = mean_profit * profit_mult
-            scenario_costs  = mean_cost   * cost_mult
-            scenario_roi    = (scenario_profit / total_cost) * 100  # ROI %
-
-            forecast_data = pd.DataFrame({
-                'scenario': scenario_labels * 4,
-                'metrica':  ['Resa']*3 + ['Profitto']*3 + ['Costi']*3 + ['ROI']*3,
-                'valore':   list(scenario_yield) + list(scenario_profit) + list(scenario_costs) + list(scenario_roi)
-            })
-            
-            return [
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='forecast-yield-graph',
-                        figure=px.bar(
-                            forecast_data[forecast_data['metrica'] == 'Resa'], 
-                            x='scenario', y='valore', title='Previsione Resa',
-                            color='scenario', barmode='group'
-                        )
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='forecast-profit-graph',
-                        figure=px.bar(
-                            forecast_data[forecast_data['metrica'] == 'Profitto'], 
-                            x='scenario', y='valore', title='Previsione Profitto',
-                            color='scenario', barmode='group'
-                        )
-                    ), md=6)
-                ]),
-                dbc.Row([
-                    dbc.Col(dcc.Graph(
-                        id='forecast-costs-graph',
-                        figure=px.bar(
-                            forecast_data[forecast_data['metrica'] == 'Costi'], 
-                            x='scenario', y='valore', title='Previsione Costi',
-                            color='scenario', barmode='group'
-                        )
-                    ), md=6),
-                    dbc.Col(dcc.Graph(
-                        id='forecast-roi-graph',
-                        figure=px.bar(
-                            forecast_data[forecast_data['metrica'] == 'ROI'], 
-                            x='scenario', y='valore', title='Previsione ROI',
-                            color='scenario', barmode='group'
-                        )
-                    ), md=6)
-                ])
-            ]
-    
+    def update_simulation_handle(n_clicks, start_date, end_date, crop_type, farm_size):
+        return make_handle(n_clicks, start_date, end_date, crop_type, farm_size)
+
+    app.clientside_callback(
+        SWITCH_TAB_JS,
+        [Output(f"pane-{tab_id}", "style") for tab_id in TAB_IDS],
+        Input("card-tabs", "active_tab")
+    )
+
+    for tab_id, (graph_ids, build_updates) in TAB_UPDATES.items():
+        if tab_id not in BACKGROUND_TABS:
+            _register_tab(app, tab_id, graph_ids, build_updates)
+    _register_forecast_job(app)
+    _register_sensitivity(app)
+
+    for graph_id in LINE_SERIES:
+        _register_zoom(app, graph_id)
+
     @app.callback(
-        Output("kpi-row", "children"),
-        [Input("update-button", "n_clicks")],
+        [Output("stream-session", "data"),
+         Output("stream-interval", "disabled"),
+         Output("stream-progress", "value")],
+        [Input("stream-button", "n_clicks"),
+         Input("update-button", "n_clicks")],
         [State("date-range-picker", "start_date"),
          State("date-range-picker", "end_date"),
          State("crop-type-dropdown", "value"),
-         State("farm-size-input", "value")]
+         State("farm-size-input", "value")],
+        prevent_initial_call=True
     )
-    def update_kpi_cards(n_clicks, start_date, end_date, crop_type, farm_size):
-        from dashboard.components.kpi_section import create_kpi_card
-        from dash import html
-        import dash_bootstrap_components as dbc
-
-        if isinstance(start_date, str):
-            start_date = datetime.strptime(start_date.split('T')[0], "%Y-%m-%d").strftime("%Y-%m-%d")
-        if isinstance(end_date, str):
-            end_date = datetime.strptime(end_date.split('T')[0], "%Y-%m-%d").strftime("%Y-%m-%d")
-
-        env_gen = EnvironmentalDataGenerator('Azienda Agricola', start_date, end_date)
-        env_data = env_gen.generate()
-        prod_gen = AgriculturalProductionGenerator(env_data, crop_type, farm_size)
-        prod_data = prod_gen.simulate()
-
-        price_per_ton = PRICE_MAP.get(crop_type, 250)
-        if crop_type not in PRICE_MAP:
-            print(f"[WARN] Prezzo non definito per {crop_type}. Uso 250 €/t di default.")
-
-        business_fixed_cost = 15000
-        land_rent_per_ha = 300
-        land_rent = land_rent_per_ha * farm_size
-        base_var_cost = BASE_VAR_COST_MAP.get(crop_type, 800)
-        variable_cost_per_ha = max(
-            base_var_cost / (1 + 0.4 * np.log1p(farm_size)),
-            0.5 * base_var_cost
-        )
-        variable_cost = variable_cost_per_ha * farm_size
-        total_cost = business_fixed_cost + land_rent + variable_cost
-        base_daily_cost = total_cost / len(env_data)
-        daily_cost_series = base_daily_cost * (
-            1 + np.random.normal(loc=0, scale=0.1, size=len(env_data))
-        )
-        financial_data = pd.DataFrame({
-            'date': env_data['date'],
-            'revenue': prod_data['yield'] * price_per_ton,
-            'costs': daily_cost_series,
-            'profit': (prod_data['yield'] * price_per_ton) - daily_cost_series,
-        })
-
-        total_yield = prod_data['yield'].sum()
-        potential_yield = prod_gen.crop_parameters[crop_type]['base_yield'] * farm_size
-        efficiency_val = (total_yield / potential_yield) * 100 if potential_yield else 0
-        total_costs = financial_data['costs'].sum()
-        total_profit = financial_data['profit'].sum()
-
-        if len(prod_data) >= 14:
-            production_last_week = prod_data.iloc[-7:]['yield'].sum()
-            production_prev_week = prod_data.iloc[-14:-7]['yield'].sum()
-            production_trend = (
-                (production_last_week - production_prev_week) / production_prev_week * 100
-                if production_prev_week else 0
-            )
-        else:
-            production_trend = 0
-
-        if len(financial_data) >= 14:
-            profit_last_week = financial_data.iloc[-7:]['profit'].sum()
-            profit_prev_week = financial_data.iloc[-14:-7]['profit'].sum()
-            profit_trend = (
-                (profit_last_week - profit_prev_week) / abs(profit_prev_week) * 100
-                if profit_prev_week else 0
-            )
-
-            costs_last_week = financial_data.iloc[-7:]['costs'].sum()
-            costs_prev_week = financial_data.iloc[-14:-7]['costs'].sum()
-            costs_trend = (
-                (costs_last_week - costs_prev_week) / costs_prev_week * 100
-                if costs_prev_week else 0
-            )
-        else:
-            profit_trend = 0
-            costs_trend = 0
-
-        if len(prod_data) >= 14:
-            efficiency_last_week = (
-                production_last_week / (farm_size * prod_gen.crop_parameters[crop_type]['base_yield']) * 100
-            )
-            efficiency_prev_week = (
-                production_prev_week / (farm_size * prod_gen.crop_parameters[crop_type]['base_yield']) * 100
-            )
-            efficiency_trend = (
-                (efficiency_last_week - efficiency_prev_week) / efficiency_prev_week * 100
-                if efficiency_prev_week else 0
-            )
-        else:
-            efficiency_trend = 0
-
-        production_str = f"{total_yield:,.1f} t"
-        efficiency_str = f"{efficiency_val:.1f}%"
-        costs_str = f"€ {int(total_costs):,}"
-        profit_str = f"€ {int(total_profit):,}"
-
-        return [
-            dbc.Col(create_kpi_card("Produzione", production_str, production_trend, "bi-basket", production_trend >= 0), md=3),
-            dbc.Col(create_kpi_card("Efficienza", efficiency_str, efficiency_trend, "bi-graph-up", efficiency_trend >= 0), md=3),
-            dbc.Col(create_kpi_card("Costi", costs_str, costs_trend, "bi-currency-euro", costs_trend < 0), md=3),
-            dbc.Col(create_kpi_card("Profitto", profit_str, profit_trend, "bi-piggy-bank", profit_trend >= 0), md=3)
-        ]
+    def toggle_stream(stream_clicks, update_clicks, start_date, end_date, crop_type, farm_size):
+        # "Aggiorna Dashboard" interrompe la simulazione live in corso
+        if ctx.triggered_id != "stream-button":
+            return None, True, 0
+        session = {
+            'id': uuid.uuid4().hex,
+            'handle': make_handle(stream_clicks, start_date, end_date, crop_type, farm_size),
+            'position': 0,
+        }
+        return session, False, 0
+
+    @app.callback(
+        [Output("kpi-row", "children", allow_duplicate=True),
+         Output("stream-progress", "value", allow_duplicate=True),
+         Output("stream-session", "data", allow_duplicate=True),
+         Output("stream-interval", "disabled", allow_duplicate=True)],
+        [Input("stream-interval", "n_intervals")],
+        [State("stream-session", "data")],
+        prevent_initial_call=True
+    )
+    def advance_stream(n_intervals, session):
+        if not session:
+            raise PreventUpdate
+        with timer('callback.advance_stream'):
+            live = live_simulation(session)
+            live.advance(STREAM_CHUNKS_PER_TICK)
+        session = dict(session, position=live.position, checkpoint=live.checkpoint())
+        return kpi_cards(live.kpis.snapshot()), live.progress, session, live.done
+
+    @app.callback(
+        Output("kpi-row", "children"),
+        [Input("simulation-handle", "data")]
+    )
+    def update_kpi_cards(handle):
+        if handle is None:
+            raise PreventUpdate
+        with timer('callback.kpi_cards'):
+            return build_kpi_cards(handle)
@@ -12,8 +12,8 @@ def create_control_panel():
             html.H5("Intervallo Date", className="mt-2"),
             dcc.DatePickerRange(
                 id='date-range-picker',
-                min_date_allowed=date(2024, 1, 1),
-                max_date_allowed=date(2024, 12, 31),
+                min_date_allowed=date(2000, 1, 1),
+                max_date_allowed=date(2050, 12, 31),
                 start_date=date(2024, 1, 1),
                 end_date=date(2024, 12, 31),
                 display_format='DD/MM/YYYY',
@@ -54,6 +54,18 @@ def create_control_panel():
                 id="update-button", 
                 color="primary", 
                 className="mt-4 w-100"
-            )
+            ),
+
+            # Simulazione in streaming: i KPI si aggiornano settimana per settimana
+            dbc.Button(
+                "Simulazione Live",
+                id="stream-button",
+                color="secondary",
+                outline=True,
+                className="mt-2 w-100"
+            ),
+            dbc.Progress(id="stream-progress", value=0, className="mt-2"),
+            dcc.Interval(id="stream-interval", interval=250, disabled=True),
+            dcc.Store(id="stream-session")
         ])
     ], className="mb-4 shadow")
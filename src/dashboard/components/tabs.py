@@ -1,18 +1,148 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
+from simulator.config import get_setting
+from dashboard.figures import (
+    empty_line_figure, empty_scatter_trend_figure, empty_pie_figure, empty_bar_figure, empty_heatmap_figure
+)
+
+TAB_IDS = ["tab-environmental", "tab-production", "tab-financial", "tab-forecast", "tab-sensitivity"]
+SCENARIO_LABELS = ['P5', 'P50', 'P95']
+# Parametri e indicatori dell'analisi di sensibilità
+SENSITIVITY_PARAMETERS = [
+    {'label': 'Dimensione azienda (ha)', 'value': 'farm_size'},
+    {'label': 'Prezzo (€/t)', 'value': 'price_per_ton'},
+    {'label': 'Costo variabile (€/ha)', 'value': 'cost_per_hectare'},
+    {'label': 'Fabbisogno idrico (mm/giorno)', 'value': 'water_requirement'},
+    {'label': 'Spostamento temperatura ottimale (°C)', 'value': 'optimal_temp'},
+]
+SENSITIVITY_METRICS = [
+    {'label': 'Profitto', 'value': 'profit'},
+    {'label': 'ROI', 'value': 'roi'},
+    {'label': 'Resa', 'value': 'yield'},
+    {'label': 'Ricavi', 'value': 'revenue'},
+    {'label': 'Costi', 'value': 'costs'},
+]
+# Granularità dei grafici temporali: aggregati letti dall'indice della simulazione
+GRANULARITY_OPTIONS = [
+    {'label': 'Giorno', 'value': 'D'},
+    {'label': 'Settimana', 'value': 'W'},
+    {'label': 'Mese', 'value': 'M'},
+]
+# Intervallo (ms) con cui la scheda Previsioni controlla il job in background
+FORECAST_POLL_MS = get_setting('dashboard', 'job_poll_ms', 500)
+
+
+def _graph(graph_id, figure, md):
+    return dbc.Col(dcc.Graph(id=graph_id, figure=figure), md=md)
+
+
+def _pane(tab_id, rows, visible=False):
+    """
+    Contenitore di una scheda. Tutte le schede restano nel layout: cambiare
+    scheda modifica solo lo stile, i dati arrivano come aggiornamenti parziali.
+    """
+    return html.Div(
+        rows,
+        id=f"pane-{tab_id}",
+        style={} if visible else {"display": "none"}
+    )
+
 
 def create_tabs():
     """
     Crea il sistema di schede per visualizzare diverse categorie di dati
     """
+    environmental = _pane("tab-environmental", [
+        dbc.Row([
+            _graph('temp-graph', empty_line_figure('Temperatura Giornaliera', 'temperature'), 6),
+            _graph('hum-graph', empty_line_figure('Umidità Giornaliera', 'humidity'), 6)
+        ]),
+        dbc.Row([
+            _graph('prec-graph', empty_line_figure('Precipitazioni Giornaliere', 'precipitation'), 6),
+            _graph('solar-graph', empty_line_figure('Radiazione Solare Giornaliera', 'solar_radiation'), 6)
+        ])
+    ], visible=True)
+
+    production = _pane("tab-production", [
+        dbc.Row([
+            _graph('yield-graph', empty_line_figure('Resa Giornaliera', 'yield'), 6),
+            _graph('yield-temp-graph', empty_scatter_trend_figure(
+                'Correlazione Temperatura-Resa', 'temperature', 'yield'), 6)
+        ]),
+        dbc.Row([
+            _graph('yield-cum-graph', empty_line_figure('Resa Cumulativa', 'cum_yield', fill='tozeroy'), 12)
+        ])
+    ])
+
+    financial = _pane("tab-financial", [
+        dbc.Row([
+            _graph('revenue-graph', empty_line_figure('Ricavi Giornalieri', 'revenue'), 6),
+            _graph('costs-graph', empty_line_figure('Costi Giornalieri', 'costs'), 6)
+        ]),
+        dbc.Row([
+            _graph('profit-graph', empty_line_figure('Profitto Giornaliero', 'profit'), 6),
+            _graph('profit-pie-graph', empty_pie_figure('Ripartizione Finanziaria', ['Ricavi', 'Costi']), 6)
+        ])
+    ])
+
+    forecast = _pane("tab-forecast", [
+        # Il Monte Carlo gira in background: avanzamento e job corrente
+        dbc.Progress(id="forecast-progress", value=0, striped=True, animated=True, className="mb-3"),
+        dcc.Interval(id="forecast-interval", interval=FORECAST_POLL_MS, disabled=True),
+        dcc.Store(id="forecast-job"),
+        dbc.Row([
+            _graph('forecast-yield-graph', empty_bar_figure('Previsione Resa', SCENARIO_LABELS), 6),
+            _graph('forecast-profit-graph', empty_bar_figure('Previsione Profitto', SCENARIO_LABELS), 6)
+        ]),
+        dbc.Row([
+            _graph('forecast-costs-graph', empty_bar_figure('Previsione Costi', SCENARIO_LABELS), 6),
+            _graph('forecast-roi-graph', empty_bar_figure('Previsione ROI', SCENARIO_LABELS), 6)
+        ])
+    ])
+
+    sensitivity = _pane("tab-sensitivity", [
+        dbc.Row([
+            dbc.Col([
+                dbc.Label("Asse orizzontale"),
+                dcc.Dropdown(id="sensitivity-x", options=SENSITIVITY_PARAMETERS,
+                             value='farm_size', clearable=False)
+            ], md=4),
+            dbc.Col([
+                dbc.Label("Asse verticale"),
+                dcc.Dropdown(id="sensitivity-y", options=SENSITIVITY_PARAMETERS,
+                             value='price_per_ton', clearable=False)
+            ], md=4),
+            dbc.Col([
+                dbc.Label("Indicatore"),
+                dcc.Dropdown(id="sensitivity-metric", options=SENSITIVITY_METRICS,
+                             value='profit', clearable=False)
+            ], md=4),
+        ], className="mb-3"),
+        dbc.Row([
+            _graph('sensitivity-graph', empty_heatmap_figure('Analisi di Sensibilità'), 12)
+        ])
+    ])
+
+    # Vale per tutte le serie temporali: somme (resa, ricavi, costi, pioggia) o medie
+    granularity = html.Div([
+        dbc.Label("Aggregazione", className="me-3"),
+        dbc.RadioItems(id="granularity", options=GRANULARITY_OPTIONS, value='D', inline=True),
+    ], className="d-flex align-items-center mb-2")
+
     return dbc.Card([
         dbc.CardHeader(
             dbc.Tabs([
                 dbc.Tab(label="Dati Ambientali", tab_id="tab-environmental"),
                 dbc.Tab(label="Produzione", tab_id="tab-production"),
                 dbc.Tab(label="Finanziario", tab_id="tab-financial"),
-                dbc.Tab(label="Previsioni", tab_id="tab-forecast")
+                dbc.Tab(label="Previsioni", tab_id="tab-forecast"),
+                dbc.Tab(label="Sensibilità", tab_id="tab-sensitivity")
             ], id="card-tabs", active_tab="tab-environmental")
         ),
-        dbc.CardBody(html.Div(id="tab-content", className="p-3"))
+        dbc.CardBody(html.Div(
+            [granularity, environmental, production, financial, forecast, sensitivity] +
+            # Ultimo risultato disegnato in ciascuna scheda
+            [dcc.Store(id=f"rendered-{tab_id}") for tab_id in TAB_IDS],
+            id="tab-content", className="p-3"
+        ))
     ], className="shadow")
@@ -0,0 +1,84 @@
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+
+def _first_per_bucket(mask, bucket_id):
+    indices = np.flatnonzero(mask)
+    return indices[np.r_[True, np.diff(bucket_id[indices]) != 0]]
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max bucketing: split the series in ``n_out // 2`` buckets and keep
+    the minimum and maximum of each one, so every peak survives.
+    """
+    y = np.asarray(y)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    # reduceat calcola min e max di ogni bucket in un'unica passata
+    bucket_min = np.minimum.reduceat(y, edges[:-1])
+    bucket_max = np.maximum.reduceat(y, edges[:-1])
+    bucket_id = np.repeat(np.arange(n_buckets), np.diff(edges))
+    return np.union1d(
+        _first_per_bucket(y == bucket_min[bucket_id], bucket_id),
+        _first_per_bucket(y == bucket_max[bucket_id], bucket_id),
+    )
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: keep the point of each bucket that forms
+    the largest triangle with the previous pick and the next bucket's mean.
+    The global minimum and maximum are always kept.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return np.union1d(selected, [int(np.argmin(y)), int(np.argmax(y))])
+
+
+def downsample_indices(y, max_points, method='minmax', x=None):
+    """
+    Indices of at most ~``max_points`` points that preserve the shape and the
+    extremes of ``y``. ``x`` defaults to the sample positions.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Metodo di sottocampionamento sconosciuto: {method}")
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    if method == 'lttb':
+        return lttb_indices(np.arange(len(y)) if x is None else x, y, max_points)
+    return minmax_indices(y, max_points)
+
+
+def window(dates, x_range):
+    """Slice of ``dates`` (sorted datetime64) inside ``x_range`` = (start, end)."""
+    if x_range is None:
+        return slice(None)
+    # risoluzione al secondo: copre anche orizzonti oltre l'anno 2262
+    start, end = (np.datetime64(value, 's') for value in x_range)
+    dates = np.asarray(dates, dtype='datetime64[s]')
+    return slice(np.searchsorted(dates, start, 'left'), np.searchsorted(dates, end, 'right'))
@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Colori degli scenari della scheda Previsioni (P5, P50, P95)
+SCENARIO_COLORS = ['#EF553B', '#636EFA', '#00CC96']
+
+# Parti del template di plotly usate dai grafici cartesiani della dashboard:
+# il resto (polar, geo, scene, colorscale, 20 tipi di traccia, ...) pesava
+# circa 6.5 KB per grafico nella risposta iniziale
+TEMPLATE_LAYOUT_KEYS = (
+    'autotypenumbers', 'colorway', 'font', 'hovermode', 'hoverlabel', 'paper_bgcolor',
+    'plot_bgcolor', 'title', 'xaxis', 'yaxis', 'shapedefaults', 'annotationdefaults',
+)
+TEMPLATE_TRACE_TYPES = ('scatter', 'bar', 'pie', 'heatmap')
+
+
+@lru_cache(maxsize=None)
+def _lean_template():
+    import plotly.io as pio
+    template = pio.templates[pio.templates.default].to_plotly_json()
+    layout = {key: template['layout'][key] for key in TEMPLATE_LAYOUT_KEYS if key in template['layout']}
+    data = {
+        trace_type: [{key: value for key, value in trace.items() if key != 'colorscale'}
+                     for trace in template['data'].get(trace_type, [])]
+        for trace_type in TEMPLATE_TRACE_TYPES
+    }
+    return {'layout': layout, 'data': data}
+
+
+def _figure(traces, title, **layout):
+    """
+    Figura come dizionario con il template ridotto: nessuna validazione di
+    ``go.Figure`` e un template condiviso, costruito una sola volta.
+    """
+    return {
+        'data': traces,
+        'layout': {'template': _lean_template(), 'title': {'text': title}, **layout},
+    }
+
+
+def _axis(title):
+    return {'title': {'text': title}}
+
+
+def empty_line_figure(title, y_title, fill=None):
+    """Figura a linea senza dati: i punti arrivano dopo tramite Patch."""
+    trace = {'type': 'scatter', 'x': [], 'y': [], 'mode': 'lines'}
+    if fill:
+        trace['fill'] = fill
+    return _figure([trace], title, xaxis=_axis('date'), yaxis=_axis(y_title))
+
+
+def empty_scatter_trend_figure(title, x_title, y_title):
+    """Nuvola di punti con una seconda traccia per la retta di regressione."""
+    return _figure(
+        [{'type': 'scatter', 'x': [], 'y': [], 'mode': 'markers', 'name': 'dati'},
+         {'type': 'scatter', 'x': [], 'y': [], 'mode': 'lines', 'name': 'OLS'}],
+        title, xaxis=_axis(x_title), yaxis=_axis(y_title), showlegend=False,
+    )
+
+
+def empty_pie_figure(title, labels):
+    return _figure([{'type': 'pie', 'labels': list(labels), 'values': []}], title)
+
+
+def empty_bar_figure(title, labels):
+    return _figure(
+        [{'type': 'bar', 'x': list(labels), 'y': [], 'marker': {'color': SCENARIO_COLORS[:len(labels)]}}],
+        title, xaxis=_axis('scenario'), yaxis=_axis('valore'),
+    )
+
+
+def empty_heatmap_figure(title):
+    """Mappa di calore senza dati, per le analisi di sensibilità."""
+    return _figure(
+        [{'type': 'heatmap', 'x': [], 'y': [], 'z': [], 'colorscale': 'RdYlGn', 'colorbar': {'title': {'text': ''}}}],
+        title, height=550,
+    )
+
+
+def date_strings(dates):
+    """
+    Date in formato ISO, più compatte dei timestamp completi: solo il giorno
+    per le serie giornaliere, fino ai minuti per quelle infra-giornaliere.
+    Restano un array numpy: il JSON di plotly lo converte in un solo passo,
+    mentre una lista viene visitata elemento per elemento.
+    """
+    dates = np.asarray(dates, dtype='datetime64[s]')
+    daily = (dates.astype('datetime64[D]') == dates).all()
+    return np.datetime_as_string(dates, unit='D' if daily else 'm')
+
+
+def trace_values(values):
+    """
+    Valori di una traccia in float32: sette cifre significative bastano a un
+    grafico e il JSON è circa la metà di quello in float64.
+    """
+    return np.asarray(values, dtype=np.float32)
+
+
+def ols_line(x, y):
+    """
+    Retta dei minimi quadrati in forma chiusa (pendenza cov(x, y) / var(x)),
+    valutata agli estremi di x.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2 or np.ptp(x) == 0:
+        return np.array([]), np.array([])
+    x_mean, y_mean = x.mean(), y.mean()
+    dx = x - x_mean
+    slope = np.dot(dx, y - y_mean) / np.dot(dx, dx)
+    ends = np.array([x.min(), x.max()])
+    return ends, y_mean + slope * (ends - x_mean)
@@ -0,0 +1,132 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+
+from flask import Response, g, request
+
+from simulator.metrics import metrics
+
+# Richieste di aggiornamento dei callback Dash
+DASH_UPDATE_PATH = '/_dash-update-component'
+
+
+class RequestProfiler:
+    """
+    Cattura cProfile di una sola richiesta: ``arm()`` prepara il profilo e la
+    prossima chiamata a un callback viene profilata; il risultato resta
+    disponibile fino alla cattura successiva.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._armed = False
+        self._active = None
+        self.report = None
+
+    def arm(self):
+        with self._lock:
+            self._armed = True
+
+    def start(self):
+        with self._lock:
+            if not self._armed or self._active is not None:
+                return None
+            self._armed = False
+            self._active = cProfile.Profile()
+        self._active.enable()
+        return self._active
+
+    def stop(self, profile, label, limit=40):
+        profile.disable()
+        stream = io.StringIO()
+        stream.write(f"{label}\n\n")
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(limit)
+        with self._lock:
+            self.report = stream.getvalue()
+            self._active = None
+
+
+profiler = RequestProfiler()
+
+
+def _callback_label():
+    # Nome leggibile del callback: gli output del primo componente aggiornato
+    return (request.get_json(silent=True) or {}).get('output', 'sconosciuto')
+
+
+def register_instrumentation(server, engine=None, endpoint='/metrics', profiling=False):
+    """
+    Misura ogni richiesta dei callback Dash ed espone le metriche sul server
+    Flask:
+
+    - ``GET <endpoint>``: istogrammi per fase in formato Prometheus
+      (``?format=json`` per il JSON);
+    - ``GET <endpoint>/profile?arm=1``: profila con cProfile la prossima
+      richiesta di un callback;
+    - ``GET <endpoint>/profile``: ultimo profilo catturato.
+
+    Gli endpoint del profilo non sono autenticati ed espongono i dettagli
+    interni del codice: esistono solo con ``profiling=True``
+    (``instrumentation.profiling`` nelle impostazioni, spento di default).
+
+    La durata della richiesta comprende la serializzazione della risposta,
+    quindi la differenza con la fase ``callback.*`` corrispondente è il
+    costo di serializzazione e trasporto interno di Dash.
+    """
+
+    @server.before_request
+    def _start_timer():
+        if request.path != DASH_UPDATE_PATH:
+            return
+        g.metrics_start = time.perf_counter()
+        if profiling:
+            g.metrics_profile = profiler.start()
+
+    @server.after_request
+    def _stop_timer(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        metrics.observe('http.dash_update', time.perf_counter() - start)
+        metrics.increment('http.dash_update.requests')
+        metrics.increment(f'http.status.{response.status_code}')
+        if response.content_length:
+            metrics.increment('http.dash_update.response_bytes', response.content_length)
+        return response
+
+    @server.teardown_request
+    def _stop_profile(exception=None):
+        # teardown gira anche quando la richiesta solleva un'eccezione e
+        # after_request viene saltato: il profilatore non resta mai attivo
+        profile = g.pop('metrics_profile', None)
+        if profile is not None:
+            profiler.stop(profile, f"{request.path} {_callback_label()}")
+
+    def _gauges():
+        if engine is None:
+            return {}
+        return {f'engine_cache_{name}': value for name, value in engine.stats().items()}
+
+    @server.route(endpoint)
+    def metrics_endpoint():
+        if request.args.get('format') == 'json':
+            return Response(
+                json.dumps(dict(metrics.snapshot(), gauges=_gauges())),
+                mimetype='application/json',
+            )
+        return Response(metrics.to_prometheus(gauges=_gauges()), mimetype='text/plain; version=0.0.4')
+
+    if not profiling:
+        return
+
+    @server.route(f'{endpoint}/profile')
+    def profile_endpoint():
+        if request.args.get('arm'):
+            profiler.arm()
+            return Response("Profilo attivato per la prossima richiesta\n", mimetype='text/plain')
+        if profiler.report is None:
+            return Response("Nessun profilo catturato\n", status=404, mimetype='text/plain')
+        return Response(profiler.report, mimetype='text/plain')
@@ -0,0 +1,20 @@
+"""
+Punto di ingresso WSGI per la produzione:
+
+    gunicorn -c gunicorn.conf.py dashboard.wsgi:server
+
+Con ``preload`` l'app (layout, callback, moduli numerici) viene importata
+una sola volta nel processo master e condivisa dai worker dopo il fork.
+Ogni worker ha la propria cache delle simulazioni: i risultati dipendono
+solo dagli input e dal seme salvato nel browser, quindi worker diversi
+producono gli stessi dati, e i risultati su disco sono scritti in modo
+atomico.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dashboard.app import app, server  # noqa: E402
+
+application = server
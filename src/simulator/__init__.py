@@ -0,0 +1,60 @@
+"""
+Simulatore agricolo: meteo, produzione, modello finanziario e analisi.
+
+I sottomoduli vengono importati solo al primo accesso ai loro nomi, quindi
+``import simulator`` non carica nulla oltre alla libreria standard. Le parti
+numeriche (registro delle colture, kernel di resa, KPI, analisi di
+sensibilità, archivio dei risultati) richiedono solo numpy (e PyYAML per
+leggere la configurazione); pandas serve per la generazione del meteo e per
+le tabelle, Dash solo per la dashboard.
+"""
+import importlib
+
+# Nome pubblico → sottomodulo che lo definisce
+_EXPORTS = {
+    'load_settings': 'config',
+    'get_setting': 'config',
+    'CropRegistry': 'crops',
+    'load_crops': 'crops',
+    'EnvironmentalDataGenerator': 'environmental',
+    'ObservedWeather': 'observed',
+    'MultiSiteGenerator': 'spatial',
+    'AgriculturalProductionGenerator': 'production',
+    'CROP_PARAMETERS': 'production',
+    'CROP_REGISTRY': 'production',
+    'yield_kernel': 'production',
+    'yield_totals': 'production',
+    'growth_factors': 'production',
+    'daily_factors': 'production',
+    'build_financial_data': 'financial',
+    'compute_total_cost': 'financial',
+    'SimulationEngine': 'engine',
+    'SimulationResult': 'engine',
+    'run_monte_carlo': 'montecarlo',
+    'MonteCarloResult': 'montecarlo',
+    'simulate_portfolio': 'portfolio',
+    'sensitivity_sweep': 'sensitivity',
+    'simulate_seasons': 'seasons',
+    'growing_season': 'seasons',
+    'AllocationOptimizer': 'optimizer',
+    'KPIAggregator': 'kpi',
+    'RollupIndex': 'rollups',
+    'LiveSimulation': 'streaming',
+    'ResultsStore': 'results',
+    'JobManager': 'jobs',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,276 @@
+"""
+Batch runner a riga di comando:
+
+    python -m simulator run --crop grano mais --farm-size 50 100 \\
+        --start 2024-01-01 --end 2024-12-31 --seed 0 1 2 --output risultati.csv
+    python -m simulator run --manifest scenarios.yaml --output notte.parquet --daily
+    python -m simulator optimize --farm-size 100 --years 5 --min-cvar -60000
+
+Gli scenari sono il prodotto cartesiano delle opzioni oppure le righe di un
+manifest YAML/CSV (i percorsi relativi si cercano anche in ``config/``).
+Le simulazioni girano su un pool di processi e i risultati vengono scritti
+man mano che arrivano, con al più due scenari per processo in memoria.
+``optimize`` cerca la ripartizione degli ettari tra le colture, anno per
+anno, con il massimo profitto atteso (vedi ``simulator.optimizer``).
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from simulator.config import ROOT_DIR, get_setting, resolve_path
+
+SCENARIO_FIELDS = ('location', 'crop_type', 'farm_size', 'start_date', 'end_date', 'seed')
+DEFAULT_LOCATION = 'Azienda Agricola'
+# Righe di riepilogo accumulate prima di ogni scrittura
+SUMMARY_BATCH = 256
+
+
+def _resolve_manifest(path):
+    if os.path.exists(path) or os.path.isabs(path):
+        return path
+    return os.path.join(ROOT_DIR, 'config', path)
+
+
+def load_manifest(path):
+    """
+    Scenari da un manifest. YAML: una lista di scenari oppure un mapping con
+    ``scenarios`` e, facoltativamente, ``defaults`` comuni a tutti. CSV: una
+    riga per scenario con le colonne di ``SCENARIO_FIELDS``.
+    """
+    path = _resolve_manifest(path)
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            return [{key: value for key, value in row.items() if value not in (None, '')}
+                    for row in csv.DictReader(f)]
+
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        content = yaml.safe_load(f) or []
+    if isinstance(content, dict):
+        defaults = content.get('defaults') or {}
+        return [dict(defaults, **scenario) for scenario in content.get('scenarios') or []]
+    return list(content)
+
+
+def expand_scenarios(crops, farm_sizes, start_dates, end_dates, seeds, location=DEFAULT_LOCATION):
+    """Prodotto cartesiano delle opzioni della riga di comando."""
+    return [
+        {'location': location, 'crop_type': crop, 'farm_size': farm_size,
+         'start_date': start, 'end_date': end, 'seed': seed}
+        for crop, farm_size, (start, end), seed in itertools.product(
+            crops, farm_sizes, list(zip(start_dates, end_dates)), seeds)
+    ]
+
+
+def normalize_scenario(scenario, index):
+    """Completa e converte uno scenario; errori chiari per i campi mancanti."""
+    missing = [field for field in ('crop_type', 'start_date', 'end_date') if field not in scenario]
+    if missing:
+        raise ValueError(f"Scenario {index}: campi mancanti {missing}")
+    from simulator.production import CROP_REGISTRY
+    if scenario['crop_type'] not in CROP_REGISTRY:
+        raise ValueError(f"Scenario {index}: coltura sconosciuta {scenario['crop_type']}")
+    seed = scenario.get('seed', index)
+    return {
+        'scenario': int(scenario.get('scenario', index)),
+        'location': str(scenario.get('location', DEFAULT_LOCATION)),
+        'crop_type': str(scenario['crop_type']),
+        'farm_size': float(scenario.get('farm_size', 100)),
+        'start_date': str(scenario['start_date']),
+        'end_date': str(scenario['end_date']),
+        'seed': None if seed is None else int(seed),
+    }
+
+
+def run_scenario(scenario, daily=False):
+    """
+    Simula uno scenario con la stessa pipeline (e gli stessi semi) della
+    dashboard. Restituisce la riga di riepilogo e, con ``daily``, la tabella
+    giornaliera.
+    """
+    from simulator.engine import SimulationEngine
+
+    engine = SimulationEngine(scenario['location'], maxsize=1)
+    result = engine.run(scenario['start_date'], scenario['end_date'],
+                        scenario['crop_type'], scenario['farm_size'], scenario['seed'])
+    prod, fin = result.prod_data, result.financial_data
+    total_costs = float(fin['costs'].sum())
+    profit = float(fin['profit'].sum())
+    summary = dict(
+        scenario,
+        n_days=len(prod),
+        total_yield=float(prod['yield'].sum()),
+        revenue=float(fin['revenue'].sum()),
+        costs=total_costs,
+        profit=profit,
+        roi=profit / total_costs * 100 if total_costs else 0.0,
+    )
+    if not daily:
+        return summary, None
+    frame = prod[['date', 'temperature', 'precipitation', 'yield']].assign(
+        revenue=fin['revenue'].to_numpy(), costs=fin['costs'].to_numpy(), profit=fin['profit'].to_numpy(),
+    )
+    frame.insert(0, 'scenario', scenario['scenario'])
+    return summary, frame
+
+
+class TableWriter:
+    """Scrittura incrementale di DataFrame in CSV o Parquet (con pyarrow)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._started = False
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("L'output Parquet richiede pyarrow (pip install pyarrow)") from None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _daily_path(output):
+    root, ext = os.path.splitext(output)
+    return f"{root}_daily{ext}"
+
+
+def run_batch(scenarios, output, daily=False, workers=None, log=None):
+    """
+    Esegue ``scenarios`` e scrive il riepilogo in ``output`` (e i dati
+    giornalieri in ``<output>_daily`` con ``daily``), nell'ordine degli
+    scenari. Restituisce il numero di scenari eseguiti.
+    """
+    import pandas as pd
+
+    log = sys.stderr if log is None else log
+    scenarios = [normalize_scenario(scenario, index) for index, scenario in enumerate(scenarios)]
+    workers = workers or os.cpu_count() or 1
+    summary_writer = TableWriter(output)
+    daily_writer = TableWriter(_daily_path(output)) if daily else None
+
+    summaries = []
+
+    def flush():
+        if summaries:
+            summary_writer.write(pd.DataFrame(summaries))
+            summaries.clear()
+
+    def write(result, done):
+        summary, frame = result
+        summaries.append(summary)
+        if len(summaries) >= SUMMARY_BATCH:
+            flush()
+        if daily_writer is not None:
+            daily_writer.write(frame)
+        print(f"[{done}/{len(scenarios)}] {summary['crop_type']} {summary['farm_size']:g} ha "
+              f"{summary['start_date']}→{summary['end_date']} seme {summary['seed']}", file=log)
+
+    try:
+        if workers == 1:
+            for done, scenario in enumerate(scenarios, 1):
+                write(run_scenario(scenario, daily), done)
+        else:
+            # Finestra limitata di scenari in volo: la memoria non cresce con il batch
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                done = 0
+                for scenario in scenarios:
+                    pending.append(executor.submit(run_scenario, scenario, daily))
+                    if len(pending) >= 2 * workers:
+                        done += 1
+                        write(pending.popleft().result(), done)
+                while pending:
+                    done += 1
+                    write(pending.popleft().result(), done)
+        flush()
+    finally:
+        summary_writer.close()
+        if daily_writer is not None:
+            daily_writer.close()
+    return len(scenarios)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m simulator', description="Simulatore agricolo senza dashboard")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="esegue un batch di scenari")
+    run.add_argument('--manifest', help="scenari da un file YAML o CSV (anche relativo a config/)")
+    run.add_argument('--crop', nargs='+', default=[get_setting('default', 'crop_type', 'grano')])
+    run.add_argument('--farm-size', nargs='+', type=float, default=[get_setting('default', 'farm_size', 100)])
+    run.add_argument('--start', nargs='+', default=[get_setting('default', 'start_date', '2024-01-01')],
+                     help="date di inizio, accoppiate una a una con --end")
+    run.add_argument('--end', nargs='+', default=[get_setting('default', 'end_date', '2024-12-31')])
+    run.add_argument('--seed', nargs='+', type=int, default=[0])
+    run.add_argument('--location', default=get_setting('default', 'location', DEFAULT_LOCATION))
+    run.add_argument('--output', help="file .csv o .parquet del riepilogo (default: batch.output in settings.yaml)")
+    run.add_argument('--daily', action='store_true', help="scrive anche i dati giornalieri in <output>_daily")
+    run.add_argument('--workers', type=int, default=get_setting('batch', 'workers'),
+                     help="processi paralleli (default: tutte le CPU)")
+
+    optimize = commands.add_parser('optimize', help="ripartizione ottimale degli ettari tra le colture")
+    optimize.add_argument('--farm-size', type=float, default=get_setting('default', 'farm_size', 100))
+    optimize.add_argument('--crop', nargs='+', help="colture candidate (default: tutte)")
+    optimize.add_argument('--start-year', type=int, default=2024)
+    optimize.add_argument('--years', type=int, default=5)
+    optimize.add_argument('--members', type=int, default=200, help="membri dell'ensemble meteo")
+    optimize.add_argument('--step', type=float, default=0.1, help="risoluzione della ripartizione (quota)")
+    optimize.add_argument('--min-cvar', type=float, help="profitto annuo minimo (€) nel 5%% peggiore")
+    optimize.add_argument('--max-repeat', type=float, default=0.0,
+                          help="quota che può ripetere la stessa coltura l'anno dopo")
+    optimize.add_argument('--seed', type=int, default=0)
+    optimize.add_argument('--workers', type=int, default=get_setting('batch', 'workers'))
+    return parser
+
+
+def optimize_plan(args):
+    from simulator.optimizer import AllocationOptimizer
+
+    optimizer = AllocationOptimizer(args.farm_size, args.crop, args.start_year, args.years, args.members,
+                                    seed=args.seed, workers=args.workers)
+    try:
+        plan = optimizer.optimize(args.step, args.min_cvar, args.max_repeat)
+    except ValueError as error:
+        raise SystemExit(str(error)) from None
+    print(plan.to_frame().round(1).to_string())
+    print(f"Profitto totale atteso: {plan.total_profit.mean():,.0f} €")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'optimize':
+        return optimize_plan(args)
+    if args.manifest:
+        scenarios = load_manifest(args.manifest)
+    else:
+        if len(args.start) != len(args.end):
+            raise SystemExit("--start e --end devono avere lo stesso numero di date")
+        scenarios = expand_scenarios(args.crop, args.farm_size, args.start, args.end, args.seed, args.location)
+
+    output = args.output or resolve_path(get_setting('batch', 'output', 'results/batch.csv'))
+    count = run_batch(scenarios, output, daily=args.daily, workers=args.workers)
+    print(f"{count} scenari scritti in {output}", file=sys.stderr)
+    return 0
@@ -0,0 +1,32 @@
+import os
+from functools import lru_cache
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+SETTINGS_PATH = os.path.join(ROOT_DIR, 'config', 'settings.yaml')
+
+
+@lru_cache(maxsize=None)
+def load_settings(path=None):
+    """
+    Read ``config/settings.yaml`` once per process.
+
+    The path can be overridden with the ``TESI_SETTINGS`` environment
+    variable. A missing file gives an empty configuration, so every caller
+    must provide its own defaults.
+    """
+    path = path or os.environ.get('TESI_SETTINGS', SETTINGS_PATH)
+    if not os.path.exists(path):
+        return {}
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_setting(section, key, default=None):
+    """Return ``settings[section][key]`` or ``default``."""
+    return (load_settings().get(section) or {}).get(key, default)
+
+
+def resolve_path(path):
+    """Paths in the settings are relative to the repository root."""
+    return path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
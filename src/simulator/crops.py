@@ -0,0 +1,219 @@
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+
+from simulator.config import ROOT_DIR
+
+CROPS_PATH = os.path.join(ROOT_DIR, 'config', 'crops.yaml')
+
+# Valori predefiniti, usati quando config/crops.yaml manca
+DEFAULT_CROPS = {
+    "grano": {
+        "optimal_temp": (15, 25),     # °C
+        "growth_days": 180,
+        "base_yield": 7.0,            # t / ha under ideal conditions
+        "water_requirement": 4.5,     # mm of rain per day
+        "price_per_ton": 230,         # €/t
+        "cost_per_hectare": 800,      # €/ha
+        "planting_months": [10, 11, 12],
+        "base_temp": 0,               # °C, growing degree day threshold
+        "gdd_requirement": 1700       # °C·day from sowing to harvest
+    },
+    "soia": {
+        "optimal_temp": (20, 30),
+        "growth_days": 150,
+        "base_yield": 3.2,
+        "water_requirement": 5.0,
+        "price_per_ton": 510,
+        "cost_per_hectare": 900,
+        "planting_months": [4, 5],
+        "base_temp": 10,
+        "gdd_requirement": 2100
+    },
+    "orzo": {
+        "optimal_temp": (12, 22),
+        "growth_days": 170,
+        "base_yield": 6.5,
+        "water_requirement": 4.2,
+        "price_per_ton": 215,
+        "cost_per_hectare": 750,
+        "planting_months": [10, 11],
+        "base_temp": 0,
+        "gdd_requirement": 1500
+    },
+    "girasole": {
+        "optimal_temp": (18, 28),
+        "growth_days": 130,
+        "base_yield": 2.8,
+        "water_requirement": 4.8,
+        "price_per_ton": 420,
+        "cost_per_hectare": 850,
+        "planting_months": [3, 4, 5],
+        "base_temp": 6,
+        "gdd_requirement": 2300
+    },
+    "mais": {
+        "optimal_temp": (18, 30),
+        "growth_days": 150,
+        "base_yield": 10.5,
+        "water_requirement": 5.5,
+        "price_per_ton": 200,
+        "cost_per_hectare": 1000,
+        "planting_months": [4, 5],
+        "base_temp": 10,
+        "gdd_requirement": 2100
+    }
+}
+
+# Parametri numerici compilati in array (uno per colonna, un elemento per coltura)
+NUMERIC_PARAMETERS = ('growth_days', 'base_yield', 'water_requirement', 'price_per_ton', 'cost_per_hectare',
+                      'base_temp', 'gdd_requirement')
+# Fenologia per le colture definite senza questi parametri
+PHENOLOGY_DEFAULTS = {'base_temp': 5.0, 'gdd_requirement': 1500.0}
+
+# Tabella della risposta alla temperatura: bin da 0.1 °C tra -40 e 60 °C
+LUT_MIN_TEMP = -40.0
+LUT_MAX_TEMP = 60.0
+LUT_STEP = 0.1
+
+
+def _triangle_response(temperature, optimal_temp):
+    # Stessa curva di production.temperature_factor, usata per compilare la tabella
+    optimal_temp_min, optimal_temp_max = optimal_temp
+    center = (optimal_temp_min + optimal_temp_max) / 2
+    half_width = (optimal_temp_max - optimal_temp_min) / 2
+    factor = np.maximum(1 - np.abs(temperature - center) / half_width, 0)
+    factor[(temperature >= optimal_temp_min) & (temperature <= optimal_temp_max)] = 1.0
+    return factor
+
+
+class CropRegistry(Mapping):
+    """
+    Crop parameters compiled once into contiguous arrays.
+
+    The registry behaves as a read-only mapping from crop name to its
+    parameter dict (the old ``CROP_PARAMETERS`` layout), and additionally
+    exposes one array per numeric parameter, indexed by crop code, plus the
+    temperature response of every crop tabulated on 0.1 °C bins. Evaluating
+    the response is then a single gather, for one crop or for many crops at
+    once.
+
+    Parameters
+    ----------
+    crops : dict
+        Crop name → parameter dict, as in ``DEFAULT_CROPS``.
+    """
+
+    def __init__(self, crops):
+        self.names = tuple(crops)
+        self.codes = {name: code for code, name in enumerate(self.names)}
+        self._params = {
+            name: {**PHENOLOGY_DEFAULTS, **params, 'name': name, 'optimal_temp': tuple(params['optimal_temp'])}
+            for name, params in crops.items()
+        }
+        for name in NUMERIC_PARAMETERS:
+            setattr(self, name, self._compile([params[name] for params in self._params.values()]))
+        self.optimal_temp = self._compile([params['optimal_temp'] for params in self._params.values()])
+
+        n_bins = int(round((LUT_MAX_TEMP - LUT_MIN_TEMP) / LUT_STEP)) + 1
+        self.lut_temperatures = np.round(LUT_MIN_TEMP + np.arange(n_bins) * LUT_STEP, 6)
+        self.temperature_lut = self._compile([
+            _triangle_response(self.lut_temperatures, params['optimal_temp'])
+            for params in self._params.values()
+        ])
+        # Bin vicini agli estremi dell'intervallo ottimale, dove la curva ha un gradino:
+        # lì il valore tabulato all'inizio del bin può differire fino a 1, quindi
+        # temperature_response calcola il valore esatto
+        self.edge_bins = np.zeros(self.temperature_lut.shape, dtype=bool)
+        bound_bins = np.floor((self.optimal_temp - LUT_MIN_TEMP) / LUT_STEP).astype(np.intp)
+        for code, bins in enumerate(bound_bins):
+            for offset in (-1, 0, 1):
+                self.edge_bins[code, np.clip(bins + offset, 0, n_bins - 1)] = True
+        self.edge_bins.flags.writeable = False
+        self._lut_cache = {}
+
+    @staticmethod
+    def _compile(values):
+        array = np.ascontiguousarray(values, dtype=np.float64)
+        array.flags.writeable = False
+        return array
+
+    def __getitem__(self, name):
+        return self._params[name]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def code(self, crop_type):
+        """Index of ``crop_type`` in the parameter arrays."""
+        try:
+            return self.codes[crop_type]
+        except KeyError:
+            raise ValueError(f"Coltura sconosciuta: {crop_type}") from None
+
+    def encode(self, crop_types):
+        """Codes of a sequence of crop names, as an integer array."""
+        return np.fromiter((self.code(crop) for crop in crop_types), dtype=np.intp)
+
+    def _lut(self, dtype):
+        # Tabella nel tipo dei dati meteo, per non promuovere i float32; i bin
+        # vicini agli estremi valgono NaN e vengono calcolati esattamente
+        table = self._lut_cache.get(dtype)
+        if table is None:
+            table = self.temperature_lut.astype(dtype)
+            table[self.edge_bins] = np.nan
+            table.flags.writeable = False
+            self._lut_cache[dtype] = table
+        return table
+
+    def temperature_response(self, temperature, crops):
+        """
+        Temperature factor by table lookup (0.1 °C resolution).
+
+        The curve steps at the bounds of the optimal range, so values in
+        the bins around a bound are computed exactly instead: the result
+        equals ``production.temperature_factor`` there.
+
+        ``crops`` is a crop name or an array of crop codes broadcasting
+        against ``temperature``, e.g. codes of shape (n_crops, 1) with a
+        (n_days,) series give a (n_crops, n_days) result.
+        """
+        temperature = np.asarray(temperature)
+        dtype = temperature.dtype if temperature.dtype.kind == 'f' else np.dtype(np.float64)
+        position = np.subtract(temperature, LUT_MIN_TEMP, out=np.empty(temperature.shape, dtype), dtype=dtype)
+        position *= dtype.type(round(1 / LUT_STEP))
+        np.clip(position, 0, self.temperature_lut.shape[1] - 1, out=position)
+        bins = position.astype(np.intp)
+        code = self.code(crops) if isinstance(crops, str) else np.asarray(crops)
+        response = np.asarray(self._lut(dtype)[code, bins])
+
+        edge = np.isnan(response)
+        if edge.any():
+            edge_temperature = np.broadcast_to(temperature, response.shape)[edge].astype(dtype, copy=False)
+            edge_codes = np.broadcast_to(code, response.shape)[edge]
+            exact = np.empty(edge_temperature.shape, dtype)
+            for crop_code in np.unique(edge_codes):
+                selected = edge_codes == crop_code
+                exact[selected] = _triangle_response(edge_temperature[selected], self.optimal_temp[crop_code])
+            response[edge] = exact
+        # [()] restituisce uno scalare numpy per una temperatura scalare
+        return response[()]
+
+
+@lru_cache(maxsize=None)
+def load_crops(path=None):
+    """
+    Crop registry from ``config/crops.yaml`` (or ``path``), compiled once per
+    process. A missing file gives the built-in ``DEFAULT_CROPS``.
+    """
+    path = path or os.environ.get('TESI_CROPS', CROPS_PATH)
+    if not os.path.exists(path):
+        return CropRegistry(DEFAULT_CROPS)
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        return CropRegistry(yaml.safe_load(f) or DEFAULT_CROPS)
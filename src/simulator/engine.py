@@ -0,0 +1,244 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.production import AgriculturalProductionGenerator
+from simulator.financial import build_financial_data, compute_total_cost
+from simulator.montecarlo import run_monte_carlo, MonteCarloResult, METRICS, DEFAULT_CHUNK_SIZE
+from simulator.kpi import RollupKPIs
+from simulator.metrics import timer
+from simulator.results import run_id, MODEL_VERSION
+from simulator.rollups import RollupIndex
+
+
+class SimulationResult:
+    """Environmental, production and financial data of a single run."""
+
+    def __init__(self, key, env_data, prod_data, financial_data, total_cost, crop_parameters):
+        self.key = key
+        self.env_data = env_data
+        self.prod_data = prod_data
+        self.financial_data = financial_data
+        self.total_cost = total_cost
+        self.crop_parameters = crop_parameters
+        self._rollups = None
+
+    @property
+    def rollups(self):
+        """``RollupIndex`` of yield, revenue, costs, profit and weather, built on first access."""
+        if self._rollups is None:
+            with timer('simulation.rollups'):
+                self._rollups = RollupIndex.from_frames(self.prod_data, self.financial_data, self.env_data)
+        return self._rollups
+
+    @property
+    def kpis(self):
+        """KPIs of the whole run, read from ``rollups``."""
+        return RollupKPIs(self.rollups, self.crop_parameters['base_yield'], self.key[3])
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries kept; the least recently used is evicted.
+    ttl : float, optional
+        Seconds after which an entry is considered stale. ``None`` disables it.
+    """
+
+    def __init__(self, maxsize=32, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for ``key`` or ``None``."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[0] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (self._clock(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+
+def split_run_seed(seed):
+    """Seeds of the weather and of the daily cost noise of a single run."""
+    return np.random.SeedSequence(seed).spawn(2)
+
+
+def _normalize_date(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class SimulationEngine:
+    """
+    Runs the environmental → production → financial pipeline and caches
+    the result keyed on (start_date, end_date, crop_type, farm_size, seed).
+    Monte Carlo runs share the same cache, with the number of trajectories
+    added to the key.
+
+    Runs without a seed are not reproducible and are therefore never cached.
+    When a ``ResultsStore`` is given, Monte Carlo results are also persisted
+    there and reloaded (memory-mapped) instead of being recomputed, across
+    restarts and across processes sharing the same directory.
+    """
+
+    def __init__(self, location='Azienda Agricola', maxsize=32, ttl=600, store=None):
+        self.location = location
+        self.store = store
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(start_date, end_date, crop_type, farm_size, seed):
+        return (_normalize_date(start_date), _normalize_date(end_date), crop_type, farm_size, seed)
+
+    def run(self, start_date, end_date, crop_type, farm_size, seed=None):
+        """Return the ``SimulationResult`` for the given inputs."""
+        key = self.make_key(start_date, end_date, crop_type, farm_size, seed)
+        return self._cached(key, self._simulate)
+
+    def monte_carlo(self, start_date, end_date, crop_type, farm_size, seed=None,
+                    n_trajectories=1000, n_workers=None, progress=None):
+        """
+        Return the (cached) ``MonteCarloResult`` for the given inputs.
+        ``progress`` is forwarded to ``run_monte_carlo`` when the run is
+        actually computed.
+        """
+        key = self.make_key(start_date, end_date, crop_type, farm_size, seed)
+        return self._cached(
+            ('montecarlo', n_trajectories) + key,
+            lambda _: self._monte_carlo(key, n_trajectories, n_workers, progress),
+        )
+
+    def has_monte_carlo(self, start_date, end_date, crop_type, farm_size, seed=None, n_trajectories=1000):
+        """Whether ``monte_carlo`` would return without computing (cache or store hit)."""
+        key = self.make_key(start_date, end_date, crop_type, farm_size, seed)
+        if self.cache.get(('montecarlo', n_trajectories) + key) is not None:
+            return True
+        return (self.store is not None and seed is not None
+                and self.store.has_run(run_id(self._monte_carlo_metadata(key, n_trajectories))))
+
+    def _monte_carlo_metadata(self, key, n_trajectories):
+        start_date, end_date, crop_type, farm_size, seed = key
+        return {
+            'kind': 'montecarlo', 'location': self.location,
+            'start_date': start_date, 'end_date': end_date,
+            'crop_type': crop_type, 'farm_size': farm_size, 'seed': seed,
+            'n_trajectories': n_trajectories, 'chunk_size': DEFAULT_CHUNK_SIZE,
+            'model_version': MODEL_VERSION,
+        }
+
+    def _monte_carlo(self, key, n_trajectories, n_workers, progress=None):
+        start_date, end_date, crop_type, farm_size, seed = key
+        metadata = self._monte_carlo_metadata(key, n_trajectories)
+        persist = self.store is not None and seed is not None
+        if persist:
+            stored = self.store.find_run(metadata)
+            if stored is not None:
+                return MonteCarloResult(
+                    {metric: stored[metric] for metric in METRICS}, float(stored['total_cost'])
+                )
+
+        with timer('simulation.montecarlo'):
+            result = run_monte_carlo(
+                self.location, start_date, end_date, crop_type, farm_size,
+                n_trajectories=n_trajectories, seed=seed, n_workers=n_workers, progress=progress,
+            )
+        if persist:
+            self.store.save_run(dict(result.samples, total_cost=result.total_cost), metadata)
+        return result
+
+    def _cached(self, key, compute):
+        if key[-1] is None:
+            return compute(key)
+
+        while True:
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+            with self._inflight_lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                # Un altro thread sta già calcolando la stessa simulazione
+                event.wait()
+                continue
+            try:
+                result = compute(key)
+                self.cache.put(key, result)
+                return result
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[key]
+                event.set()
+
+    def _simulate(self, key):
+        start_date, end_date, crop_type, farm_size, seed = key
+        env_seed, cost_seed = split_run_seed(seed)
+
+        with timer('simulation.environmental'):
+            env_gen = EnvironmentalDataGenerator(self.location, start_date, end_date, seed=env_seed)
+            env_data = env_gen.generate()
+        with timer('simulation.production'):
+            prod_gen = AgriculturalProductionGenerator(env_data, crop_type, farm_size)
+            prod_data = prod_gen.simulate()
+        with timer('simulation.financial'):
+            financial_data = build_financial_data(
+                env_data, prod_data, crop_type, farm_size, rng=np.random.default_rng(cost_seed)
+            )
+        return SimulationResult(
+            key, env_data, prod_data, financial_data,
+            compute_total_cost(crop_type, farm_size),
+            prod_gen.crop_parameters[crop_type],
+        )
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,111 @@
+import numpy as np
+
+from simulator.crops import load_crops
+
+# Prezzi (€/t) e costi variabili (€/ha) dal registro delle colture
+PRICE_MAP = {name: params['price_per_ton'] for name, params in load_crops().items()}
+BASE_VAR_COST_MAP = {name: params['cost_per_hectare'] for name, params in load_crops().items()}
+
+BUSINESS_FIXED_COST = 15000    # €
+LAND_RENT_PER_HA = 300         # €/ha
+DEFAULT_PRICE = 250            # €/t
+DEFAULT_VAR_COST = 800         # €/ha
+
+
+def get_price(crop_type):
+    """Return the selling price (€/t) for ``crop_type``."""
+    if crop_type not in PRICE_MAP:
+        print(f"[WARN] Prezzo non definito per {crop_type}. Uso {DEFAULT_PRICE} €/t di default.")
+    return PRICE_MAP.get(crop_type, DEFAULT_PRICE)
+
+
+def compute_total_cost(crop_type, farm_size):
+    """
+    Total cost (€) over the simulated period: fixed business costs, land
+    rent and a variable cost per hectare that shrinks with economies of scale.
+    ``farm_size`` may be an array, in which case an array is returned.
+    """
+    return scaled_total_cost(BASE_VAR_COST_MAP.get(crop_type, DEFAULT_VAR_COST), farm_size)
+
+
+def scaled_total_cost(base_var_cost, farm_size):
+    """
+    ``compute_total_cost`` from the base variable cost (€/ha) directly;
+    both arguments may be arrays, e.g. one entry per parcel.
+    """
+    land_rent = LAND_RENT_PER_HA * farm_size
+    return BUSINESS_FIXED_COST + land_rent + variable_cost(base_var_cost, farm_size)
+
+
+def variable_cost(base_var_cost, farm_size):
+    """
+    Variable cost (€) of ``farm_size`` hectares: ``base_var_cost`` per
+    hectare, shrinking with economies of scale down to half of it.
+    """
+    variable_cost_per_ha = np.maximum(
+        base_var_cost / (1 + 0.4 * np.log1p(farm_size)),
+        0.5 * base_var_cost
+    )
+    return variable_cost_per_ha * farm_size
+
+
+def build_financial_data(env_data, prod_data, crop_type, farm_size, rng=None):
+    """
+    Return a dataframe with daily revenue, costs and profit.
+
+    Parameters
+    ----------
+    env_data : pandas.DataFrame
+        Environmental data with a 'date' column.
+    prod_data : pandas.DataFrame
+        Output of ``AgriculturalProductionGenerator.simulate``.
+    crop_type : str
+        Crop used to look up price and variable costs.
+    farm_size : float
+        Size of the farm in hectares.
+    rng : numpy.random.Generator, optional
+        Source of the daily cost noise. A fresh generator is used if omitted.
+    """
+    # pandas serve solo per le tabelle: il modello dei costi usa il solo numpy
+    import pandas as pd
+    rng = np.random.default_rng() if rng is None else rng
+    price_per_ton = get_price(crop_type)
+    total_cost = compute_total_cost(crop_type, farm_size)
+
+    base_daily_cost = total_cost / len(env_data)
+    daily_cost_series = base_daily_cost * (
+        1 + rng.normal(loc=0, scale=0.1, size=len(env_data))
+    )
+    revenue = prod_data['yield'].to_numpy() * price_per_ton
+    financial_data = pd.DataFrame({
+        'date': env_data['date'].to_numpy(),
+        'revenue': revenue,
+        'costs': daily_cost_series,
+        'profit': revenue - daily_cost_series,
+    })
+    return financial_data
+
+
+def stream_financial_data(prod_chunks, crop_type, farm_size, n_days, rng=None):
+    """
+    Chunked version of ``build_financial_data``: yields one financial
+    dataframe per production chunk. ``n_days`` is the length of the whole
+    horizon, over which the total cost is spread; with the same ``rng`` the
+    concatenated chunks equal the output of ``build_financial_data``.
+    """
+    import pandas as pd
+    rng = np.random.default_rng() if rng is None else rng
+    price_per_ton = get_price(crop_type)
+    base_daily_cost = compute_total_cost(crop_type, farm_size) / n_days
+
+    for prod_data in prod_chunks:
+        daily_cost_series = base_daily_cost * (
+            1 + rng.normal(loc=0, scale=0.1, size=len(prod_data))
+        )
+        revenue = prod_data['yield'].to_numpy() * price_per_ton
+        yield pd.DataFrame({
+            'date': prod_data['date'].to_numpy(),
+            'revenue': revenue,
+            'costs': daily_cost_series,
+            'profit': revenue - daily_cost_series,
+        })
@@ -0,0 +1,156 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """
+    A unit of background work. The job function receives ``progress`` as a
+    keyword argument and should call it regularly: it records the progress
+    and raises ``JobCancelled`` once the job has been cancelled.
+    """
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+        self._subscribers = 0
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, done, total):
+        """Progress callback handed to the job function."""
+        if self._cancelled.is_set():
+            raise JobCancelled(self.id)
+        self.progress = done / total if total else 1.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'error': None if self.error is None else str(self.error),
+        }
+
+
+class JobManager:
+    """
+    Local background job queue with progress, cancellation and deduplication.
+
+    Jobs are identified by a key: submitting a key that is already queued,
+    running or recently finished returns the existing job instead of
+    starting a new one. Every ``submit`` subscribes the caller to the job
+    and ``cancel`` drops that subscription; the job is actually stopped only
+    when nobody is waiting for it any more.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of jobs run concurrently (threads; the jobs may use their own
+        process pools for the heavy work).
+    ttl : float, optional
+        Seconds a finished job (and its result) is kept for late pollers.
+    clock : callable, optional
+        Time source, for tests.
+    """
+
+    def __init__(self, max_workers=1, ttl=600, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Run ``func(*args, progress=job.report, **kwargs)`` in the background
+        and return its ``Job``, or the existing job for ``key``.
+        """
+        with self._lock:
+            self._prune()
+            job = self._by_key.get(key)
+            if job is None or job.status in (FAILED, CANCELLED) or job.cancelled:
+                job = Job(key)
+                self._jobs[job.id] = job
+                self._by_key[key] = job
+                self._executor.submit(self._run, job, func, args, kwargs)
+            job._subscribers += 1
+            return job
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled:
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        try:
+            job.result = func(*args, progress=job.report, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as exc:
+            job.error = exc
+            self._finish(job, FAILED)
+        else:
+            job.progress = 1.0
+            self._finish(job, DONE)
+
+    def _finish(self, job, status):
+        job.finished_at = self.clock()
+        job.status = status
+
+    def _prune(self):
+        now = self.clock()
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def get(self, job_id):
+        """The job with ``job_id``, or None if unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Drop one subscription to the job; cancel it when none is left.
+        Returns True if the job has been cancelled.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job._subscribers -= 1
+            if job._subscribers > 0:
+                return False
+            job._cancelled.set()
+            return True
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancelled.set()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,183 @@
+import numpy as np
+
+SERIES = ('yield', 'costs', 'profit')
+
+
+def _trend(last, previous, relative_to_abs=False):
+    """Percentage change between two periods, 0 when the base is 0."""
+    if not previous:
+        return 0
+    base = abs(previous) if relative_to_abs else previous
+    return (last - previous) / base * 100
+
+
+class KPIAggregator:
+    """
+    Dashboard KPIs kept up to date incrementally.
+
+    Running totals are updated on every ``extend``/``retract`` and the trends
+    only look at the last two windows, so appending or dropping ``k`` days
+    costs O(k) regardless of how many days have been accumulated.
+
+    Parameters
+    ----------
+    base_yield : float
+        Crop yield under ideal conditions (t/ha).
+    farm_size : float
+        Hectares.
+    window : int, optional
+        Length in days of the periods compared by the trends (default 7).
+    capacity : int, optional
+        Initial size of the daily buffers; they grow as needed.
+    history : int, optional
+        Number of trailing days kept in memory. ``None`` keeps every day;
+        a bound (at least ``2 * window``) keeps memory constant on endless
+        streams, at the price of limiting how far ``retract`` can go back.
+    """
+
+    def __init__(self, base_yield, farm_size, window=7, capacity=366, history=None):
+        if history is not None and history < 2 * window:
+            raise ValueError("history deve coprire almeno due finestre")
+        self.potential_yield = base_yield * farm_size
+        self.window = window
+        self.history = history
+        self._buffers = {name: np.empty(max(capacity, 1)) for name in SERIES}
+        self._totals = dict.fromkeys(SERIES, 0.0)
+        self._held = 0
+        self.n_days = 0
+
+    @classmethod
+    def from_frames(cls, prod_data, financial_data, base_yield, farm_size, window=7):
+        aggregator = cls(base_yield, farm_size, window, capacity=len(prod_data))
+        aggregator.extend(
+            prod_data['yield'].to_numpy(),
+            financial_data['costs'].to_numpy(),
+            financial_data['profit'].to_numpy(),
+        )
+        return aggregator
+
+    def _reserve(self, n_days):
+        capacity = len(self._buffers['yield'])
+        if n_days <= capacity:
+            return
+        new_capacity = max(n_days, 2 * capacity)
+        for name, buffer in self._buffers.items():
+            grown = np.empty(new_capacity)
+            grown[:self._held] = buffer[:self._held]
+            self._buffers[name] = grown
+
+    def extend(self, daily_yield, costs, profit):
+        """Append new days (arrays of equal length)."""
+        values = dict(zip(SERIES, (np.atleast_1d(daily_yield), np.atleast_1d(costs), np.atleast_1d(profit))))
+        n_new = len(values['yield'])
+        self._reserve(self._held + n_new)
+        for name, new in values.items():
+            self._buffers[name][self._held:self._held + n_new] = new
+            self._totals[name] += float(new.sum())
+        self._held += n_new
+        self.n_days += n_new
+
+        if self.history is not None and self._held > 2 * self.history:
+            # Compattazione ammortizzata: si tengono solo gli ultimi giorni
+            keep = self.history
+            for buffer in self._buffers.values():
+                buffer[:keep] = buffer[self._held - keep:self._held]
+            self._held = keep
+
+    def retract(self, n_days):
+        """Drop the last ``n_days`` days, e.g. when the end date moves back."""
+        if n_days > self._held:
+            raise ValueError(f"Solo {self._held} giorni sono ancora in memoria")
+        for name, buffer in self._buffers.items():
+            self._totals[name] -= float(buffer[self._held - n_days:self._held].sum())
+        self._held -= n_days
+        self.n_days -= n_days
+
+    def get_state(self):
+        """
+        JSON-serializable state: running totals and the last two windows,
+        enough for ``snapshot`` and further ``extend`` calls.
+        """
+        keep = min(self._held, 2 * self.window)
+        return {
+            'n_days': self.n_days,
+            'totals': dict(self._totals),
+            'recent': {name: buffer[self._held - keep:self._held].tolist() for name, buffer in self._buffers.items()},
+        }
+
+    def set_state(self, state):
+        """Restore a ``get_state`` result; ``retract`` can then go back at most two windows."""
+        recent = state['recent']
+        n_recent = len(recent['yield'])
+        self._reserve(n_recent)
+        for name in SERIES:
+            self._buffers[name][:n_recent] = recent[name]
+        self._held = n_recent
+        self._totals = {name: float(state['totals'][name]) for name in SERIES}
+        self.n_days = state['n_days']
+
+    def _window_sums(self, name):
+        buffer = self._buffers[name]
+        w, n = self.window, self._held
+        return buffer[n - w:n].sum(), buffer[n - 2 * w:n - w].sum()
+
+    def snapshot(self):
+        """Current KPI values as a dict."""
+        windows = None
+        if self._held >= 2 * self.window:
+            windows = {name: self._window_sums(name) for name in SERIES}
+        return kpi_snapshot(self._totals, windows, self.potential_yield)
+
+
+class RollupKPIs:
+    """
+    KPIs of a finished run read from its ``RollupIndex``: totals and the
+    two trend windows are differences of prefix sums, so a snapshot costs
+    O(1) whatever the length of the run.
+    """
+
+    def __init__(self, rollups, base_yield, farm_size, window=7):
+        self.rollups = rollups
+        self.potential_yield = base_yield * farm_size
+        self.window = window
+        self.n_days = len(rollups.dates)
+
+    def snapshot(self):
+        """KPI values as a dict, like ``KPIAggregator.snapshot``."""
+        totals = {name: float(self.rollups.total(name)) for name in SERIES}
+        windows = None
+        if self.n_days >= 2 * self.window:
+            windows = {name: self.rollups.trailing(name, self.window) for name in SERIES}
+        return kpi_snapshot(totals, windows, self.potential_yield)
+
+
+def kpi_snapshot(totals, windows, potential_yield):
+    """
+    KPI dict from the totals of ``SERIES`` and, when at least two windows
+    are available, their (last, previous) window sums.
+    """
+    total_yield = totals['yield']
+    kpis = {
+        'total_yield': total_yield,
+        'efficiency': total_yield / potential_yield * 100 if potential_yield else 0,
+        'total_costs': totals['costs'],
+        'total_profit': totals['profit'],
+        'production_trend': 0,
+        'efficiency_trend': 0,
+        'costs_trend': 0,
+        'profit_trend': 0,
+    }
+    if windows is None:
+        return kpis
+
+    yield_last, yield_prev = windows['yield']
+    costs_last, costs_prev = windows['costs']
+    profit_last, profit_prev = windows['profit']
+    kpis['production_trend'] = _trend(yield_last, yield_prev)
+    kpis['costs_trend'] = _trend(costs_last, costs_prev)
+    kpis['profit_trend'] = _trend(profit_last, profit_prev, relative_to_abs=True)
+    if potential_yield:
+        kpis['efficiency_trend'] = _trend(
+            yield_last / potential_yield * 100, yield_prev / potential_yield * 100
+        )
+    return kpis
@@ -0,0 +1,156 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+# Limiti superiori (secondi) dei bucket degli istogrammi di latenza
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets, in the Prometheus style: ``counts[i]``
+    is the number of observations not larger than ``buckets[i]``, the last
+    slot holds the ones above every bucket.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = np.asarray(buckets, dtype=float)
+        self.counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[np.searchsorted(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (``inf`` above the last one)."""
+        if not self.count:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return float(self.buckets[index]) if index < len(self.buckets) else float('inf')
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip(map(str, self.buckets.tolist()), np.cumsum(self.counts[:-1]).tolist())),
+        }
+
+
+class MetricsRegistry:
+    """
+    Per-stage timers and counters shared by the whole process.
+
+    Stages are timed with the ``timer`` context manager or the ``timed``
+    decorator; every measurement goes into the histogram of that stage.
+    Recording is thread safe and costs a lock and a ``searchsorted``, so it
+    can stay enabled in production.
+
+    Parameters
+    ----------
+    buckets : sequence of float, optional
+        Upper bounds in seconds of the histogram buckets.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.enabled = True
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block as ``stage``; failures are counted as ``<stage>.errors``."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f'{stage}.errors')
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage):
+        """Decorator version of ``timer``."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """Histograms and counters as plain Python types (JSON serialisable)."""
+        with self._lock:
+            return {
+                'stages': {stage: h.to_dict() for stage, h in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items())),
+            }
+
+    def to_prometheus(self, prefix='tesi', gauges=None):
+        """
+        Metrics in the Prometheus text exposition format. ``gauges`` adds
+        point-in-time values (e.g. cache sizes) computed by the caller.
+        """
+        lines = [
+            f'# HELP {prefix}_stage_seconds Latency of the instrumented stages.',
+            f'# TYPE {prefix}_stage_seconds histogram',
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = np.cumsum(histogram.counts)
+                for bound, count in zip(histogram.buckets.tolist(), cumulative[:-1].tolist()):
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            counters = sorted(self._counters.items())
+
+        lines.append(f'# TYPE {prefix}_events_total counter')
+        for name, value in counters:
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f'# TYPE {prefix}_{name} gauge')
+            lines.append(f'{prefix}_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Registro di processo usato dal simulatore e dalla dashboard
+metrics = MetricsRegistry()
+timer = metrics.timer
+timed = metrics.timed
+increment = metrics.increment
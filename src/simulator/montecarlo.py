@@ -0,0 +1,136 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulator.environmental import EnvironmentalDataGenerator, _seed_sequence
+from simulator.production import CROP_PARAMETERS, yield_totals
+from simulator.financial import compute_total_cost, get_price
+
+PERCENTILES = (5, 50, 95)
+METRICS = ('yield', 'revenue', 'costs', 'profit', 'roi')
+DEFAULT_CHUNK_SIZE = 500
+
+# Un pool per numero di processi: un pool non viene mai chiuso mentre
+# un'altra esecuzione (dashboard, CLI, API) potrebbe ancora usarlo
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(n_workers):
+    """
+    Return the process pool with ``n_workers`` workers shared by all Monte
+    Carlo runs of this process, so that workers are started once rather
+    than on every request. Runs with different worker counts get separate
+    pools and never shut down each other's.
+    """
+    with _executor_lock:
+        executor = _executors.get(n_workers)
+        if executor is None:
+            executor = _executors[n_workers] = ProcessPoolExecutor(max_workers=n_workers)
+        return executor
+
+
+def simulate_chunk(location, start_date, end_date, crop_type, farm_size, n_members, seed):
+    """
+    Simulate ``n_members`` weather trajectories and return the season totals
+    of every member. ``seed`` fully determines the output.
+    """
+    env_seed, cost_seed = _seed_sequence(seed).spawn(2)
+    env_gen = EnvironmentalDataGenerator(location, start_date, end_date, seed=env_seed)
+    ensemble = env_gen.generate_ensemble(
+        n_members, variables=('temperature', 'precipitation'), dtype=np.float32
+    )
+    n_days = len(ensemble['date'])
+    totals = yield_totals(
+        ensemble['temperature'], ensemble['precipitation'], CROP_PARAMETERS[crop_type], farm_size,
+        dates=ensemble['date'],
+    )
+
+    total_yield = totals['yield'].astype(np.float64)
+    revenue = total_yield * get_price(crop_type)
+    total_cost = compute_total_cost(crop_type, farm_size)
+    # Somma dei costi giornalieri con rumore i.i.d. al 10%: la media del
+    # rumore su n giorni ha deviazione standard 0.1 / sqrt(n)
+    cost_rng = np.random.default_rng(cost_seed)
+    costs = total_cost * (1 + cost_rng.normal(0, 0.1 / np.sqrt(n_days), n_members))
+    profit = revenue - costs
+    return {
+        'yield': total_yield,
+        'revenue': revenue,
+        'costs': costs,
+        'profit': profit,
+        'roi': profit / total_cost * 100,
+    }
+
+
+class MonteCarloResult:
+    """Season totals of every trajectory plus their percentile bands."""
+
+    def __init__(self, samples, total_cost, percentiles=PERCENTILES):
+        self.samples = samples
+        self.total_cost = total_cost
+        self.percentiles = percentiles
+        self.bands = {
+            metric: dict(zip(percentiles, np.percentile(values, percentiles)))
+            for metric, values in samples.items()
+        }
+
+    @property
+    def n_trajectories(self):
+        return len(self.samples['yield'])
+
+
+def run_monte_carlo(location, start_date, end_date, crop_type, farm_size,
+                    n_trajectories=1000, seed=None, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                    progress=None):
+    """
+    Run ``n_trajectories`` seeded weather trajectories through the production
+    and cost models.
+
+    The trajectories are split in chunks of ``chunk_size`` members, each with
+    its own child of ``SeedSequence(seed)``: the result only depends on the
+    seed and the chunk size, not on the number of workers. Chunks run on a
+    process pool when ``n_workers`` is not 1.
+
+    ``progress``, if given, is called as ``progress(done_chunks, n_chunks)``
+    after every chunk. An exception raised by it aborts the run (chunks not
+    yet started are cancelled) and is propagated.
+
+    Returns
+    -------
+    MonteCarloResult
+    """
+    if crop_type not in CROP_PARAMETERS:
+        raise ValueError(f"Coltura sconosciuta: {crop_type}")
+    n_chunks = max(1, -(-n_trajectories // chunk_size))
+    sizes = [chunk_size] * (n_chunks - 1) + [n_trajectories - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    args = [
+        (location, start_date, end_date, crop_type, farm_size, size, chunk_seed)
+        for size, chunk_seed in zip(sizes, seeds)
+    ]
+
+    n_workers = n_workers or os.cpu_count() or 1
+    chunks = []
+    if n_workers == 1 or n_chunks == 1:
+        for a in args:
+            chunks.append(simulate_chunk(*a))
+            if progress is not None:
+                progress(len(chunks), n_chunks)
+    else:
+        executor = get_executor(n_workers)
+        futures = [executor.submit(simulate_chunk, *a) for a in args]
+        try:
+            for future in futures:
+                chunks.append(future.result())
+                if progress is not None:
+                    progress(len(chunks), n_chunks)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    samples = {metric: np.concatenate([c[metric] for c in chunks]) for metric in METRICS}
+    return MonteCarloResult(samples, compute_total_cost(crop_type, farm_size))
@@ -0,0 +1,291 @@
+import os
+import tempfile
+
+import numpy as np
+
+from simulator.config import get_setting, resolve_path
+from simulator.environmental import VARIABLES
+from simulator.metrics import timer
+from simulator.results import ResultsStore
+
+# Da incrementare quando cambia il formato della cache o la pulizia dei dati
+CACHE_FORMAT = 1
+CHUNK_ROWS = 100_000
+
+REQUIRED_VARIABLES = ('temperature', 'precipitation')
+# Valori plausibili per variabile: quelli fuori intervallo sono trattati come mancanti
+VALID_RANGES = {
+    'temperature': (-60, 60),        # °C
+    'humidity': (0, 100),            # %
+    'precipitation': (0, 500),       # mm per passo
+    'solar_radiation': (0, 1500),    # W/m²
+}
+
+
+def _read_chunks(path, columns, chunk_rows):
+    """
+    Blocks of at most ``chunk_rows`` rows of a CSV or Parquet file, with
+    the columns renamed to the canonical names and the others dropped.
+    """
+    import pandas as pd
+    wanted = ('date',) + VARIABLES
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La lettura di file Parquet richiede pyarrow (pip install pyarrow)") from None
+        parquet = pq.ParquetFile(path)
+        source = [name for name in parquet.schema_arrow.names if columns.get(name, name) in wanted]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=source):
+            yield batch.to_pandas().rename(columns=columns)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_rows, usecols=lambda name: columns.get(name, name) in wanted)
+        for chunk in reader:
+            yield chunk.rename(columns=columns)
+
+
+def _compact(chunk):
+    """
+    Dates (datetime64[s]) and float32 values of a parsed block. Values that
+    are not numbers or fall outside ``VALID_RANGES`` become NaN; rows
+    without a valid date are dropped.
+    """
+    import pandas as pd
+    dates = pd.to_datetime(chunk['date'], errors='coerce').to_numpy(dtype='datetime64[s]')
+    valid = ~np.isnat(dates)
+    values = {}
+    for name in VARIABLES:
+        if name not in chunk:
+            continue
+        column = pd.to_numeric(chunk[name], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+        low, high = VALID_RANGES[name]
+        column[(column < low) | (column > high)] = np.nan
+        values[name] = column[valid]
+    return dates[valid], values
+
+
+def _nan_rows(n_rows):
+    return np.full(max(n_rows, 0), np.nan, dtype=np.float32)
+
+
+def _append(path, *parts):
+    # Accoda gli array al file binario grezzo (creato se manca)
+    with open(path, 'ab') as f:
+        for part in parts:
+            part.tofile(f)
+
+
+def _regular_step(dates):
+    # Passo più frequente tra date consecutive: il calendario della serie
+    if len(dates) < 2:
+        return np.timedelta64(1, 'D').astype('timedelta64[s]')
+    steps, counts = np.unique(np.diff(dates), return_counts=True)
+    return steps[np.argmax(counts)]
+
+
+def fill_gaps(values, name):
+    """
+    Fill the NaNs of ``values`` in place: linear interpolation between the
+    nearest valid values (constant at the ends), zero for precipitation.
+    Returns the mask of the filled positions.
+    """
+    gaps = np.isnan(values)
+    if gaps.all():
+        raise ValueError(f"Nessun valore valido per {name}")
+    if gaps.any():
+        if name == 'precipitation':
+            values[gaps] = 0
+        else:
+            valid = np.flatnonzero(~gaps)
+            values[gaps] = np.interp(np.flatnonzero(gaps), valid, values[valid])
+    return gaps
+
+
+class ObservedWeather:
+    """
+    Station weather read from a CSV or Parquet file, in the same layout as
+    ``EnvironmentalDataGenerator.generate()``.
+
+    The first ``load()`` reads the file once, in blocks of ``chunk_rows``
+    rows, and appends the compact arrays of every block (datetime64[s]
+    dates, float32 values) to temporary files next to the cache, so memory
+    holds one block at a time plus the date index. Rows are sorted,
+    duplicate timestamps keep the last value, the series is laid on a
+    regular calendar (the most frequent step) and the gaps are filled (see
+    ``fill_gaps``). The result is written to a ``ResultsStore`` keyed on
+    the file path, size and modification time, so later loads, in this or
+    another process, memory-map the cached arrays without parsing the file
+    again; ``window()`` then only reads the pages of the requested dates.
+
+    Parameters
+    ----------
+    path : str
+        CSV or Parquet file with a ``date`` column, ``temperature`` and
+        ``precipitation`` and optionally ``humidity`` and ``solar_radiation``.
+    location : str, optional
+        Name of the station; defaults to the file name.
+    columns : dict, optional
+        Column name in the file → canonical name, e.g. ``{'tmed': 'temperature'}``.
+    cache_dir : str, optional
+        Directory of the cache; defaults to ``storage.weather_cache`` in the
+        settings.
+    chunk_rows : int, optional
+        Rows parsed at a time.
+    """
+
+    def __init__(self, path, location=None, columns=None, cache_dir=None, chunk_rows=CHUNK_ROWS):
+        self.path = os.path.abspath(path)
+        self.location = location or os.path.splitext(os.path.basename(path))[0]
+        self.columns = dict(columns or {})
+        cache_dir = cache_dir or resolve_path(get_setting('storage', 'weather_cache', 'results/weather'))
+        self.store = ResultsStore(cache_dir)
+        self.chunk_rows = chunk_rows
+        self._run = None
+
+    def cache_metadata(self):
+        """Cache key: a new file version gets a new entry."""
+        stat = os.stat(self.path)
+        return {
+            'kind': 'observed_weather',
+            'source': self.path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'columns': self.columns,
+            'format': CACHE_FORMAT,
+        }
+
+    def _ingest(self, spill_dir):
+        # Ogni blocco viene accodato a un file per variabile in spill_dir: in
+        # memoria resta un blocco alla volta, non l'intero file
+        def spill(name):
+            return os.path.join(spill_dir, f'{name}.bin')
+
+        n_rows = 0
+        written = {}
+        in_order = True
+        previous = None
+        for chunk in _read_chunks(self.path, self.columns, self.chunk_rows):
+            dates, values = _compact(chunk)
+            for name, column in values.items():
+                # Colonna assente nei blocchi precedenti: righe mancanti a NaN
+                _append(spill(name), _nan_rows(n_rows - written.get(name, 0)), column)
+                written[name] = n_rows + len(column)
+            if not len(dates):
+                continue
+            if (previous is not None and dates[0] < previous) or (np.diff(dates) < np.timedelta64(0, 's')).any():
+                in_order = False
+            previous = dates[-1]
+            _append(spill('date'), dates)
+            n_rows += len(dates)
+
+        variables = [name for name in VARIABLES if name in written]
+        missing = [name for name in REQUIRED_VARIABLES if name not in variables]
+        if missing:
+            raise ValueError(f"{self.path}: colonne mancanti {missing}")
+        if not n_rows:
+            raise ValueError(f"{self.path}: nessuna data valida")
+        for name in variables:
+            _append(spill(name), _nan_rows(n_rows - written[name]))
+
+        # Solo l'indice delle date (8 byte per riga) viene caricato per intero
+        dates = np.memmap(spill('date'), dtype='datetime64[s]', mode='r')
+        order = None
+        if not in_order:
+            order = np.argsort(dates, kind='stable')
+            dates = dates[order]
+        # Timestamp duplicati: vale l'ultima riga del file
+        last = np.append(dates[1:] != dates[:-1], True)
+        dates = dates[last]
+
+        step = _regular_step(dates)
+        offsets = dates - dates[0]
+        if (offsets % step).any():
+            raise ValueError(f"{self.path}: date non allineate al passo di {step}")
+        positions = offsets // step
+        calendar = dates[0] + np.arange(positions[-1] + 1) * step
+
+        arrays = {'date': calendar}
+        filled = np.zeros(len(calendar), dtype=np.uint8)
+        for bit, name in enumerate(VARIABLES):
+            if name not in written:
+                continue
+            rows = np.memmap(spill(name), dtype=np.float32, mode='r')
+            if order is not None:
+                rows = rows[order]
+            # Colonne sul calendario scritte anch'esse su disco, una alla volta
+            column = np.memmap(spill(f'calendar-{name}'), dtype=np.float32, mode='w+', shape=len(calendar))
+            column[:] = np.nan
+            column[positions] = rows[last]
+            # Un bit per variabile: 1 dove il valore è stato ricostruito
+            filled |= fill_gaps(column, name).astype(np.uint8) << bit
+            arrays[name] = column
+        arrays['filled'] = filled
+        return arrays
+
+    def load(self):
+        """Return the cached ``StoredRun``, ingesting the file if needed."""
+        if self._run is None:
+            metadata = self.cache_metadata()
+            run = self.store.find_run(metadata)
+            if run is None:
+                # File temporanei nella directory della cache (ignorati dallo
+                # store perché iniziano con '.'), rimossi dopo il salvataggio
+                with tempfile.TemporaryDirectory(prefix='.ingest-', dir=self.store.root,
+                                                 ignore_cleanup_errors=True) as spill_dir:
+                    with timer('observed.ingest'):
+                        rid = self.store.save_run(self._ingest(spill_dir), metadata)
+                run = self.store.load_run(rid)
+            self._run = run
+        return self._run
+
+    @property
+    def variables(self):
+        return tuple(name for name in VARIABLES if name in self.load().arrays)
+
+    @property
+    def dates(self):
+        return self.load()['date']
+
+    def filled_counts(self):
+        """Number of values rebuilt by ``fill_gaps``, per variable."""
+        filled = self.load()['filled']
+        return {
+            name: int(np.count_nonzero(filled & (1 << VARIABLES.index(name))))
+            for name in self.variables
+        }
+
+    def _bounds(self, start_date, end_date):
+        import pandas as pd
+        dates = self.dates
+        lo, hi = 0, len(dates)
+        if start_date is not None:
+            start = np.datetime64(pd.Timestamp(start_date), 's')
+            lo = int(np.searchsorted(dates, start, side='left'))
+        if end_date is not None:
+            end = pd.Timestamp(end_date)
+            if end == end.normalize():
+                # Una data senza ora include tutti i passi del giorno
+                hi = int(np.searchsorted(dates, np.datetime64(end + pd.Timedelta(days=1), 's'), side='left'))
+            else:
+                hi = int(np.searchsorted(dates, np.datetime64(end, 's'), side='right'))
+        return lo, hi
+
+    def window(self, start_date=None, end_date=None, variables=None):
+        """
+        Observed weather between ``start_date`` and ``end_date`` (both
+        included) as a DataFrame with a ``date`` column and one column per
+        variable, ready for ``AgriculturalProductionGenerator``.
+        """
+        import pandas as pd
+        run = self.load()
+        variables = self.variables if variables is None else tuple(variables)
+        unknown = sorted(set(variables) - set(self.variables))
+        if unknown:
+            raise ValueError(f"Variabili non presenti in {self.location}: {unknown}")
+        lo, hi = self._bounds(start_date, end_date)
+        if lo >= hi:
+            raise ValueError(f"Nessun dato osservato per {self.location} tra {start_date} e {end_date}")
+        return pd.DataFrame({
+            'date': run['date'][lo:hi],
+            **{name: run[name][lo:hi] for name in variables},
+        })
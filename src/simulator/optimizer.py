@@ -0,0 +1,296 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.financial import BUSINESS_FIXED_COST, LAND_RENT_PER_HA, variable_cost
+from simulator.metrics import timer
+from simulator.production import CROP_REGISTRY
+from simulator.seasons import conventional_sowing, simulate_seasons
+
+# Candidati valutati per blocco: limita la memoria dell'array (candidati × anni × membri)
+BATCH_SIZE = 512
+# Oltre questo lavoro (candidati × membri × anni) la valutazione passa al pool di processi
+POOL_THRESHOLD = 50_000_000
+# Celle massime del reticolo delle ripartizioni usato dalla programmazione dinamica
+LATTICE_LIMIT = 20_000_000
+
+
+def allocation_grid(n_crops, step):
+    """
+    Every split of the land into ``n_crops`` shares that are multiples of
+    ``step``, as integer units of ``step`` (rows summing to ``1 / step``).
+    """
+    units = round(1 / step)
+    if not math.isclose(units * step, 1):
+        raise ValueError(f"Il passo {step} non divide l'unità")
+    # Stelle e barre: posizioni dei separatori tra le colture
+    rows = []
+    for bars in itertools.combinations(range(units + n_crops - 1), n_crops - 1):
+        edges = (-1,) + bars + (units + n_crops - 1,)
+        rows.append([edges[i + 1] - edges[i] - 1 for i in range(n_crops)])
+    return np.array(rows, dtype=np.int64)
+
+
+def plan_cost(hectares, base_var_costs):
+    """
+    Yearly cost (€) of allocations: business fixed cost, land rent and the
+    variable cost of every crop with its own economies of scale.
+    ``hectares`` has shape (..., n_crops).
+    """
+    total = hectares.sum(axis=-1)
+    return BUSINESS_FIXED_COST + LAND_RENT_PER_HA * total + variable_cost(base_var_costs, hectares).sum(axis=-1)
+
+
+def season_revenue_per_ha(crops, start_year, n_years, n_members, seed=None, location='Azienda Agricola'):
+    """
+    Revenue (€/ha) of every crop in every year and weather member.
+
+    One weather ensemble, extended by a year so that winter crops sown in
+    the last year are harvested, is shared by all crops. Each crop is sown
+    on its ``conventional_sowing`` date (the 15th of the middle month of
+    its ``planting_months``) and followed to harvest with
+    ``simulate_seasons``; failed seasons earn nothing.
+
+    Returns
+    -------
+    numpy.ndarray
+        Shape (n_members, n_years, n_crops).
+    """
+    generator = EnvironmentalDataGenerator(
+        location, f'{start_year}-01-01', f'{start_year + n_years}-12-31', seed=seed
+    )
+    weather = generator.generate_ensemble(n_members, variables=('temperature', 'precipitation'),
+                                          dtype=np.float32)
+    dates = weather['date'].to_numpy().astype('datetime64[D]')
+    revenue = np.empty((n_members, n_years, len(crops)))
+    for column, crop in enumerate(crops):
+        sowing_dates = conventional_sowing(start_year + np.arange(n_years), CROP_REGISTRY[crop]['planting_months'])
+        seasons = simulate_seasons(weather['temperature'], weather['precipitation'], dates, crop,
+                                   farm_size=1, sowing=np.searchsorted(dates, sowing_dates))
+        revenue[:, :, column] = np.nan_to_num(seasons.values['revenue'])
+    return revenue
+
+
+def evaluate_allocations(fractions, revenue, base_var_costs, farm_size, risk_quantile):
+    """
+    Expected yearly profit and its conditional value at risk (mean of the
+    worst ``risk_quantile`` of the members) for every allocation.
+
+    Parameters
+    ----------
+    fractions : numpy.ndarray
+        (n_candidates, n_crops) shares of the land.
+    revenue : numpy.ndarray
+        (n_members, n_years, n_crops) revenue per hectare.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Mean and CVaR of the profit, both (n_candidates, n_years).
+    """
+    n_members = revenue.shape[0]
+    n_tail = max(int(math.ceil(risk_quantile * n_members)), 1)
+    means, tails = [], []
+    for start in range(0, len(fractions), BATCH_SIZE):
+        hectares = fractions[start:start + BATCH_SIZE] * farm_size
+        profit = np.einsum('kc,myc->kym', hectares, revenue)
+        profit -= plan_cost(hectares, base_var_costs)[:, None, None]
+        means.append(profit.mean(axis=-1))
+        tails.append(np.partition(profit, n_tail - 1, axis=-1)[..., :n_tail].mean(axis=-1))
+    return np.concatenate(means), np.concatenate(tails)
+
+
+_shared = {}
+
+
+def _init_worker(revenue, base_var_costs, farm_size, risk_quantile):
+    # Ensemble condiviso: inviato una volta per processo, non a ogni blocco
+    _shared.update(revenue=revenue, base_var_costs=base_var_costs, farm_size=farm_size,
+                   risk_quantile=risk_quantile)
+
+
+def _evaluate_chunk(fractions):
+    return evaluate_allocations(fractions, **_shared)
+
+
+class AllocationPlan:
+    """
+    Hectares of every crop in every year, with the profit statistics of
+    the plan.
+
+    ``hectares`` has shape (n_years, n_crops); ``expected_profit`` and
+    ``profit_cvar`` are per year; ``total_profit`` holds the profit over
+    the whole plan for every weather member.
+    """
+
+    def __init__(self, crops, years, hectares, expected_profit, profit_cvar, total_profit):
+        self.crops = crops
+        self.years = years
+        self.hectares = hectares
+        self.expected_profit = expected_profit
+        self.profit_cvar = profit_cvar
+        self.total_profit = total_profit
+
+    def to_frame(self):
+        """One row per year: hectares by crop, expected profit and CVaR."""
+        import pandas as pd
+        frame = pd.DataFrame(self.hectares, index=pd.Index(self.years, name='year'), columns=list(self.crops))
+        return frame.assign(expected_profit=self.expected_profit, profit_cvar=self.profit_cvar)
+
+
+class AllocationOptimizer:
+    """
+    Split of the farm across crops, year by year, maximizing the expected
+    profit under a risk constraint.
+
+    Candidate allocations are the points of a simplex grid (shares that
+    are multiples of ``step``). They are all evaluated, in batches, against
+    one shared weather ensemble (see ``season_revenue_per_ha``); large
+    grids are spread over a process pool, and the metrics of every
+    candidate are memoized, so later calls with other constraints or grids
+    only evaluate new candidates. The multi-year plan is then a dynamic
+    program over the years with a rotation constraint between consecutive
+    years.
+
+    Parameters
+    ----------
+    farm_size : float
+        Hectares to allocate every year.
+    crops : sequence of str, optional
+        Crops of ``CROP_REGISTRY``; all of them by default.
+    start_year, n_years : int, optional
+        Years of the plan.
+    n_members : int, optional
+        Weather members of the shared ensemble.
+    risk_quantile : float, optional
+        Tail used for the CVaR of the yearly profit.
+    seed : int, optional
+    workers : int, optional
+        Processes for large grids; all CPUs by default.
+    """
+
+    def __init__(self, farm_size, crops=None, start_year=2024, n_years=5, n_members=200,
+                 risk_quantile=0.05, seed=0, workers=None):
+        self.farm_size = float(farm_size)
+        self.crops = tuple(crops or CROP_REGISTRY.names)
+        self.years = list(range(start_year, start_year + n_years))
+        self.risk_quantile = risk_quantile
+        self.workers = workers or os.cpu_count() or 1
+        codes = CROP_REGISTRY.encode(self.crops)
+        self.base_var_costs = CROP_REGISTRY.cost_per_hectare[codes]
+        with timer('optimizer.weather'):
+            self.revenue = season_revenue_per_ha(self.crops, start_year, n_years, n_members, seed)
+        self._cache = {}
+
+    def evaluate(self, fractions):
+        """
+        Mean and CVaR of the yearly profit of ``fractions`` (n_candidates,
+        n_crops), each (n_candidates, n_years); memoized per candidate.
+        """
+        fractions = np.asarray(fractions, dtype=float)
+        keys = [tuple(row) for row in np.round(fractions, 9)]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._cache))
+        if missing:
+            with timer('optimizer.evaluate'):
+                mean, cvar = self._evaluate(np.array(missing))
+            self._cache.update(zip(missing, zip(mean, cvar)))
+        mean = np.array([self._cache[key][0] for key in keys])
+        cvar = np.array([self._cache[key][1] for key in keys])
+        return mean, cvar
+
+    def _evaluate(self, fractions):
+        args = (self.revenue, self.base_var_costs, self.farm_size, self.risk_quantile)
+        if self.workers == 1 or len(fractions) * self.revenue[..., 0].size < POOL_THRESHOLD:
+            return evaluate_allocations(fractions, *args)
+        chunks = np.array_split(fractions, self.workers * 4)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=args) as executor:
+            results = list(executor.map(_evaluate_chunk, chunks))
+        return np.concatenate([mean for mean, _ in results]), np.concatenate([cvar for _, cvar in results])
+
+    def optimize(self, step=0.1, min_profit_cvar=None, max_repeat=0.0):
+        """
+        Best plan on the grid of shares multiple of ``step``.
+
+        Parameters
+        ----------
+        step : float, optional
+            Grid resolution, as a share of the farm.
+        min_profit_cvar : float, optional
+            Risk constraint: every year the mean profit of the worst
+            ``risk_quantile`` of the weather members must be at least this
+            (€). ``None`` maximizes the expected profit alone.
+        max_repeat : float, optional
+            Rotation constraint: share of the farm that may carry the same
+            crop two years in a row (``0`` forces every field to change
+            crop, ``1`` lifts the constraint).
+
+        Returns
+        -------
+        AllocationPlan
+        """
+        units = allocation_grid(len(self.crops), step)
+        fractions = units * step
+        mean, cvar = self.evaluate(fractions)
+        score = mean.copy()
+        if min_profit_cvar is not None:
+            score[cvar < min_profit_cvar] = -np.inf
+        if np.isneginf(score).all(axis=0).any():
+            raise ValueError("Nessuna ripartizione rispetta il vincolo di rischio in almeno un anno")
+
+        n_units = round(1 / step)
+        with timer('optimizer.plan'):
+            choice = self._plan(units, score, n_units + round(max_repeat * n_units))
+        if choice is None:
+            raise ValueError("Nessun piano rispetta insieme i vincoli di rischio e di rotazione")
+
+        hectares = fractions[choice] * self.farm_size
+        profit = np.einsum('yc,myc->my', hectares, self.revenue) - plan_cost(hectares, self.base_var_costs)
+        return AllocationPlan(
+            self.crops, self.years, hectares,
+            mean[choice, range(len(self.years))], cvar[choice, range(len(self.years))],
+            profit.sum(axis=1),
+        )
+
+    @staticmethod
+    def _plan(units, score, limit):
+        """
+        Dynamic program over the years: ``value[j]`` is the best expected
+        profit up to the current year ending with candidate ``j``. Candidate
+        ``i`` may precede ``j`` when no crop exceeds ``limit`` units over
+        the two years, i.e. ``units[i] <= limit - units[j]`` on every crop.
+
+        The best predecessor of every ``j`` at once is a lookup in the
+        running maximum of the values over the lattice of unit counts
+        (``np.maximum.accumulate`` along every crop axis), instead of a
+        comparison of all pairs of candidates.
+        Returns the chosen candidate of every year, or ``None`` when no
+        plan is feasible.
+        """
+        n_candidates, n_years = score.shape
+        n_units = int(units[0].sum())
+        shape = (n_units + 1,) * units.shape[1]
+        if math.prod(shape) > LATTICE_LIMIT:
+            raise ValueError("Griglia troppo fine per la pianificazione pluriennale: aumentare il passo")
+        index = tuple(units.T)
+        predecessor = tuple(np.minimum(limit - units, n_units).T)
+
+        values = [score[:, 0]]
+        for year in range(1, n_years):
+            lattice = np.full(shape, -np.inf)
+            lattice[index] = values[-1]
+            for axis in range(lattice.ndim):
+                np.maximum.accumulate(lattice, axis=axis, out=lattice)
+            values.append(lattice[predecessor] + score[:, year])
+
+        if not np.isfinite(values[-1].max()):
+            return None
+        choice = np.empty(n_years, dtype=np.int64)
+        choice[-1] = int(np.argmax(values[-1]))
+        for year in range(n_years - 1, 0, -1):
+            allowed = (units <= limit - units[choice[year]]).all(axis=1)
+            choice[year - 1] = int(np.argmax(np.where(allowed, values[year - 1], -np.inf)))
+        return choice
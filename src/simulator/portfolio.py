@@ -0,0 +1,125 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.production import CROP_REGISTRY, growth_factors
+from simulator.financial import scaled_total_cost
+from simulator.seasons import growing_season
+
+PARCEL_COLUMNS = ('crop_type', 'farm_size', 'location', 'start_date', 'end_date')
+
+
+def _weather_seed(entropy, location, start_date, end_date):
+    """
+    Seed of the weather shared by all parcels of a (location, dates) group.
+    It depends on the group itself rather than on its position in the table,
+    so adding or reordering parcels does not change anyone else's weather.
+    """
+    group_hash = zlib.crc32(f"{location}|{start_date:%Y-%m-%d}|{end_date:%Y-%m-%d}".encode())
+    return np.random.SeedSequence([entropy, group_hash])
+
+
+def _prepare_parcels(parcels):
+    parcels = pd.DataFrame(parcels).copy()
+    missing = [col for col in PARCEL_COLUMNS if col not in parcels.columns]
+    if missing:
+        raise ValueError(f"Colonne mancanti nella tabella delle particelle: {missing}")
+    unknown = sorted(set(parcels['crop_type']) - set(CROP_REGISTRY))
+    if unknown:
+        raise ValueError(f"Colture sconosciute: {unknown}")
+    if 'parcel_id' not in parcels.columns:
+        parcels['parcel_id'] = parcels.index
+    parcels['start_date'] = pd.to_datetime(parcels['start_date'])
+    parcels['end_date'] = pd.to_datetime(parcels['end_date'])
+    parcels['farm_size'] = parcels['farm_size'].astype(float)
+    return parcels.reset_index(drop=True)
+
+
+def simulate_portfolio(parcels, seed=0, detail=False):
+    """
+    Simulate many parcels in one batched pass.
+
+    Parcels with the same (location, start_date, end_date) share a single
+    weather draw; within each weather group the growth curves of all the
+    crops present are evaluated at once from the crop registry, and every
+    parcel scales the curve of its crop by its hectares.
+
+    Parameters
+    ----------
+    parcels : pandas.DataFrame or list of dict
+        One row per parcel with the columns in ``PARCEL_COLUMNS`` and an
+        optional 'parcel_id' (the row index is used otherwise).
+    seed : int, optional
+        Base seed of the weather draws; ``None`` draws fresh entropy.
+    detail : bool, optional
+        Also return the daily yield and revenue of every parcel.
+
+    Returns
+    -------
+    pandas.DataFrame or tuple of pandas.DataFrame
+        Per-parcel summary, followed by the long-format daily detail when
+        ``detail`` is true.
+    """
+    parcels = _prepare_parcels(parcels)
+    entropy = np.random.SeedSequence(seed).entropy
+    n = len(parcels)
+    codes = CROP_REGISTRY.encode(parcels['crop_type'])
+    hectares = parcels['farm_size'].to_numpy()
+    total_yield = np.zeros(n)
+    n_days = np.zeros(n, dtype=int)
+    price = CROP_REGISTRY.price_per_ton[codes]
+    costs = scaled_total_cost(CROP_REGISTRY.cost_per_hectare[codes], hectares)
+    daily_frames = []
+
+    for (location, start_date, end_date), group in parcels.groupby(
+            ['location', 'start_date', 'end_date'], sort=False):
+        env_gen = EnvironmentalDataGenerator(
+            location, start_date, end_date, seed=_weather_seed(entropy, location, start_date, end_date)
+        )
+        weather = env_gen.generate_ensemble(1, variables=('temperature', 'precipitation'))
+        idx = group.index.to_numpy()
+        n_days[idx] = len(weather['date'])
+
+        # Una curva di crescita per coltura presente nel gruppo: (n_colture, n_giorni)
+        crop_codes, parcel_crop = np.unique(codes[idx], return_inverse=True)
+        growth = growth_factors(
+            weather['temperature'][0], weather['precipitation'][0], crop_codes[:, None]
+        )
+        # Nulla fuori dalla stagione di ciascuna coltura
+        growth *= np.stack([
+            growing_season(weather['temperature'][0], weather['precipitation'][0], weather['date'],
+                           CROP_REGISTRY.names[code])
+            for code in crop_codes
+        ])
+        yield_per_ha = growth * (CROP_REGISTRY.base_yield[crop_codes, None] / 100)
+        total_yield[idx] = yield_per_ha.sum(axis=1)[parcel_crop] * hectares[idx]
+
+        if detail:
+            daily_yield = yield_per_ha[parcel_crop] * hectares[idx, None]
+            daily_frames.append(pd.DataFrame({
+                'parcel_id': np.repeat(group['parcel_id'].to_numpy(), daily_yield.shape[1]),
+                'date': np.tile(weather['date'].to_numpy(), len(idx)),
+                'yield': daily_yield.ravel(),
+                'revenue': (daily_yield * price[idx, None]).ravel(),
+            }))
+
+    revenue = total_yield * price
+    profit = revenue - costs
+    summary = parcels[['parcel_id', *PARCEL_COLUMNS]].assign(
+        n_days=n_days,
+        total_yield=total_yield,
+        yield_per_ha=total_yield / parcels['farm_size'].to_numpy(),
+        revenue=revenue,
+        costs=costs,
+        profit=profit,
+        roi=profit / costs * 100,
+    )
+    if not detail:
+        return summary
+    daily = (
+        pd.concat(daily_frames, ignore_index=True) if daily_frames
+        else pd.DataFrame(columns=['parcel_id', 'date', 'yield', 'revenue'])
+    )
+    return summary, daily
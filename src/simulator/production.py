@@ -1,108 +1,299 @@
 import numpy as np
-import pandas as pd
+
+from simulator.crops import load_crops
+
+# Agronomic and economic parameters by crop, compiled from config/crops.yaml
+CROP_REGISTRY = load_crops()
+CROP_PARAMETERS = CROP_REGISTRY
+
+
+def temperature_factor(temperature, optimal_temp):
+    """
+    Triangle-shaped temperature response: 1 inside the optimal range,
+    decreasing linearly with the distance from its centre outside of it.
+    Works on arrays of any shape.
+    """
+    optimal_temp_min, optimal_temp_max = optimal_temp
+    temperature = np.asarray(temperature)
+    center = (optimal_temp_min + optimal_temp_max) / 2
+    half_width = (optimal_temp_max - optimal_temp_min) / 2
+
+    factor = np.abs(temperature - center)
+    factor /= -half_width
+    factor += 1
+    np.maximum(factor, 0, out=factor)
+    factor[(temperature >= optimal_temp_min) & (temperature <= optimal_temp_max)] = 1.0
+    return factor
+
+
+def water_factor(precipitation, water_requirement):
+    """Precipitation relative to the crop requirement, clipped to [0, 1]."""
+    factor = np.asarray(precipitation) / water_requirement
+    return np.clip(factor, 0, 1, out=factor)
+
+
+def crop_temperature_factor(temperature, crop_params):
+    """
+    Temperature factor of a crop: a table lookup for registry crops, the
+    analytic curve for ad-hoc parameter dicts.
+    """
+    if crop_params.get("name") in CROP_REGISTRY:
+        return CROP_REGISTRY.temperature_response(temperature, crop_params["name"])
+    return temperature_factor(temperature, crop_params["optimal_temp"])
+
+
+def growth_factor(temperature, precipitation, crop_params):
+    """Combined daily growth factor (temperature × water)."""
+    factor = crop_temperature_factor(temperature, crop_params)
+    factor *= water_factor(precipitation, crop_params["water_requirement"])
+    return factor
+
+
+def growth_factors(temperature, precipitation, crop_codes):
+    """
+    Growth factor of several crops at once. ``crop_codes`` (see
+    ``CropRegistry.encode``) must broadcast against the weather arrays, e.g.
+    shape (n_crops, 1) with daily series gives (n_crops, n_days).
+    """
+    crop_codes = np.asarray(crop_codes)
+    factor = CROP_REGISTRY.temperature_response(temperature, crop_codes)
+    requirement = CROP_REGISTRY.water_requirement[crop_codes].astype(factor.dtype, copy=False)
+    factor *= np.clip(np.asarray(precipitation) / requirement, 0, 1)
+    return factor
+
+
+def subdaily_steps(dates):
+    """
+    Steps per day of a regular datetime series: 1 for daily data, 24 for
+    hourly data.
+    """
+    dates = np.asarray(dates, dtype='datetime64[s]')
+    if len(dates) < 2:
+        return 1
+    step = (dates[1] - dates[0]) / np.timedelta64(1, 's')
+    return max(int(round(86400 / step)), 1)
+
+
+def daily_factors(temperature, precipitation, crop_params, steps_per_day):
+    """
+    Daily temperature and water factors from sub-daily weather.
+
+    The temperature factor is the mean over the day of the step-wise
+    factors (so a hot afternoon counts even if the daily mean is optimal),
+    the water factor uses the daily rain total. Both reductions are a
+    reshape of the last axis to (n_days, steps_per_day), for any number of
+    leading axes (e.g. ensemble members).
+
+    Parameters
+    ----------
+    temperature, precipitation : numpy.ndarray
+        Series of shape (..., n_days * steps_per_day).
+    crop_params : dict
+        One entry of ``CROP_PARAMETERS``.
+    steps_per_day : int
+        See ``subdaily_steps``.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Temperature and water factors, shape (..., n_days).
+    """
+    temperature = np.asarray(temperature)
+    by_day = temperature.shape[:-1] + (-1, steps_per_day)
+    temp_factor = crop_temperature_factor(temperature.reshape(by_day), crop_params).mean(axis=-1)
+    rain = np.asarray(precipitation).reshape(by_day).sum(axis=-1)
+    return temp_factor, water_factor(rain, crop_params["water_requirement"])
+
+
+def aggregate_daily(env_data, steps_per_day):
+    """
+    Daily table from a sub-daily one: first timestamp of each day, mean of
+    every weather column except precipitation, which is summed.
+    """
+    columns = {}
+    for name in env_data.columns.drop("date"):
+        values = env_data[name].to_numpy().reshape(-1, steps_per_day)
+        columns[name] = values.sum(axis=1) if name == "precipitation" else values.mean(axis=1)
+    return env_data.iloc[::steps_per_day].reset_index(drop=True).assign(**columns)
+
+
+def season_mask(temperature, precipitation, dates, crop_params, steps_per_day=1):
+    """
+    Days on which the crop is in the field (see
+    ``simulator.seasons.growing_season``), from daily or sub-daily weather
+    with its dates; one value per day.
+    """
+    from simulator.seasons import growing_season
+    if steps_per_day > 1:
+        by_day = np.shape(temperature)[:-1] + (-1, steps_per_day)
+        temperature = np.asarray(temperature).reshape(by_day).mean(axis=-1)
+        precipitation = np.asarray(precipitation).reshape(by_day).sum(axis=-1)
+        dates = np.asarray(dates)[::steps_per_day]
+    return growing_season(temperature, precipitation, dates, crop_params["name"])
+
+
+def yield_kernel(temperature, precipitation, crop_params, farm_size):
+    """
+    Pure-array version of the production model.
+
+    Parameters
+    ----------
+    temperature, precipitation : numpy.ndarray
+        Daily series of any shape, typically (n_members, n_days).
+    crop_params : dict
+        One entry of ``CROP_PARAMETERS``.
+    farm_size : float or numpy.ndarray
+        Hectares; arrays must broadcast against the weather arrays.
+
+    Returns
+    -------
+    dict
+        'yield', 'revenue', 'cost' and 'profit' arrays with the broadcast shape.
+    """
+    return _daily_economics(growth_factor(temperature, precipitation, crop_params), crop_params, farm_size)
+
+
+def _hectares(farm_size):
+    # Python scalars keep the dtype of the weather arrays (e.g. float32)
+    return farm_size if np.isscalar(farm_size) else np.asarray(farm_size)
+
+
+def _daily_economics(growth, crop_params, farm_size):
+    farm_size = _hectares(farm_size)
+    daily_yield = growth * (crop_params["base_yield"] * farm_size / 100)
+    revenue = daily_yield * crop_params["price_per_ton"]
+    cost = np.zeros_like(daily_yield)
+    cost += crop_params["cost_per_hectare"] * farm_size
+    return {
+        "yield": daily_yield,
+        "revenue": revenue,
+        "cost": cost,
+        "profit": revenue - cost,
+    }
+
+
+def yield_totals(temperature, precipitation, crop_params, farm_size, steps_per_day=1, dates=None):
+    """
+    Totals over the last axis (days) of the quantities returned by
+    ``yield_kernel``, without materializing the daily economic arrays.
+    With ``steps_per_day`` > 1 the weather is sub-daily and is reduced to
+    daily factors first (see ``daily_factors``). With the ``dates`` of the
+    weather, days outside the growing season of the crop produce nothing
+    (see ``season_mask``).
+    """
+    farm_size = _hectares(farm_size)
+    if steps_per_day > 1:
+        temp_factor, water = daily_factors(temperature, precipitation, crop_params, steps_per_day)
+        growth = temp_factor * water
+    else:
+        growth = growth_factor(temperature, precipitation, crop_params)
+    if dates is not None:
+        growth *= season_mask(temperature, precipitation, dates, crop_params, steps_per_day)
+    n_days = growth.shape[-1]
+    total_growth = growth.sum(axis=-1)
+    total_yield = total_growth * (crop_params["base_yield"] * farm_size / 100)
+    revenue = total_yield * crop_params["price_per_ton"]
+    cost = np.zeros_like(total_yield)
+    cost += crop_params["cost_per_hectare"] * farm_size * n_days
+    return {
+        "yield": total_yield,
+        "revenue": revenue,
+        "cost": cost,
+        "profit": revenue - cost,
+    }
 
 
 class AgriculturalProductionGenerator:
-    def __init__(self, environmental_data, crop_type, farm_size=100):
+    def __init__(self, environmental_data, crop_type, farm_size=100, growing_season=None):
         """
         Parameters
         ----------
         environmental_data : pandas.DataFrame
             Must contain at least 'temperature' and 'precipitation' columns.
+            Sub-daily data (e.g. hourly, detected from the 'date' column) is
+            aggregated to days.
         crop_type : str
             One of the keys in self.crop_parameters (e.g. 'grano', 'mais', …).
         farm_size : float
             Size of the farm in hectares. Defaults to 100 ha.
+        growing_season : simulator.seasons.GrowingSeason, optional
+            Season windows of data that arrives in consecutive chunks (see
+            ``simulator.streaming``); by default they are computed from
+            this data alone. Without a 'date' column every day is in season.
         """
         self.environmental_data = environmental_data
         self.crop_type = crop_type
         self.farm_size = farm_size
+        self.growing_season = growing_season
+
+        # Registro condiviso: nessuna preparazione per istanza
+        self.crop_parameters = CROP_REGISTRY
 
-        # Agronomic and economic parameters by crop
-        self.crop_parameters = {
-            "grano": {
-                "optimal_temp": (15, 25),     # °C
-                "growth_days": 180,
-                "base_yield": 7.0,            # t / ha under ideal conditions
-                "water_requirement": 4.5,     # mm of rain per day
-                "price_per_ton": 250,         # €/t
-                "cost_per_hectare": 1000,     # €/ha
-                "planting_months": [10, 11, 12]
-            },
-            "soia": {
-                "optimal_temp": (20, 30),
-                "growth_days": 150,
-                "base_yield": 3.2,
-                "water_requirement": 5.0,
-                "price_per_ton": 500,
-                "cost_per_hectare": 800,
-                "planting_months": [4, 5]
-            },
-            "orzo": {
-                "optimal_temp": (12, 22),
-                "growth_days": 170,
-                "base_yield": 6.5,
-                "water_requirement": 4.2,
-                "price_per_ton": 230,
-                "cost_per_hectare": 900,
-                "planting_months": [10, 11]
-            },
-            "girasole": {
-                "optimal_temp": (18, 28),
-                "growth_days": 130,
-                "base_yield": 2.8,
-                "water_requirement": 4.8,
-                "price_per_ton": 400,
-                "cost_per_hectare": 750,
-                "planting_months": [3, 4, 5]
-            },
-            "mais": {                        #  ← newly added crop
-                "optimal_temp": (18, 30),
-                "growth_days": 150,
-                "base_yield": 10.5,
-                "water_requirement": 5.5,
-                "price_per_ton": 210,
-                "cost_per_hectare": 1100,
-                "planting_months": [4, 5]
-            }
-        }
-
-    def simulate(self) -> pd.DataFrame:
-        """Return a dataframe with yield, revenue, cost and profit day‑by‑day."""
-        df = self.environmental_data.copy()
-
-        # Look up the selected crop’s parameters
+    def simulate(self) -> 'pandas.DataFrame':
+        """
+        Return a dataframe with yield, revenue, cost and profit day‑by‑day.
+        Yield and revenue are zero on the days outside the growing season
+        of the crop (the ``in_season`` column).
+        """
+        env = self.environmental_data
         crop_params = self.crop_parameters[self.crop_type]
-        optimal_temp_min, optimal_temp_max = crop_params["optimal_temp"]
-
-        # Temperature response curve (triangle‑shaped)
-        df["temp_factor"] = df["temperature"].apply(
-            lambda t: 1.0
-            if optimal_temp_min <= t <= optimal_temp_max
-            else max(
-                0,
-                1
-                - abs(t - (optimal_temp_min + optimal_temp_max) / 2)
-                / ((optimal_temp_max - optimal_temp_min) / 2),
-            )
-        )
+        temperature = env["temperature"].to_numpy()
+        precipitation = env["precipitation"].to_numpy()
 
-        # Water availability factor (precipitation relative to requirement)
-        df["water_factor"] = np.clip(
-            df["precipitation"] / crop_params["water_requirement"], 0, 1
-        )
+        steps = subdaily_steps(env["date"]) if "date" in env else 1
+        if steps > 1:
+            temp_factor, water = daily_factors(temperature, precipitation, crop_params, steps)
+            env = aggregate_daily(env, steps)
+        else:
+            temp_factor = crop_temperature_factor(temperature, crop_params)
+            water = water_factor(precipitation, crop_params["water_requirement"])
+        growth = temp_factor * water
+        if "date" in env:
+            from simulator.seasons import GrowingSeason
+            season = self.growing_season or GrowingSeason(self.crop_type)
+            in_season = season.mask(env["temperature"].to_numpy(), env["precipitation"].to_numpy(),
+                                    env["date"].to_numpy())
+        else:
+            in_season = np.ones(len(growth), dtype=bool)
+        output = _daily_economics(growth * in_season, crop_params, self.farm_size)
 
-        # Combined growth factor
-        df["growth_factor"] = df["temp_factor"] * df["water_factor"]
+        import pandas as pd
+        # Tabella costruita dagli array delle colonne con copy=False: nessuna
+        # copia dei dati meteo, con o senza copy-on-write (pandas 2 e 3)
+        columns = {name: env[name].to_numpy() for name in env.columns}
+        columns.update(temp_factor=temp_factor, water_factor=water, growth_factor=growth, in_season=in_season,
+                       **output)
+        return pd.DataFrame(columns, index=env.index, copy=False)
 
-        # Daily yield for the whole farm (tons)
-        df["yield"] = (
-            crop_params["base_yield"] * df["growth_factor"] * self.farm_size / 100
+    def seasons(self, sowing=None):
+        """
+        Sowing-to-harvest seasons of the crop for every planting date in
+        the data; see ``simulator.seasons.simulate_seasons``.
+        """
+        from simulator.seasons import simulate_seasons
+        env = self.environmental_data
+        steps = subdaily_steps(env["date"])
+        if steps > 1:
+            env = aggregate_daily(env, steps)
+        return simulate_seasons(
+            env["temperature"].to_numpy(),
+            env["precipitation"].to_numpy(),
+            env["date"].to_numpy(),
+            self.crop_type,
+            self.farm_size,
+            sowing,
         )
 
-        # Economics
-        df["revenue"] = df["yield"] * crop_params["price_per_ton"]
-        df["cost"] = crop_params["cost_per_hectare"] * self.farm_size
-        df["profit"] = df["revenue"] - df["cost"]
-
-        return df
\ No newline at end of file
+    def summarize(self) -> dict:
+        """Return total yield, revenue, cost and profit over the whole period."""
+        env = self.environmental_data
+        crop_params = self.crop_parameters[self.crop_type]
+        totals = yield_totals(
+            env["temperature"].to_numpy(),
+            env["precipitation"].to_numpy(),
+            crop_params,
+            self.farm_size,
+            steps_per_day=subdaily_steps(env["date"]) if "date" in env else 1,
+            dates=env["date"].to_numpy() if "date" in env else None,
+        )
+        return {name: float(value) for name, value in totals.items()}
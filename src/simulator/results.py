@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Da incrementare quando cambia un modello: i risultati salvati con una
+# versione diversa non vengono più riutilizzati
+MODEL_VERSION = "4"
+
+METADATA_FILE = 'meta.json'
+
+
+def run_id(metadata):
+    """Content hash of the run metadata, used as its address in the store."""
+    canonical = json.dumps(metadata, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:20]
+
+
+class StoredRun:
+    """
+    A run loaded from a ``ResultsStore``. Arrays are memory-mapped: only the
+    pages that are actually read are loaded from disk.
+    """
+
+    def __init__(self, run_id, metadata, arrays):
+        self.run_id = run_id
+        self.metadata = metadata
+        self.arrays = arrays
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def to_frame(self, columns=None):
+        """Return the 1-D arrays (or ``columns``) as a pandas DataFrame."""
+        import pandas as pd
+        columns = columns or [name for name, values in self.arrays.items() if values.ndim == 1]
+        return pd.DataFrame({name: self.arrays[name] for name in columns})
+
+
+class ResultsStore:
+    """
+    Columnar on-disk store of simulation results.
+
+    Every run is a directory named after the hash of its metadata, holding a
+    ``meta.json`` and one ``.npy`` file per array. Runs are written to a
+    temporary directory and renamed in place, so readers never see a
+    partially written run and concurrent writers of the same run are safe.
+
+    Parameters
+    ----------
+    root : str
+        Directory of the store; created if missing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, run_id):
+        return os.path.join(self.root, run_id)
+
+    def has_run(self, run_id):
+        return os.path.exists(os.path.join(self._path(run_id), METADATA_FILE))
+
+    def save_run(self, arrays, metadata):
+        """
+        Write ``arrays`` (dict of name → array) with ``metadata`` and return
+        the run id. Saving a run that already exists is a no-op.
+        """
+        metadata = dict(metadata, model_version=metadata.get('model_version', MODEL_VERSION))
+        rid = run_id(metadata)
+        if self.has_run(rid):
+            return rid
+
+        tmp_dir = tempfile.mkdtemp(prefix=f'.{rid}-', dir=self.root)
+        try:
+            for name, values in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.asarray(values), allow_pickle=False)
+            with open(os.path.join(tmp_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'run_id': rid, 'metadata': metadata, 'arrays': sorted(arrays)},
+                    f, sort_keys=True, default=str, indent=2,
+                )
+            os.rename(tmp_dir, self._path(rid))
+        except OSError:
+            # Un altro processo ha salvato la stessa simulazione nel frattempo
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not self.has_run(rid):
+                raise
+        return rid
+
+    def load_run(self, run_id, mmap=True):
+        """Return the ``StoredRun`` with id ``run_id``."""
+        path = self._path(run_id)
+        with open(os.path.join(path, METADATA_FILE), encoding='utf-8') as f:
+            header = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+            for name in header['arrays']
+        }
+        return StoredRun(run_id, header['metadata'], arrays)
+
+    def find_run(self, metadata):
+        """Return the ``StoredRun`` matching ``metadata`` or ``None``."""
+        rid = run_id(dict(metadata, model_version=metadata.get('model_version', MODEL_VERSION)))
+        return self.load_run(rid) if self.has_run(rid) else None
+
+    def list_runs(self, **filters):
+        """
+        Metadata of the stored runs (with their ``run_id``), optionally
+        filtered on metadata values, e.g. ``list_runs(crop_type='mais')``.
+        """
+        runs = []
+        for entry in sorted(os.listdir(self.root)):
+            meta_path = os.path.join(self.root, entry, METADATA_FILE)
+            if entry.startswith('.') or not os.path.exists(meta_path):
+                continue
+            with open(meta_path, encoding='utf-8') as f:
+                header = json.load(f)
+            metadata = header['metadata']
+            if all(metadata.get(key) == value for key, value in filters.items()):
+                runs.append(dict(metadata, run_id=header['run_id']))
+        return runs
+
+    def delete_run(self, run_id):
+        shutil.rmtree(self._path(run_id), ignore_errors=True)
@@ -0,0 +1,184 @@
+import numpy as np
+
+# Serie indicizzate per impostazione predefinita (from_frames)
+ROLLUP_SERIES = ('yield', 'revenue', 'costs', 'profit')
+# Periodi precalcolati: settimane ISO (da lunedì), mesi e stagioni meteorologiche (DJF, MAM, JJA, SON)
+PERIODS = ('W', 'M', 'season')
+
+
+def _day(value):
+    return np.datetime64(value).astype('datetime64[D]')
+
+
+def period_starts(dates, period):
+    """
+    First day of the ``period`` (``'D'``, ``'W'``, ``'M'`` or ``'season'``)
+    that contains each of ``dates``.
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if period == 'D':
+        return dates
+    if period == 'W':
+        # Il giorno 0 (1970-01-01) è un giovedì: +3 allinea le settimane al lunedì
+        days = dates.astype(np.int64)
+        return ((days + 3) // 7 * 7 - 3).astype('datetime64[D]')
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    if period == 'season':
+        # Dicembre apre l'inverno: la stagione inizia a dicembre, marzo, giugno o settembre
+        months = months - (months % 12 + 1) % 3
+    elif period != 'M':
+        raise ValueError(f"Periodo non valido: {period}")
+    return months.astype('datetime64[M]').astype('datetime64[D]')
+
+
+class RollupIndex:
+    """
+    Aggregation index of a run, built once: prefix sums of every series
+    and their weekly, monthly and seasonal totals.
+
+    With the prefix sums ``P`` (a leading zero, then the running total) the
+    sum over the days ``[i, j)`` is ``P[j] - P[i]``, so every date-range
+    total or period-over-period comparison is two lookups, whatever the
+    length of the run. On the regular daily calendar of the simulator the
+    position of a date is an offset from the first day; other calendars
+    fall back to a binary search. Period totals are differences of the
+    prefix sums at the period boundaries, computed for all periods at
+    build time.
+
+    Series may be (n_days,) or (n_members, n_days): ensemble members are
+    aggregated along the last axis and every total is then per member.
+
+    Parameters
+    ----------
+    dates : array_like
+        Sorted days of the series.
+    series : dict
+        Name → values aligned with ``dates``.
+    """
+
+    def __init__(self, dates, series):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        n_days = len(self.dates)
+        steps = np.diff(self.dates).astype(np.int64)
+        self._regular = bool((steps == 1).all())
+        self._prefix = {}
+        for name, values in series.items():
+            values = np.asarray(values, dtype=np.float64)
+            if values.shape[-1] != n_days:
+                raise ValueError(f"{name}: {values.shape[-1]} valori per {n_days} date")
+            prefix = np.zeros(values.shape[:-1] + (n_days + 1,))
+            np.cumsum(values, axis=-1, out=prefix[..., 1:])
+            prefix.flags.writeable = False
+            self._prefix[name] = prefix
+
+        self._periods = {}
+        self._totals = {}
+        for period in PERIODS:
+            starts = period_starts(self.dates, period)
+            first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]]) if n_days else np.array([], np.intp)
+            bounds = np.r_[first, n_days]
+            self._periods[period] = (starts[first], bounds)
+            for name, prefix in self._prefix.items():
+                self._totals[period, name] = np.diff(prefix[..., bounds], axis=-1)
+
+    @classmethod
+    def from_frames(cls, prod_data, financial_data, env_data=None):
+        """
+        Index of a run: yield, revenue, costs and profit, plus the weather
+        variables when ``env_data`` is given.
+        """
+        series = {'yield': prod_data['yield'].to_numpy()}
+        series.update({name: financial_data[name].to_numpy() for name in ROLLUP_SERIES[1:]})
+        if env_data is not None:
+            series.update({name: env_data[name].to_numpy() for name in env_data.columns if name != 'date'})
+        return cls(prod_data['date'].to_numpy(), series)
+
+    @property
+    def names(self):
+        return tuple(self._prefix)
+
+    def _series(self, name):
+        try:
+            return self._prefix[name]
+        except KeyError:
+            raise KeyError(f"Serie non indicizzata: {name}") from None
+
+    def _position(self, date, after=False):
+        # Indice del primo giorno >= date (> date con after=True)
+        n_days = len(self.dates)
+        day = _day(date)
+        if self._regular and n_days:
+            offset = int((day - self.dates[0]).astype(np.int64)) + after
+            return min(max(offset, 0), n_days)
+        return int(np.searchsorted(self.dates, day, side='right' if after else 'left'))
+
+    def bounds(self, start=None, end=None):
+        """Index range ``[lo, hi)`` of the days between ``start`` and ``end`` (both included)."""
+        lo = 0 if start is None else self._position(start)
+        hi = len(self.dates) if end is None else self._position(end, after=True)
+        return lo, max(lo, hi)
+
+    def total(self, name, start=None, end=None):
+        """Sum of ``name`` between ``start`` and ``end`` (both included; the whole run by default)."""
+        prefix = self._series(name)
+        lo, hi = self.bounds(start, end)
+        return prefix[..., hi] - prefix[..., lo]
+
+    def mean(self, name, start=None, end=None):
+        """Mean daily value of ``name`` between ``start`` and ``end``; NaN on an empty range."""
+        lo, hi = self.bounds(start, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total(name, start, end) / (hi - lo)
+
+    def compare(self, name, start, end):
+        """
+        Total of ``name`` between ``start`` and ``end`` and over the same
+        number of days just before, as ``(current, previous)``.
+        """
+        prefix = self._series(name)
+        lo, hi = self.bounds(start, end)
+        before = max(lo - (hi - lo), 0)
+        return prefix[..., hi] - prefix[..., lo], prefix[..., lo] - prefix[..., before]
+
+    def trailing(self, name, days):
+        """Totals of the last ``days`` days and of the ``days`` before them, as ``(last, previous)``."""
+        prefix = self._series(name)
+        n_days = len(self.dates)
+        last, previous = max(n_days - days, 0), max(n_days - 2 * days, 0)
+        return prefix[..., n_days] - prefix[..., last], prefix[..., last] - prefix[..., previous]
+
+    def cumulative(self, name):
+        """Running total of ``name`` at the end of each day (read-only)."""
+        return self._series(name)[..., 1:]
+
+    def rollup(self, name, period, how='sum', cumulative=False):
+        """
+        Totals (or means, with ``how='mean'``) of ``name`` per ``period``.
+
+        Parameters
+        ----------
+        period : {'D', 'W', 'M', 'season'}
+        cumulative : bool, optional
+            Running total at the end of each period instead of the period
+            total.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            First day of every period and its values (per member on the
+            last axis for ensembles).
+        """
+        if how not in ('sum', 'mean'):
+            raise ValueError(f"Aggregazione non valida: {how}")
+        prefix = self._series(name)
+        if period == 'D':
+            dates, bounds = self.dates, np.arange(len(self.dates) + 1)
+            values = prefix[..., 1:] if cumulative else np.diff(prefix, axis=-1)
+        else:
+            if period not in self._periods:
+                raise ValueError(f"Periodo non valido: {period}")
+            dates, bounds = self._periods[period]
+            values = prefix[..., bounds[1:]] if cumulative else self._totals[period, name]
+        if how == 'mean' and not cumulative:
+            values = values / np.diff(bounds)
+        return dates, values
@@ -0,0 +1,293 @@
+import numpy as np
+
+from simulator.production import CROP_REGISTRY, growth_factor, water_factor
+
+# Stagioni più lunghe di growth_days × MAX_SEASON_FACTOR: la coltura non matura e il raccolto è perso
+MAX_SEASON_FACTOR = 2.0
+SEASON_METRICS = ('length', 'growth_index', 'water_stress', 'yield', 'revenue', 'cost', 'profit')
+
+
+def _months(dates):
+    return np.asarray(dates, dtype='datetime64[M]').astype(np.int64) % 12 + 1
+
+
+def sowing_candidates(dates, planting_months):
+    """Indices of the days of ``dates`` that fall in ``planting_months``."""
+    return np.flatnonzero(np.isin(_months(dates), planting_months))
+
+
+def conventional_sowing(years, planting_months):
+    """Sowing date of every year in ``years``: the 15th of the middle month of ``planting_months``."""
+    month = planting_months[len(planting_months) // 2]
+    months = (np.asarray(years, dtype=np.int64) - 1970) * 12 + month - 1
+    return months.astype('datetime64[M]').astype('datetime64[D]') + np.timedelta64(14, 'D')
+
+
+def _cumulative(daily):
+    # Somme cumulative sull'ultimo asse con uno zero iniziale: la somma dei
+    # giorni [s, k) è cumulative[..., k] - cumulative[..., s]
+    out = np.zeros(daily.shape[:-1] + (daily.shape[-1] + 1,))
+    np.cumsum(daily, axis=-1, dtype=np.float64, out=out[..., 1:])
+    return out
+
+
+def _first_reaching(cumulative, start, target):
+    """
+    For every row of the non-decreasing ``cumulative`` (n_rows, width) and
+    every index in ``start``, the first index ``k`` with
+    ``cumulative[row, k] >= cumulative[row, start] + target``, or ``width``
+    when the target is never reached.
+
+    Each row is shifted by a multiple of an offset larger than its range,
+    which makes the flattened array sorted: one ``searchsorted`` then
+    answers every (row, start) query.
+    """
+    n_rows, width = cumulative.shape
+    span = cumulative[:, -1].max() + target + 1
+    shift = np.arange(n_rows)[:, None] * span
+    flat = (cumulative + shift).ravel()
+    queries = cumulative[:, start] + target + shift
+    return np.searchsorted(flat, queries, side='left') - np.arange(n_rows)[:, None] * width
+
+
+class SeasonResult:
+    """
+    Outcome of every (member, sowing date) season of a crop.
+
+    ``values[metric]`` is an array of shape (n_members, n_candidates) for
+    every entry of ``SEASON_METRICS``; seasons whose outcome is unknown
+    (the weather ends before both the harvest and the season limit) are
+    NaN and False in ``complete``. ``matured`` is False where the crop did
+    not reach its degree days in time, in which case the yield is zero.
+    """
+
+    def __init__(self, crop_type, sowing_dates, matured, complete, values):
+        self.crop_type = crop_type
+        self.sowing_dates = sowing_dates
+        self.matured = matured
+        self.complete = complete
+        self.values = values
+
+    @property
+    def harvest_dates(self):
+        length = np.nan_to_num(self.values['length'], nan=0).astype(np.int64)
+        harvest = self.sowing_dates + length.astype('timedelta64[D]')
+        return np.where(self.complete, harvest, np.datetime64('NaT'))
+
+    def mean(self, metric):
+        """Mean of ``metric`` over the members with a known outcome, per sowing date."""
+        values = self.values[metric]
+        counts = self.complete.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, np.nansum(values, axis=0) / counts, np.nan)
+
+    def to_frame(self):
+        """One row per sowing date: member means of every metric and the share of matured seasons."""
+        import pandas as pd
+        counts = self.complete.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            maturity = np.where(counts > 0, (self.matured & self.complete).sum(axis=0) / counts, np.nan)
+        return pd.DataFrame({
+            'sowing_date': self.sowing_dates,
+            'members': counts,
+            'maturity_rate': maturity,
+            **{metric: self.mean(metric) for metric in SEASON_METRICS},
+        })
+
+    def best_sowing(self, metric='profit'):
+        """Sowing date with the highest mean ``metric`` in each sowing year."""
+        frame = self.to_frame().dropna(subset=[metric])
+        frame = frame.assign(season=frame['sowing_date'].dt.year)
+        best = frame.loc[frame.groupby('season')[metric].idxmax()]
+        return best.set_index('season')
+
+
+def simulate_seasons(temperature, precipitation, dates, crop_type, farm_size=100, sowing=None):
+    """
+    Sowing-to-harvest seasons of ``crop_type`` for every candidate sowing
+    date, across all ensemble members at once.
+
+    Growing degree days (above the crop ``base_temp``), the daily growth
+    factor and the water factor are accumulated once with ``cumsum`` over
+    (members × days); the harvest of every (member, sowing date) is the
+    first day at which the degree days since sowing reach the crop
+    ``gdd_requirement``, found with a single batched ``searchsorted``.
+    Season totals are differences of the cumulative sums, so the cost does
+    not depend on the number or length of the seasons and there is no loop
+    over days, years or sowing dates.
+
+    The season outcome is:
+
+    - ``length``: days from sowing to harvest;
+    - ``growth_index``: mean daily growth factor over the season (0-1);
+    - ``water_stress``: mean of 1 - water factor over the season;
+    - ``yield``: ``base_yield`` × ``farm_size`` × ``growth_index`` (t), zero
+      when the crop does not mature within ``MAX_SEASON_FACTOR`` ×
+      ``growth_days``;
+    - ``revenue``, ``cost`` (``cost_per_hectare`` × ``farm_size`` per
+      season) and ``profit`` (€).
+
+    Parameters
+    ----------
+    temperature, precipitation : array_like
+        Daily weather, shape (n_days,) or (n_members, n_days).
+    dates : array_like
+        The n_days dates of the series.
+    crop_type : str
+        Crop of ``CROP_REGISTRY``.
+    farm_size : float, optional
+        Hectares.
+    sowing : array_like of int, optional
+        Day indices of the candidate sowing dates; by default every day of
+        the crop ``planting_months``.
+
+    Returns
+    -------
+    SeasonResult
+    """
+    params = CROP_REGISTRY[crop_type]
+    temperature = np.atleast_2d(temperature)
+    precipitation = np.atleast_2d(precipitation)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    n_members, n_days = temperature.shape
+    sowing = sowing_candidates(dates, params['planting_months']) if sowing is None else np.asarray(sowing, np.intp)
+
+    degree_days = _cumulative(np.maximum(temperature - params['base_temp'], 0))
+    growth = _cumulative(growth_factor(temperature, precipitation, params))
+    water = _cumulative(water_factor(precipitation, params['water_requirement']))
+
+    harvest = _first_reaching(degree_days, sowing, params['gdd_requirement'])
+    max_days = int(round(MAX_SEASON_FACTOR * params['growth_days']))
+    matured = (harvest <= n_days) & (harvest - sowing <= max_days)
+    # Esito noto: raccolto avvenuto, oppure dati sufficienti a dichiararlo perso
+    complete = matured | (sowing + max_days <= n_days)
+    end = np.where(matured, harvest, np.minimum(sowing + max_days, n_days))
+
+    rows = np.arange(n_members)[:, None]
+    length = (end - sowing).astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth_index = (growth[rows, end] - growth[rows, sowing]) / length
+        water_stress = 1 - (water[rows, end] - water[rows, sowing]) / length
+    season_yield = np.where(matured, params['base_yield'] * farm_size * growth_index, 0.0)
+    revenue = season_yield * params['price_per_ton']
+    cost = np.full(season_yield.shape, params['cost_per_hectare'] * farm_size, dtype=float)
+
+    values = {
+        'length': length,
+        'growth_index': growth_index,
+        'water_stress': water_stress,
+        'yield': season_yield,
+        'revenue': revenue,
+        'cost': cost,
+        'profit': revenue - cost,
+    }
+    for metric in SEASON_METRICS:
+        values[metric][~complete] = np.nan
+    return SeasonResult(crop_type, dates[sowing], matured, complete, values)
+
+
+def growing_season(temperature, precipitation, dates, crop_type):
+    """
+    Mask of the days on which ``crop_type`` is in the field.
+
+    The crop is sown every year on its ``conventional_sowing`` date and
+    stays in the field until the harvest found by ``simulate_seasons``, or
+    until the season limit (``MAX_SEASON_FACTOR`` × ``growth_days``) when it
+    does not mature. A season sown before the first day of ``dates`` lasts
+    ``growth_days``, its degree days being unknown; one still running on
+    the last day lasts until the end. The windows only depend on the
+    weather up to each day, so the mask of a prefix of the series is a
+    prefix of the mask.
+
+    Parameters
+    ----------
+    temperature, precipitation : array_like
+        Daily weather, shape (n_days,) or (n_members, n_days).
+    dates : array_like
+        The n_days dates of the series.
+    crop_type : str
+        Crop of ``CROP_REGISTRY``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask with the shape of ``temperature``.
+    """
+    params = CROP_REGISTRY[crop_type]
+    shape = np.shape(temperature)
+    temperature = np.atleast_2d(temperature)
+    precipitation = np.atleast_2d(precipitation)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    n_members, n_days = temperature.shape
+    if not n_days:
+        return np.zeros(shape, dtype=bool)
+
+    first, last = dates[[0, -1]].astype('datetime64[Y]').astype(np.int64) + 1970
+    sown = conventional_sowing(np.arange(first - 1, last + 1), params['planting_months'])
+    before = sown[sown < dates[0]]
+    sowing = np.searchsorted(dates, sown[(sown >= dates[0]) & (sown <= dates[-1])])
+    seasons = simulate_seasons(temperature, precipitation, dates, crop_type, sowing=sowing)
+    # Esito ancora ignoto: la coltura resta in campo fino all'ultimo giorno
+    length = np.where(seasons.complete, seasons.values['length'], n_days - sowing)
+
+    starts = np.concatenate([np.zeros(len(before), np.intp), sowing])
+    starts = np.broadcast_to(starts, (n_members, len(starts)))
+    ends = np.concatenate([
+        np.broadcast_to(np.searchsorted(dates, before + params['growth_days']), (n_members, len(before))),
+        sowing + length.astype(np.intp),
+    ], axis=1)
+    # +1 all'inizio e -1 alla fine di ogni finestra: la somma cumulativa
+    # conta le stagioni aperte in ciascun giorno
+    opened = np.zeros((n_members, n_days + 1), dtype=np.int32)
+    rows = np.broadcast_to(np.arange(n_members)[:, None], starts.shape)
+    np.add.at(opened, (rows, starts), 1)
+    np.add.at(opened, (rows, ends), -1)
+    return (np.cumsum(opened[:, :-1], axis=1) > 0).reshape(shape)
+
+
+class GrowingSeason:
+    """
+    ``growing_season`` of a crop over daily weather that arrives in
+    consecutive chunks.
+
+    Every season that reaches a chunk was sown at most
+    ``MAX_SEASON_FACTOR`` × ``growth_days`` days before it, so keeping that
+    many trailing days gives each chunk the same mask as the whole series
+    at once, in constant memory.
+    """
+
+    def __init__(self, crop_type):
+        self.crop_type = crop_type
+        self.lookback = int(round(MAX_SEASON_FACTOR * CROP_REGISTRY[crop_type]['growth_days']))
+        self._recent = None
+
+    def mask(self, temperature, precipitation, dates):
+        """In-season mask of the next chunk of days."""
+        chunk = (np.asarray(temperature), np.asarray(precipitation), np.asarray(dates, dtype='datetime64[D]'))
+        n_new = len(chunk[2])
+        if self._recent is not None:
+            chunk = tuple(np.concatenate([past, new]) for past, new in zip(self._recent, chunk))
+        mask = growing_season(*chunk, self.crop_type)[len(chunk[2]) - n_new:]
+        self._recent = tuple(values[-self.lookback:] for values in chunk)
+        return mask
+
+    def get_state(self):
+        """JSON-serializable trailing weather, for ``set_state``."""
+        if self._recent is None:
+            return None
+        temperature, precipitation, dates = self._recent
+        return {
+            'temperature': [temperature.dtype.str, temperature.tolist()],
+            'precipitation': [precipitation.dtype.str, precipitation.tolist()],
+            'dates': np.datetime_as_string(dates).tolist(),
+        }
+
+    def set_state(self, state):
+        if state is None:
+            self._recent = None
+            return
+        self._recent = (
+            np.array(state['temperature'][1], dtype=state['temperature'][0]),
+            np.array(state['precipitation'][1], dtype=state['precipitation'][0]),
+            np.array(state['dates'], dtype='datetime64[D]'),
+        )
@@ -0,0 +1,129 @@
+import numpy as np
+
+from simulator.production import CROP_REGISTRY
+from simulator.financial import scaled_total_cost
+from simulator.seasons import growing_season
+
+# Parametri esplorabili, nell'ordine degli assi del cubo dei risultati.
+# optimal_temp è uno spostamento (°C) dell'intervallo ottimale della coltura.
+SWEEP_PARAMETERS = ('farm_size', 'price_per_ton', 'cost_per_hectare', 'water_requirement', 'optimal_temp')
+SWEEP_METRICS = ('yield', 'revenue', 'costs', 'profit', 'roi')
+
+
+class SweepResult:
+    """
+    Season totals over a parameter grid.
+
+    ``values[metric]`` is an array with one axis per entry of
+    ``SWEEP_PARAMETERS`` (length 1 for the parameters that were not swept);
+    ``axes`` holds the parameter values along every axis.
+    """
+
+    def __init__(self, axes, values):
+        self.axes = axes
+        self.values = values
+
+    @property
+    def shape(self):
+        return tuple(len(self.axes[name]) for name in SWEEP_PARAMETERS)
+
+    def grid(self, metric, x, y):
+        """
+        2-D slice of ``metric`` with ``y`` on the rows and ``x`` on the
+        columns; every other parameter is taken at its first value.
+        """
+        index = [0] * len(SWEEP_PARAMETERS)
+        ix, iy = SWEEP_PARAMETERS.index(x), SWEEP_PARAMETERS.index(y)
+        index[ix] = index[iy] = slice(None)
+        plane = self.values[metric][tuple(index)]
+        return plane.T if ix < iy else plane
+
+    def to_frame(self):
+        """Tidy table: one row per grid point, parameters and metrics as columns."""
+        import pandas as pd
+        mesh = np.meshgrid(*(self.axes[name] for name in SWEEP_PARAMETERS), indexing='ij')
+        columns = {name: values.ravel() for name, values in zip(SWEEP_PARAMETERS, mesh)}
+        columns.update({metric: self.values[metric].ravel() for metric in SWEEP_METRICS})
+        return pd.DataFrame(columns)
+
+
+def _on_axis(values, name):
+    # Vettore disposto lungo l'asse del parametro, per il broadcasting
+    shape = [1] * len(SWEEP_PARAMETERS)
+    shape[SWEEP_PARAMETERS.index(name)] = -1
+    return np.reshape(values, shape)
+
+
+def sensitivity_sweep(temperature, precipitation, crop_type, grid, farm_size=100, dates=None):
+    """
+    Evaluate the season totals of ``crop_type`` on a grid of parameters,
+    all against the same weather.
+
+    The daily model factorizes: the total growth over the season only
+    depends on the temperature shift and on the water requirement, and is
+    the matrix product of their daily factors (one row per grid value).
+    Farm size, price and cost are then applied by broadcasting, so a
+    100 × 100 grid costs two small matrix products rather than 10 000
+    simulations.
+
+    Parameters
+    ----------
+    temperature, precipitation : array_like
+        Daily weather series shared by every grid point.
+    crop_type : str
+        Crop whose parameters are used for the axes that are not swept.
+    grid : dict
+        Parameter name (see ``SWEEP_PARAMETERS``) → 1-D sequence of values.
+    farm_size : float, optional
+        Hectares, when ``farm_size`` is not swept.
+    dates : array_like, optional
+        Dates of the weather: days outside the growing season of the crop
+        (see ``simulator.seasons.growing_season``) then produce nothing.
+
+    Returns
+    -------
+    SweepResult
+    """
+    unknown = sorted(set(grid) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Parametri non esplorabili: {unknown}")
+    params = CROP_REGISTRY[crop_type]
+    defaults = {
+        'farm_size': farm_size,
+        'price_per_ton': params['price_per_ton'],
+        'cost_per_hectare': params['cost_per_hectare'],
+        'water_requirement': params['water_requirement'],
+        'optimal_temp': 0.0,
+    }
+    axes = {
+        name: np.atleast_1d(np.asarray(grid.get(name, defaults[name]), dtype=float))
+        for name in SWEEP_PARAMETERS
+    }
+
+    temperature = np.asarray(temperature, dtype=float)
+    precipitation = np.asarray(precipitation, dtype=float)
+    # Spostare l'intervallo ottimale di +s equivale a valutare la curva in T - s
+    temp_factor = CROP_REGISTRY.temperature_response(
+        temperature[None, :] - axes['optimal_temp'][:, None], crop_type
+    )
+    water = np.clip(precipitation[None, :] / axes['water_requirement'][:, None], 0, 1)
+    if dates is not None:
+        water *= growing_season(temperature, precipitation, dates, crop_type)
+    # total_growth[w, s] = Σ_giorni water[w] · temp_factor[s]
+    total_growth = water @ temp_factor.T
+
+    farm = _on_axis(axes['farm_size'], 'farm_size')
+    total_yield = (params['base_yield'] / 100) * farm * total_growth[None, None, None, :, :]
+    revenue = total_yield * _on_axis(axes['price_per_ton'], 'price_per_ton')
+    costs = scaled_total_cost(_on_axis(axes['cost_per_hectare'], 'cost_per_hectare'), farm)
+    profit = revenue - costs
+
+    shape = tuple(len(axes[name]) for name in SWEEP_PARAMETERS)
+    values = {
+        'yield': np.broadcast_to(total_yield, shape),
+        'revenue': np.broadcast_to(revenue, shape),
+        'costs': np.broadcast_to(costs, shape),
+        'profit': np.broadcast_to(profit, shape),
+        'roi': np.broadcast_to(profit / costs * 100, shape),
+    }
+    return SweepResult(axes, values)
@@ -0,0 +1,162 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from simulator.environmental import (
+    PRECIPITATION_SCALE, TEMPERATURE_MEAN, TEMPERATURE_STD, EnvironmentalDataGenerator,
+)
+
+EARTH_RADIUS_KM = 6371.0
+# Distanza (km) alla quale la correlazione tra due siti scende a 1/e
+CORRELATION_LENGTH_KM = 150.0
+SPATIAL_VARIABLES = ('temperature', 'precipitation')
+# Fattorizzazioni tenute in memoria (una per insieme di siti)
+FACTOR_CACHE_SIZE = 16
+
+_factors = OrderedDict()
+# Il server Dash serve le richieste da più thread: get, inserimento ed
+# espulsione dell'LRU avvengono sotto lock
+_factors_lock = threading.Lock()
+
+
+def site_distances(coordinates):
+    """Great-circle distances (km) between sites given as (lat, lon) degrees."""
+    lat, lon = np.radians(np.asarray(coordinates, dtype=float)).T
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def site_correlation(coordinates, length_scale=CORRELATION_LENGTH_KM):
+    """
+    Correlation of the daily anomalies between sites, decaying
+    exponentially with distance: ``exp(-d / length_scale)``.
+    """
+    return np.exp(-site_distances(coordinates) / length_scale)
+
+
+def cholesky_factor(correlation):
+    """
+    Lower Cholesky factor of ``correlation``, cached on the matrix content
+    so that repeated runs over the same site set factorize once.
+
+    A matrix that is not positive definite (e.g. estimated from short
+    records) is replaced by the nearest one with non-negative eigenvalues.
+    """
+    correlation = np.ascontiguousarray(correlation, dtype=np.float64)
+    if correlation.ndim != 2 or correlation.shape[0] != correlation.shape[1]:
+        raise ValueError("La matrice di correlazione deve essere quadrata")
+    key = (correlation.shape[0], hashlib.sha1(correlation.tobytes()).hexdigest())
+    with _factors_lock:
+        factor = _factors.get(key)
+        if factor is not None:
+            _factors.move_to_end(key)
+            return factor
+
+    try:
+        factor = np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh((correlation + correlation.T) / 2)
+        factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+        # Righe normalizzate: varianza unitaria in ogni sito
+        factor /= np.linalg.norm(factor, axis=1, keepdims=True)
+    factor.flags.writeable = False
+    # La fattorizzazione avviene fuori dal lock; se un altro thread ha già
+    # inserito la stessa chiave si restituisce la sua copia
+    with _factors_lock:
+        factor = _factors.setdefault(key, factor)
+        _factors.move_to_end(key)
+        if len(_factors) > FACTOR_CACHE_SIZE:
+            _factors.popitem(last=False)
+    return factor
+
+
+class MultiSiteGenerator:
+    """
+    Daily weather for many sites at once, with spatially correlated
+    anomalies.
+
+    Every site has the monthly climate of ``EnvironmentalDataGenerator``;
+    the anomalies of a day are a standard normal draw over the sites
+    multiplied by the Cholesky factor of the site correlation, so a single
+    matrix product gives the whole (members × sites × days) field.
+    Precipitation is exponential at every site: it is built as
+    ``(Z1² + Z2²) / 2`` from two independent correlated normal fields,
+    which is exactly Exp(1) with a correlation of ρ² between sites.
+
+    With a single site the temperature equals that of
+    ``EnvironmentalDataGenerator`` with the same seed.
+
+    Parameters
+    ----------
+    sites : sequence
+        Site names, or (lat, lon) pairs when ``coordinates`` is omitted.
+    start_date, end_date : str or datetime-like
+        Period to simulate (daily steps).
+    coordinates : array_like, optional
+        (n_sites, 2) latitudes and longitudes in degrees; the correlation
+        then follows ``site_correlation``.
+    correlation : array_like, optional
+        (n_sites, n_sites) correlation matrix, instead of coordinates.
+    seed : int or numpy.random.SeedSequence, optional
+    length_scale : float, optional
+        Correlation length (km) used with coordinates.
+    """
+
+    def __init__(self, sites, start_date, end_date, coordinates=None, correlation=None, seed=None,
+                 length_scale=CORRELATION_LENGTH_KM):
+        sites = list(sites)
+        if coordinates is None and correlation is None:
+            coordinates, sites = sites, [f"{lat:.4f},{lon:.4f}" for lat, lon in sites]
+        self.sites = sites
+        if correlation is None:
+            correlation = site_correlation(coordinates, length_scale)
+        self.correlation = np.asarray(correlation, dtype=float)
+        if self.correlation.shape != (len(sites), len(sites)):
+            raise ValueError(f"Correlazione {self.correlation.shape} per {len(sites)} siti")
+        self.factor = cholesky_factor(self.correlation)
+        # Stessi flussi casuali (e date) del generatore di un singolo sito
+        self._single = EnvironmentalDataGenerator('multi-site', start_date, end_date, seed=seed)
+
+    def dates(self):
+        return self._single.dates()
+
+    def _field(self, stream, n_members, n_days, dtype):
+        # Estrazione (membri, giorni, siti): il fattore agisce sull'ultimo asse
+        noise = stream.standard_normal((n_members, n_days, len(self.sites)), dtype=dtype)
+        return np.matmul(self.factor.astype(dtype), noise.transpose(0, 2, 1))
+
+    def generate_ensemble(self, n_members, variables=SPATIAL_VARIABLES, dtype=np.float32):
+        """
+        Correlated weather for every site.
+
+        Returns
+        -------
+        dict
+            ``'date'`` (``DatetimeIndex``), ``'sites'`` (names) and one array
+            of shape (n_members, n_sites, n_days) per requested variable.
+        """
+        unknown = set(variables) - set(SPATIAL_VARIABLES)
+        if unknown:
+            raise ValueError(f"Variabili non disponibili per più siti: {sorted(unknown)}")
+        dtype = np.dtype(dtype).type
+        dates = self.dates()
+        month_index = dates.month.to_numpy() - 1
+        streams = self._single._streams()
+        data = {}
+        if 'temperature' in variables:
+            field = self._field(streams['temperature'], n_members, len(dates), dtype)
+            field *= TEMPERATURE_STD.astype(dtype)[month_index]
+            field += TEMPERATURE_MEAN.astype(dtype)[month_index]
+            data['temperature'] = field
+        if 'precipitation' in variables:
+            first = self._field(streams['precipitation'], n_members, len(dates), dtype)
+            second = self._field(streams['precipitation'], n_members, len(dates), dtype)
+            np.square(first, out=first)
+            first += np.square(second, out=second)
+            first *= dtype(PRECIPITATION_SCALE / 2)
+            data['precipitation'] = first
+        return {'date': dates, 'sites': list(self.sites), **data}
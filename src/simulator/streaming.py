@@ -0,0 +1,146 @@
+import json
+
+import numpy as np
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.production import AgriculturalProductionGenerator, CROP_PARAMETERS
+from simulator.financial import stream_financial_data
+from simulator.engine import split_run_seed
+from simulator.kpi import KPIAggregator
+from simulator.seasons import GrowingSeason
+
+
+def stream_production(env_chunks, crop_type, farm_size=100, growing_season=None):
+    """
+    Run the production model on each environmental chunk as it arrives.
+    The season windows follow the chunks through a shared ``GrowingSeason``.
+    """
+    growing_season = growing_season or GrowingSeason(crop_type)
+    for env_data in env_chunks:
+        yield AgriculturalProductionGenerator(env_data, crop_type, farm_size, growing_season).simulate()
+
+
+def _pipeline(env_chunks, crop_type, farm_size, n_days, cost_rng, growing_season=None):
+    # tee manuale: ogni chunk ambientale serve sia alla produzione sia all'output
+    current = {}
+
+    def tee_env():
+        for env_data in env_chunks:
+            current['env'] = env_data
+            yield env_data
+
+    def prod_chunks():
+        for prod_data in stream_production(tee_env(), crop_type, farm_size, growing_season):
+            current['prod'] = prod_data
+            yield prod_data
+
+    for financial_data in stream_financial_data(prod_chunks(), crop_type, farm_size, n_days, rng=cost_rng):
+        yield current['env'], current['prod'], financial_data
+
+
+def stream_simulation(location, start_date, end_date, crop_type, farm_size, seed=None, chunk_size=7):
+    """
+    Yield ``(env_data, prod_data, financial_data)`` chunks of at most
+    ``chunk_size`` days through the whole pipeline.
+
+    Only one chunk is alive at a time, so memory does not depend on the
+    horizon. With the same seed the concatenated chunks are identical to the
+    run cached by ``SimulationEngine``.
+    """
+    env_seed, cost_seed = split_run_seed(seed)
+    env_gen = EnvironmentalDataGenerator(location, start_date, end_date, seed=env_seed)
+    return _pipeline(env_gen.stream(chunk_size), crop_type, farm_size, len(env_gen.dates()),
+                     np.random.default_rng(cost_seed))
+
+
+def _rng_state(generator):
+    # Stato come stringa JSON: gli interi a 128 bit di PCG64 non
+    # sopravvivono ai numeri JavaScript di un dcc.Store
+    return json.dumps(generator.bit_generator.state)
+
+
+def _set_rng_state(generator, state):
+    generator.bit_generator.state = json.loads(state)
+
+
+class LiveSimulation:
+    """
+    A streaming run that can be advanced a few chunks at a time, keeping the
+    KPIs up to date with an incremental ``KPIAggregator``.
+
+    ``checkpoint()`` captures the position, the state of the random streams,
+    of the KPIs and of the season windows (the trailing weather kept by
+    ``GrowingSeason``) after the last chunk as a JSON-serializable dict;
+    a ``LiveSimulation`` created with it continues from that chunk in
+    constant time, with the same values as the uninterrupted run.
+    """
+
+    def __init__(self, location, start_date, end_date, crop_type, farm_size, seed=None, chunk_size=7,
+                 checkpoint=None):
+        env_seed, cost_seed = split_run_seed(seed)
+        env_gen = EnvironmentalDataGenerator(location, start_date, end_date, seed=env_seed)
+        dates = env_gen.dates()
+        self.n_days = len(dates)
+        self.kpis = KPIAggregator(
+            CROP_PARAMETERS[crop_type]['base_yield'], farm_size, capacity=4 * chunk_size, history=max(4 * chunk_size, 28)
+        )
+        self.position = 0
+        self._streams = env_gen._streams()
+        self._cost_rng = np.random.default_rng(cost_seed)
+        self._season = GrowingSeason(crop_type)
+        if checkpoint is not None:
+            self.position = checkpoint['position']
+            for name, state in checkpoint['streams'].items():
+                _set_rng_state(self._streams[name], state)
+            _set_rng_state(self._cost_rng, checkpoint['cost_rng'])
+            self.kpis.set_state(checkpoint['kpis'])
+            self._season.set_state(checkpoint['season'])
+            if not self.done:
+                # Il meteo riprende dal primo giorno non ancora elaborato
+                env_gen = EnvironmentalDataGenerator(location, dates[self.position], end_date, seed=env_seed)
+        env_chunks = env_gen.stream(chunk_size, streams=self._streams) if not self.done else iter(())
+        self._chunks = _pipeline(env_chunks, crop_type, farm_size, self.n_days, self._cost_rng, self._season)
+
+    @property
+    def done(self):
+        return self.position >= self.n_days
+
+    @property
+    def progress(self):
+        return self.position / self.n_days * 100 if self.n_days else 100
+
+    def checkpoint(self):
+        """State after the last processed chunk, to resume the run elsewhere."""
+        return {
+            'position': self.position,
+            'streams': {name: _rng_state(generator) for name, generator in self._streams.items()},
+            'cost_rng': _rng_state(self._cost_rng),
+            'kpis': self.kpis.get_state(),
+            'season': self._season.get_state(),
+        }
+
+    def advance(self, n_chunks=1):
+        """Process up to ``n_chunks`` more chunks and return them."""
+        processed = []
+        for _ in range(n_chunks):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            _, prod_data, financial_data = chunk
+            self.kpis.extend(
+                prod_data['yield'].to_numpy(),
+                financial_data['costs'].to_numpy(),
+                financial_data['profit'].to_numpy(),
+            )
+            self.position += len(prod_data)
+            processed.append(chunk)
+        return processed
+
+    def skip_to(self, position):
+        """
+        Advance until at least ``position`` days have been processed,
+        replaying the run from its start: O(position). Prefer resuming from
+        a ``checkpoint()``.
+        """
+        while self.position < position and self.advance():
+            pass
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import pandas as pd
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.cli import expand_scenarios, load_manifest, normalize_scenario, run_batch, main
+from simulator.engine import SimulationEngine
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'out.csv')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_expand_scenarios(self):
+        scenarios = expand_scenarios(['grano', 'mais'], [50, 100], ['2024-01-01'], ['2024-06-30'], [1, 2, 3])
+        self.assertEqual(len(scenarios), 12)
+        self.assertEqual(scenarios[0]['crop_type'], 'grano')
+
+    def test_manifest_formats(self):
+        yaml_path = os.path.join(self.tmp.name, 'm.yaml')
+        with open(yaml_path, 'w') as f:
+            f.write("defaults: {start_date: '2024-01-01', end_date: '2024-03-31'}\n"
+                    "scenarios:\n  - {crop_type: grano, seed: 4}\n  - {crop_type: soia, end_date: '2024-02-29'}\n")
+        scenarios = load_manifest(yaml_path)
+        self.assertEqual(scenarios[1], {'start_date': '2024-01-01', 'end_date': '2024-02-29', 'crop_type': 'soia'})
+
+        csv_path = os.path.join(self.tmp.name, 'm.csv')
+        with open(csv_path, 'w') as f:
+            f.write("crop_type,farm_size,start_date,end_date,seed\nmais,20,2024-01-01,2024-01-31,\n")
+        scenario = normalize_scenario(load_manifest(csv_path)[0], 5)
+        self.assertEqual((scenario['farm_size'], scenario['seed']), (20.0, 5))
+
+        # Il manifest di esempio si trova in config/
+        self.assertTrue(load_manifest('scenarios.yaml'))
+
+    def test_invalid_scenarios(self):
+        with self.assertRaises(ValueError):
+            normalize_scenario({'crop_type': 'grano'}, 0)
+        with self.assertRaises(ValueError):
+            normalize_scenario({'crop_type': 'banane', 'start_date': '2024-01-01', 'end_date': '2024-01-02'}, 0)
+
+    def test_results_match_engine_and_are_ordered(self):
+        scenarios = expand_scenarios(['grano', 'orzo'], [80], ['2024-01-01'], ['2024-04-30'], [7, 8])
+        count = run_batch(scenarios, self.output, daily=True, workers=2, log=io.StringIO())
+        self.assertEqual(count, 4)
+
+        summary = pd.read_csv(self.output)
+        self.assertEqual(summary['scenario'].tolist(), [0, 1, 2, 3])
+        self.assertEqual(summary['crop_type'].tolist(), ['grano', 'grano', 'orzo', 'orzo'])
+        expected = SimulationEngine('Azienda Agricola').run('2024-01-01', '2024-04-30', 'orzo', 80.0, 8)
+        self.assertAlmostEqual(summary['profit'].iloc[3], expected.financial_data['profit'].sum())
+
+        daily = pd.read_csv(os.path.join(self.tmp.name, 'out_daily.csv'))
+        self.assertEqual(len(daily), 4 * 121)
+        self.assertEqual(daily.groupby('scenario').size().tolist(), [121] * 4)
+
+    def test_command_line(self):
+        stderr = io.StringIO()
+        sys_stderr, sys.stderr = sys.stderr, stderr
+        try:
+            code = main(['run', '--crop', 'mais', '--start', '2024-01-01', '--end', '2024-01-31',
+                         '--seed', '1', '2', '--workers', '1', '--output', self.output])
+        finally:
+            sys.stderr = sys_stderr
+        self.assertEqual(code, 0)
+        self.assertEqual(len(pd.read_csv(self.output)), 2)
+        self.assertIn("2 scenari scritti", stderr.getvalue())
+
+    def test_optimize_command(self):
+        stdout = io.StringIO()
+        sys_stdout, sys.stdout = sys.stdout, stdout
+        try:
+            code = main(['optimize', '--crop', 'grano', 'mais', '--years', '2', '--members', '20',
+                         '--step', '0.5', '--workers', '1'])
+        finally:
+            sys.stdout = sys_stdout
+        self.assertEqual(code, 0)
+        self.assertIn("Profitto totale atteso", stdout.getvalue())
+        with self.assertRaises(SystemExit):
+            main(['optimize', '--crop', 'mais', '--years', '1', '--members', '20', '--min-cvar', '1e9'])
+
+
+if __name__ == '__main__':
+    unittest.main()
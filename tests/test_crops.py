@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.crops import CropRegistry, DEFAULT_CROPS, load_crops, CROPS_PATH
+from simulator.production import CROP_REGISTRY, temperature_factor, growth_factor, growth_factors
+from simulator.financial import PRICE_MAP, BASE_VAR_COST_MAP
+
+
+class TestCropRegistry(unittest.TestCase):
+    def test_config_matches_defaults(self):
+        self.assertTrue(os.path.exists(CROPS_PATH))
+        defaults = CropRegistry(DEFAULT_CROPS)
+        self.assertEqual(dict(load_crops()), dict(defaults))
+
+    def test_single_source_for_prices_and_costs(self):
+        for name, params in CROP_REGISTRY.items():
+            self.assertEqual(PRICE_MAP[name], params['price_per_ton'])
+            self.assertEqual(BASE_VAR_COST_MAP[name], params['cost_per_hectare'])
+
+    def test_compiled_arrays(self):
+        code = CROP_REGISTRY.code('mais')
+        self.assertEqual(CROP_REGISTRY.base_yield[code], CROP_REGISTRY['mais']['base_yield'])
+        self.assertEqual(tuple(CROP_REGISTRY.optimal_temp[code]), CROP_REGISTRY['mais']['optimal_temp'])
+        self.assertTrue(CROP_REGISTRY.water_requirement.flags.c_contiguous)
+        self.assertFalse(CROP_REGISTRY.water_requirement.flags.writeable)
+        with self.assertRaises(ValueError):
+            CROP_REGISTRY.code('banane')
+
+    def test_lookup_matches_analytic_curve(self):
+        temperature = np.random.default_rng(0).uniform(-45, 65, 100_000)
+        for name, params in CROP_REGISTRY.items():
+            lookup = CROP_REGISTRY.temperature_response(temperature, name)
+            exact = temperature_factor(temperature, params['optimal_temp'])
+            np.testing.assert_array_equal(lookup, exact)
+
+    def test_lookup_exact_at_bounds(self):
+        offsets = np.array([-0.1, -0.09, -0.05, -0.01, 0.0, 0.01, 0.05, 0.09, 0.1])
+        for name, params in CROP_REGISTRY.items():
+            for bound in params['optimal_temp']:
+                for dtype in (np.float64, np.float32):
+                    temperature = (bound + offsets).astype(dtype)
+                    np.testing.assert_array_equal(
+                        CROP_REGISTRY.temperature_response(temperature, name),
+                        temperature_factor(temperature, params['optimal_temp']),
+                    )
+        self.assertEqual(CROP_REGISTRY.temperature_response(25.05, 'grano'), 0.0)
+        self.assertEqual(CROP_REGISTRY.temperature_response(25.0, 'grano'), 1.0)
+
+    def test_lookup_keeps_float32(self):
+        temperature = np.linspace(0, 40, 50, dtype=np.float32)
+        self.assertEqual(CROP_REGISTRY.temperature_response(temperature, 'grano').dtype, np.float32)
+
+    def test_many_crops_gather(self):
+        rng = np.random.default_rng(1)
+        temperature, precipitation = rng.normal(18, 8, 365), rng.exponential(4, 365)
+        codes = CROP_REGISTRY.encode(CROP_REGISTRY.names)
+        batched = growth_factors(temperature, precipitation, codes[:, None])
+        self.assertEqual(batched.shape, (len(codes), 365))
+        for row, name in zip(batched, CROP_REGISTRY.names):
+            np.testing.assert_allclose(row, growth_factor(temperature, precipitation, CROP_REGISTRY[name]))
+
+
+if __name__ == '__main__':
+    unittest.main()
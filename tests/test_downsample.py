@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dashboard.downsample import downsample_indices, window
+
+
+class TestDownsample(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = np.cumsum(rng.normal(size=20000))
+
+    def test_short_series_untouched(self):
+        np.testing.assert_array_equal(downsample_indices(self.y[:100], 2000), np.arange(100))
+
+    def test_point_budget_and_extremes(self):
+        for method in ['minmax', 'lttb']:
+            indices = downsample_indices(self.y, 2000, method)
+            self.assertLessEqual(len(indices), 2002)
+            self.assertTrue(np.all(np.diff(indices) > 0))
+            self.assertEqual(self.y[indices].max(), self.y.max())
+            self.assertEqual(self.y[indices].min(), self.y.min())
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            downsample_indices(self.y, 100, 'media')
+
+    def test_window(self):
+        dates = np.arange('2024-01-01', '2025-01-01', dtype='datetime64[D]')
+        visible = window(dates, ('2024-03-01 00:00:00', '2024-03-10'))
+        self.assertEqual(str(dates[visible][0]), '2024-03-01')
+        self.assertEqual(str(dates[visible][-1]), '2024-03-10')
+        self.assertEqual(window(dates, None), slice(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
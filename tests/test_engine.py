@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.engine import LRUCache, SimulationEngine
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction_and_counters(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)  # 'b' è il meno usato di recente
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        now = [0.0]
+        cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.put('a', 1)
+        now[0] = 11.0
+        self.assertIsNone(cache.get('a'))
+
+
+class TestSimulationEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = SimulationEngine('TestFarm', maxsize=4)
+
+    def test_same_key_is_cached(self):
+        first = self.engine.run('2024-01-01', '2024-01-31', 'grano', 100, seed=1)
+        second = self.engine.run('2024-01-01T00:00:00', '2024-01-31', 'grano', 100, seed=1)
+        self.assertIs(first, second)
+        self.assertEqual(self.engine.stats()['hits'], 1)
+        self.assertEqual(self.engine.stats()['misses'], 1)
+
+    def test_seed_is_reproducible(self):
+        first = self.engine.run('2024-01-01', '2024-01-31', 'mais', 50, seed=7)
+        self.engine.cache.clear()
+        second = self.engine.run('2024-01-01', '2024-01-31', 'mais', 50, seed=7)
+        self.assertTrue(first.financial_data['profit'].equals(second.financial_data['profit']))
+
+    def test_result_shapes(self):
+        result = self.engine.run('2024-01-01', '2024-01-10', 'soia', 10, seed=3)
+        self.assertEqual(len(result.env_data), 10)
+        self.assertEqual(len(result.prod_data), 10)
+        self.assertEqual(len(result.financial_data), 10)
+        self.assertGreater(result.total_cost, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
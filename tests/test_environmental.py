@@ -1,6 +1,8 @@
 import unittest
 import sys
 import os
+import numpy as np
+import pandas as pd
 
 # Aggiungi la directory src al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -29,5 +31,87 @@ class TestEnvironmentalDataGenerator(unittest.TestCase):
         # Controlla che la temperatura sia un numero reale
         self.assertTrue(self.data['temperature'].dtype.kind in 'fi')
 
+    def test_seed_is_reproducible(self):
+        first = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-03-31', seed=42).generate()
+        second = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-03-31', seed=42).generate()
+        self.assertTrue(first.equals(second))
+
+    def test_longer_range_keeps_prefix(self):
+        short = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-01-31', seed=5).generate()
+        long = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-06-30', seed=5).generate()
+        np.testing.assert_array_equal(short['temperature'], long['temperature'].iloc[:len(short)])
+        np.testing.assert_array_equal(short['precipitation'], long['precipitation'].iloc[:len(short)])
+
+
+class TestEnvironmentalEnsemble(unittest.TestCase):
+    def setUp(self):
+        self.generator = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', seed=1)
+
+    def test_ensemble_shape(self):
+        ensemble = self.generator.generate_ensemble(50)
+        self.assertEqual(len(ensemble['date']), 366)
+        for col in ['temperature', 'humidity', 'precipitation', 'solar_radiation']:
+            self.assertEqual(ensemble[col].shape, (50, 366))
+
+    def test_ensemble_subset_and_dtype(self):
+        ensemble = self.generator.generate_ensemble(10, variables=('temperature',), dtype=np.float32)
+        self.assertNotIn('precipitation', ensemble)
+        self.assertEqual(ensemble['temperature'].dtype, np.float32)
+
+    def test_ensemble_monthly_means(self):
+        ensemble = self.generator.generate_ensemble(200, variables=('temperature',))
+        july = ensemble['date'].month == 7
+        self.assertAlmostEqual(ensemble['temperature'][:, july].mean(), 28, delta=0.5)
+
+    def test_unknown_variable(self):
+        with self.assertRaises(ValueError):
+            self.generator.generate_ensemble(2, variables=('wind',))
+
+
+class TestSubdailyWeather(unittest.TestCase):
+    def setUp(self):
+        self.hourly = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', frequency='h', seed=3)
+
+    def test_hourly_shape_and_dtype(self):
+        data = self.hourly.generate()
+        self.assertEqual(len(data), 366 * 24)
+        self.assertEqual(data['date'].iloc[-1], pd.Timestamp('2024-12-31 23:00'))
+        for col in ['temperature', 'humidity', 'precipitation', 'solar_radiation']:
+            self.assertEqual(data[col].dtype, np.float32)
+
+    def test_daily_aggregates_match_daily_mode(self):
+        daily = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', seed=3).generate()
+        hourly = self.hourly.generate(dtype=np.float64)
+        by_day = lambda col: hourly[col].to_numpy().reshape(-1, 24)
+        np.testing.assert_allclose(by_day('temperature').mean(axis=1), daily['temperature'], atol=1e-9)
+        np.testing.assert_allclose(by_day('precipitation').sum(axis=1), daily['precipitation'], atol=1e-9)
+
+    def test_diurnal_cycle(self):
+        ensemble = self.hourly.generate_ensemble(20, variables=('temperature', 'solar_radiation'))
+        temperature = ensemble['temperature'].reshape(20, -1, 24).mean(axis=(0, 1))
+        self.assertEqual(int(np.argmax(temperature)), 14)
+        solar = ensemble['solar_radiation'].reshape(20, -1, 24)
+        self.assertTrue((solar[:, :, :4] == 0).all())
+        # Giornate più lunghe e sole più alto in estate
+        self.assertGreater(solar[:, 170:190].mean(), 2 * solar[:, :20].mean())
+
+    def test_ensemble_footprint(self):
+        ensemble = self.hourly.generate_ensemble(10)
+        self.assertEqual(ensemble['temperature'].shape, (10, 366 * 24))
+        nbytes = sum(ensemble[col].nbytes for col in ['temperature', 'humidity', 'precipitation', 'solar_radiation'])
+        frame = pd.DataFrame({col: np.zeros(10 * 366 * 24) for col in ['temperature', 'humidity', 'precipitation',
+                                                                         'solar_radiation']})
+        self.assertLessEqual(nbytes, frame.memory_usage(deep=True).sum() / 2)
+
+    def test_stream_matches_generate(self):
+        generator = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-01-20', frequency='3h', seed=1)
+        streamed = pd.concat(list(generator.stream(7)), ignore_index=True)
+        self.assertTrue(streamed.equals(generator.generate()))
+
+    def test_frequency_must_divide_day(self):
+        with self.assertRaises(ValueError):
+            EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-01-02', frequency='7h')
+
+
 if __name__ == '__main__':
     unittest.main()
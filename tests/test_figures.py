@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+import json
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dashboard.figures import (
+    date_strings, empty_heatmap_figure, empty_line_figure, ols_line, trace_values,
+)
+
+
+class TestFigures(unittest.TestCase):
+    def test_ols_matches_polyfit(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(20, 5, 500)
+        y = 3 * x + rng.normal(0, 2, 500)
+        ends, line = ols_line(x, y)
+        slope, intercept = np.polyfit(x, y, 1)
+        np.testing.assert_allclose(ends, [x.min(), x.max()])
+        np.testing.assert_allclose(line, slope * ends + intercept)
+
+    def test_ols_degenerate(self):
+        self.assertEqual(len(ols_line([1.0, 1.0], [2.0, 3.0])[0]), 0)
+
+    def test_lean_template(self):
+        import plotly.graph_objects as go
+        figure = empty_line_figure('Temperatura', 'temperature', fill='tozeroy')
+        template = figure['layout']['template']
+        self.assertNotIn('polar', template['layout'])
+        self.assertEqual(set(template['data']), {'scatter', 'bar', 'pie', 'heatmap'})
+        self.assertLess(len(json.dumps(figure)), 2000)
+        # Dizionari validi per plotly
+        go.Figure(figure)
+        go.Figure(empty_heatmap_figure('Sensibilità'))
+
+    def test_trace_payload(self):
+        dates = np.arange('2024-01-01', '2024-01-04', dtype='datetime64[D]')
+        self.assertEqual(date_strings(dates).tolist(), ['2024-01-01', '2024-01-02', '2024-01-03'])
+        hourly = dates.astype('datetime64[h]') + np.timedelta64(6, 'h')
+        self.assertEqual(date_strings(hourly)[0], '2024-01-01T06:00')
+        self.assertEqual(trace_values([1.5, 2.25]).dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import sys
+import os
+import subprocess
+
+# Aggiungi la directory src al path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(SRC_DIR)
+
+import simulator
+
+
+def loaded_packages(code):
+    """Pacchetti di primo livello caricati da ``code`` in un interprete nuovo."""
+    probe = f"{code}\nimport sys\nprint(' '.join({{name.split('.')[0] for name in sys.modules}}))"
+    output = subprocess.run([sys.executable, '-c', probe], cwd=SRC_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_package_import_loads_nothing_heavy(self):
+        packages = loaded_packages("import simulator")
+        self.assertFalse(packages & {'numpy', 'pandas', 'dash', 'plotly'})
+
+    def test_headless_path_needs_only_numpy(self):
+        packages = loaded_packages(
+            "import simulator\n"
+            "simulator.yield_kernel, simulator.KPIAggregator, simulator.sensitivity_sweep, simulator.ResultsStore"
+        )
+        self.assertIn('numpy', packages)
+        self.assertFalse(packages & {'pandas', 'dash', 'plotly', 'flask'})
+
+    def test_lazy_attributes(self):
+        from simulator.engine import SimulationEngine
+        self.assertIs(simulator.SimulationEngine, SimulationEngine)
+        self.assertIn('run_monte_carlo', dir(simulator))
+        with self.assertRaises(AttributeError):
+            simulator.not_a_name
+
+
+if __name__ == '__main__':
+    unittest.main()
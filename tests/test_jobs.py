@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.jobs import JobManager, JobCancelled, DONE, FAILED, CANCELLED
+from simulator.montecarlo import run_monte_carlo
+
+
+def wait(job, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if job.done:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job non terminato")
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=2)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.manager.shutdown()
+
+    def blocking(self, steps=3, progress=None):
+        for step in range(steps):
+            self.release.wait(5)
+            progress(step + 1, steps)
+        return 'ok'
+
+    def test_result_and_progress(self):
+        self.release.set()
+        job = wait(self.manager.submit('a', self.blocking))
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, 'ok')
+        self.assertEqual(job.progress, 1.0)
+
+    def test_identical_jobs_are_deduplicated(self):
+        first = self.manager.submit('a', self.blocking)
+        second = self.manager.submit('a', self.blocking)
+        other = self.manager.submit('b', self.blocking)
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.release.set()
+        # Un job concluso viene riutilizzato finché non scade
+        self.assertIs(self.manager.submit('a', self.blocking), wait(first))
+
+    def test_cancel_waits_for_every_subscriber(self):
+        job = self.manager.submit('a', self.blocking)
+        self.manager.submit('a', self.blocking)
+        self.assertFalse(self.manager.cancel(job.id))
+        self.assertTrue(self.manager.cancel(job.id))
+        self.release.set()
+        self.assertEqual(wait(job).status, CANCELLED)
+        # Dopo la cancellazione lo stesso input avvia un nuovo job
+        self.assertIsNot(self.manager.submit('a', self.blocking), job)
+
+    def test_failure_is_reported(self):
+        def failing(progress=None):
+            raise ValueError("boom")
+
+        job = wait(self.manager.submit('a', failing))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.to_dict()['error'], "boom")
+
+    def test_finished_jobs_expire(self):
+        now = [0.0]
+        manager = JobManager(ttl=10, clock=lambda: now[0])
+        self.release.set()
+        job = wait(manager.submit('a', self.blocking))
+        now[0] = 11.0
+        self.assertIsNot(manager.submit('a', self.blocking), job)
+        self.assertIsNone(manager.get(job.id))
+        manager.shutdown()
+
+
+class TestMonteCarloProgress(unittest.TestCase):
+    def test_progress_and_abort(self):
+        calls = []
+        run_monte_carlo('TestFarm', '2024-01-01', '2024-03-31', 'mais', 50,
+                        n_trajectories=1000, seed=1, n_workers=1, chunk_size=250,
+                        progress=lambda done, total: calls.append((done, total)))
+        self.assertEqual(calls, [(1, 4), (2, 4), (3, 4), (4, 4)])
+
+        def abort(done, total):
+            raise JobCancelled()
+
+        with self.assertRaises(JobCancelled):
+            run_monte_carlo('TestFarm', '2024-01-01', '2024-03-31', 'mais', 50,
+                            n_trajectories=1000, seed=1, n_workers=1, chunk_size=250, progress=abort)
+
+
+if __name__ == '__main__':
+    unittest.main()
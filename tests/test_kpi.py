@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.engine import SimulationEngine
+from simulator.kpi import KPIAggregator
+
+
+class TestKPIAggregator(unittest.TestCase):
+    def setUp(self):
+        self.result = SimulationEngine('TestFarm').run('2024-01-01', '2024-04-30', 'grano', 80, seed=2)
+        self.prod = self.result.prod_data
+        self.fin = self.result.financial_data
+
+    def test_matches_full_recomputation(self):
+        kpis = self.result.kpis.snapshot()
+        self.assertAlmostEqual(kpis['total_yield'], self.prod['yield'].sum())
+        self.assertAlmostEqual(kpis['total_costs'], self.fin['costs'].sum())
+        last, prev = self.prod.iloc[-7:]['yield'].sum(), self.prod.iloc[-14:-7]['yield'].sum()
+        self.assertAlmostEqual(kpis['production_trend'], (last - prev) / prev * 100)
+        last, prev = self.fin.iloc[-7:]['profit'].sum(), self.fin.iloc[-14:-7]['profit'].sum()
+        self.assertAlmostEqual(kpis['profit_trend'], (last - prev) / abs(prev) * 100)
+        self.assertAlmostEqual(kpis['efficiency'], self.prod['yield'].sum() / (7.0 * 80) * 100)
+
+    def test_incremental_extend(self):
+        aggregator = KPIAggregator(7.0, 80, capacity=4)
+        for start in range(0, len(self.prod), 10):
+            chunk = slice(start, start + 10)
+            aggregator.extend(self.prod['yield'].to_numpy()[chunk],
+                              self.fin['costs'].to_numpy()[chunk],
+                              self.fin['profit'].to_numpy()[chunk])
+        full = self.result.kpis.snapshot()
+        for name, value in aggregator.snapshot().items():
+            self.assertAlmostEqual(value, full[name], places=6)
+
+    def test_retract(self):
+        aggregator = KPIAggregator(7.0, 80)
+        aggregator.extend(self.prod['yield'].to_numpy(), self.fin['costs'].to_numpy(),
+                          self.fin['profit'].to_numpy())
+        aggregator.retract(20)
+        self.assertEqual(aggregator.n_days, len(self.prod) - 20)
+        kpis = aggregator.snapshot()
+        self.assertAlmostEqual(kpis['total_yield'], self.prod['yield'].iloc[:-20].sum())
+        last, prev = self.prod['yield'].iloc[-27:-20].sum(), self.prod['yield'].iloc[-34:-27].sum()
+        self.assertAlmostEqual(kpis['production_trend'], (last - prev) / prev * 100)
+
+    def test_short_series_has_no_trend(self):
+        aggregator = KPIAggregator(7.0, 80)
+        aggregator.extend(np.ones(10), np.ones(10), np.zeros(10))
+        self.assertEqual(aggregator.snapshot()['production_trend'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.metrics import Histogram, MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+
+    def test_histogram_buckets_and_quantiles(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for value in [0.005, 0.05, 0.05, 0.5, 5.0]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts.tolist(), [1, 2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.99), float('inf'))
+        self.assertAlmostEqual(histogram.to_dict()['sum'], 5.605)
+
+    def test_timer_and_decorator(self):
+        @self.registry.timed('stage.b')
+        def work():
+            return 42
+
+        with self.registry.timer('stage.a'):
+            pass
+        self.assertEqual(work(), 42)
+        with self.assertRaises(ValueError):
+            with self.registry.timer('stage.a'):
+                raise ValueError
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['stages']['stage.a']['count'], 2)
+        self.assertEqual(snapshot['stages']['stage.b']['count'], 1)
+        self.assertEqual(snapshot['counters'], {'stage.a.errors': 1})
+
+    def test_disabled_registry_records_nothing(self):
+        self.registry.enabled = False
+        with self.registry.timer('stage'):
+            self.registry.increment('event')
+        self.assertEqual(self.registry.snapshot(), {'stages': {}, 'counters': {}})
+
+    def test_prometheus_format(self):
+        self.registry.observe('simulation', 0.05)
+        self.registry.increment('requests', 3)
+        text = self.registry.to_prometheus(gauges={'cache_size': 2})
+        self.assertIn('tesi_stage_seconds_bucket{stage="simulation",le="0.01"} 0', text)
+        self.assertIn('tesi_stage_seconds_bucket{stage="simulation",le="0.1"} 1', text)
+        self.assertIn('tesi_stage_seconds_bucket{stage="simulation",le="+Inf"} 1', text)
+        self.assertIn('tesi_stage_seconds_count{stage="simulation"} 1', text)
+        self.assertIn('tesi_events_total{event="requests"} 3', text)
+        self.assertIn('tesi_cache_size 2', text)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def _server(self, profiling):
+        from flask import Flask
+        from dashboard.instrumentation import DASH_UPDATE_PATH, register_instrumentation
+        server = Flask(__name__)
+        server.testing = True
+
+        @server.route(DASH_UPDATE_PATH, methods=['POST'])
+        def failing_callback():
+            raise RuntimeError("errore nel callback")
+
+        register_instrumentation(server, profiling=profiling)
+        return server.test_client()
+
+    def test_profile_endpoint_disabled_by_default(self):
+        client = self._server(profiling=False)
+        self.assertEqual(client.get('/metrics/profile?arm=1').status_code, 404)
+        self.assertEqual(client.get('/metrics').status_code, 200)
+
+    def test_profiler_stopped_when_request_fails(self):
+        from dashboard.instrumentation import profiler
+        client = self._server(profiling=True)
+        client.get('/metrics/profile?arm=1')
+        # In modalità test l'eccezione si propaga e after_request non viene eseguito
+        with self.assertRaises(RuntimeError):
+            client.post('/_dash-update-component', json={'output': 'grafico.figure'})
+        self.assertIsNone(profiler._active)
+        self.assertIn('grafico.figure', client.get('/metrics/profile').get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.montecarlo import get_executor, run_monte_carlo
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def run_mc(self, **kwargs):
+        params = dict(location='TestFarm', start_date='2024-01-01', end_date='2024-06-30',
+                      crop_type='soia', farm_size=50, n_trajectories=250, seed=11,
+                      n_workers=1, chunk_size=100)
+        params.update(kwargs)
+        return run_monte_carlo(**params)
+
+    def test_sample_count(self):
+        result = self.run_mc()
+        self.assertEqual(result.n_trajectories, 250)
+        for values in result.samples.values():
+            self.assertEqual(values.shape, (250,))
+
+    def test_bands_are_ordered(self):
+        result = self.run_mc()
+        for metric in ['yield', 'profit', 'roi']:
+            band = result.bands[metric]
+            self.assertLessEqual(band[5], band[50])
+            self.assertLessEqual(band[50], band[95])
+
+    def test_seed_is_reproducible(self):
+        first = self.run_mc()
+        second = self.run_mc()
+        np.testing.assert_array_equal(first.samples['profit'], second.samples['profit'])
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_mc()
+        parallel = self.run_mc(n_workers=2)
+        np.testing.assert_array_equal(serial.samples['yield'], parallel.samples['yield'])
+
+    def test_worker_counts_do_not_shut_down_pools(self):
+        from concurrent.futures import ThreadPoolExecutor
+        pool = get_executor(2)
+        self.assertIsNot(get_executor(3), pool)
+        self.assertIs(get_executor(2), pool)
+        self.assertEqual(pool.submit(abs, -1).result(), 1)
+        # Esecuzioni concorrenti con numeri di processi diversi
+        serial = self.run_mc()
+        with ThreadPoolExecutor(2) as threads:
+            runs = list(threads.map(lambda n: self.run_mc(n_workers=n), [2, 3]))
+        for run in runs:
+            np.testing.assert_array_equal(run.samples['yield'], serial.samples['yield'])
+
+    def test_unknown_crop(self):
+        with self.assertRaises(ValueError):
+            self.run_mc(crop_type='riso')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.observed import ObservedWeather
+from simulator.production import AgriculturalProductionGenerator
+
+
+class TestObservedWeather(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+        data = EnvironmentalDataGenerator('Stazione', '2023-01-01', '2024-12-31', seed=4).generate()
+        self.truth = data.set_index('date')
+        # File della stazione: nomi diversi, una colonna in più, righe mancanti,
+        # valori non validi, un duplicato e righe fuori ordine
+        raw = data.rename(columns={'temperature': 'tmed', 'precipitation': 'pioggia'})
+        raw['station_id'] = 'S1'
+        raw['date'] = raw['date'].dt.strftime('%Y-%m-%d')
+        raw = raw.drop(index=[10, 11, 12, 400])
+        raw['tmed'] = raw['tmed'].astype(object)
+        raw.loc[50, 'tmed'] = 'n/d'
+        raw.loc[60, 'humidity'] = 250.0
+        raw = pd.concat([raw.iloc[300:], raw.iloc[:300]])
+        raw = pd.concat([raw, raw.loc[[100]].assign(pioggia=99.0)])
+        self.path = os.path.join(self.tmp.name, 'stazione.csv')
+        raw.to_csv(self.path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def weather(self, **kwargs):
+        return ObservedWeather(self.path, columns={'tmed': 'temperature', 'pioggia': 'precipitation'},
+                               cache_dir=self.cache_dir, **kwargs)
+
+    def test_calendar_and_gap_filling(self):
+        weather = self.weather(chunk_rows=97)
+        frame = weather.window()
+        self.assertEqual(len(frame), 731)
+        self.assertTrue(frame['date'].is_monotonic_increasing)
+        self.assertEqual(frame['temperature'].dtype, np.float32)
+        self.assertFalse(frame.isna().any().any())
+        # Giorni mancanti: temperatura interpolata, pioggia a zero
+        expected = np.interp([10, 11, 12], [9, 13], self.truth['temperature'].iloc[[9, 13]])
+        np.testing.assert_allclose(frame['temperature'].iloc[10:13], expected, rtol=1e-5)
+        self.assertTrue((frame['precipitation'].iloc[10:13] == 0).all())
+        self.assertEqual(frame['precipitation'].iloc[100], 99.0)
+        self.assertEqual(weather.filled_counts(),
+                         {'temperature': 5, 'humidity': 5, 'precipitation': 4, 'solar_radiation': 4})
+
+    def test_chunk_size_does_not_change_result(self):
+        small = self.weather(chunk_rows=50).window()
+        other = ObservedWeather(self.path, columns={'tmed': 'temperature', 'pioggia': 'precipitation'},
+                                cache_dir=os.path.join(self.tmp.name, 'other')).window()
+        pd.testing.assert_frame_equal(small, other)
+
+    def test_blocks_spilled_to_disk(self):
+        weather = self.weather(chunk_rows=97)
+        with tempfile.TemporaryDirectory() as spill_dir:
+            arrays = weather._ingest(spill_dir)
+            self.assertIsInstance(arrays['temperature'], np.memmap)
+            self.assertEqual(len(arrays['date']), 731)
+        # I file temporanei vengono rimossi dopo il salvataggio nella cache
+        weather.load()
+        self.assertEqual([entry for entry in os.listdir(self.cache_dir) if entry.startswith('.')], [])
+
+    def test_cache_is_reused_and_memory_mapped(self):
+        self.weather().load()
+        cached = self.weather()
+        cached._ingest = lambda spill_dir: self.fail("il file non va riletto")
+        self.assertIsInstance(cached.dates, np.memmap)
+        self.assertEqual(len(cached.window('2024-03-01', '2024-03-31')), 31)
+
+    def test_modified_file_invalidates_cache(self):
+        self.weather().load()
+        pd.read_csv(self.path).iloc[:100].to_csv(self.path, index=False)
+        os.utime(self.path, ns=(0, 0))
+        self.assertLess(len(self.weather().window()), 731)
+
+    def test_window_feeds_production(self):
+        env = self.weather().window('2024-04-01', '2024-09-30', variables=('temperature', 'precipitation'))
+        self.assertEqual(env['date'].iloc[0], pd.Timestamp('2024-04-01'))
+        self.assertEqual(env['date'].iloc[-1], pd.Timestamp('2024-09-30'))
+        prod = AgriculturalProductionGenerator(env, 'mais').simulate()
+        self.assertEqual(len(prod), 183)
+        with self.assertRaises(ValueError):
+            self.weather().window('2030-01-01', '2030-12-31')
+
+    def test_hourly_station(self):
+        hourly = EnvironmentalDataGenerator('Stazione', '2024-01-01', '2024-01-10', frequency='h', seed=1).generate()
+        path = os.path.join(self.tmp.name, 'orario.csv')
+        hourly.drop(index=[5]).to_csv(path, index=False)
+        frame = ObservedWeather(path, cache_dir=self.cache_dir).window('2024-01-02', '2024-01-03')
+        self.assertEqual(len(frame), 48)
+        self.assertEqual(frame['date'].iloc[-1], pd.Timestamp('2024-01-03 23:00'))
+
+    def test_missing_required_column(self):
+        with self.assertRaises(ValueError):
+            ObservedWeather(self.path, cache_dir=self.cache_dir).load()
+
+
+if __name__ == '__main__':
+    unittest.main()
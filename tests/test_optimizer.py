@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import itertools
+from math import comb
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import simulator.optimizer as optimizer
+from simulator.financial import compute_total_cost
+from simulator.optimizer import AllocationOptimizer, allocation_grid, evaluate_allocations, plan_cost
+
+
+class TestAllocationOptimizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.optimizer = AllocationOptimizer(100, n_years=3, n_members=60, seed=3, workers=1)
+
+    def test_grid(self):
+        grid = allocation_grid(5, 0.1)
+        self.assertEqual(len(grid), comb(14, 4))
+        self.assertTrue((grid.sum(axis=1) == 10).all())
+        self.assertEqual(len({tuple(row) for row in grid}), len(grid))
+        with self.assertRaises(ValueError):
+            allocation_grid(3, 0.3)
+
+    def test_single_crop_cost_matches_financial_model(self):
+        hectares = np.array([0.0, 0.0, 0.0, 0.0, 80.0])
+        costs = self.optimizer.base_var_costs
+        self.assertAlmostEqual(plan_cost(hectares, costs), compute_total_cost('mais', 80.0))
+
+    def test_evaluation_matches_direct_profit(self):
+        fractions = np.array([[0.5, 0, 0, 0, 0.5], [0.2, 0.2, 0.2, 0.2, 0.2]])
+        mean, cvar = evaluate_allocations(fractions, self.optimizer.revenue, self.optimizer.base_var_costs,
+                                          100.0, 0.1)
+        for row, shares in enumerate(fractions):
+            hectares = shares * 100
+            profit = self.optimizer.revenue @ hectares - plan_cost(hectares, self.optimizer.base_var_costs)
+            np.testing.assert_allclose(mean[row], profit.mean(axis=0))
+            worst = np.sort(profit, axis=0)[:6]
+            np.testing.assert_allclose(cvar[row], worst.mean(axis=0))
+
+    def test_candidates_are_memoized(self):
+        fractions = allocation_grid(5, 0.25) * 0.25
+        first = self.optimizer.evaluate(fractions)
+        evaluate = self.optimizer._evaluate
+        self.optimizer._evaluate = lambda fractions: self.fail("candidato già valutato")
+        try:
+            second = self.optimizer.evaluate(fractions[::-1])
+        finally:
+            self.optimizer._evaluate = evaluate
+        np.testing.assert_array_equal(second[0], first[0][::-1])
+
+    def test_plan_matches_brute_force(self):
+        units = allocation_grid(5, 0.25)
+        score = np.random.default_rng(0).normal(size=(len(units), 3))
+        best = max(
+            (path for path in itertools.product(range(len(units)), repeat=3)
+             if all((units[path[y]] + units[path[y + 1]] <= 5).all() for y in range(2))),
+            key=lambda path: sum(score[path[y], y] for y in range(3)),
+        )
+        np.testing.assert_array_equal(AllocationOptimizer._plan(units, score, 5), best)
+
+    def test_rotation_constraint(self):
+        plan = self.optimizer.optimize(step=0.1, max_repeat=0.0)
+        self.assertEqual(plan.hectares.shape, (3, 5))
+        np.testing.assert_allclose(plan.hectares.sum(axis=1), 100)
+        self.assertTrue((plan.hectares[1:] + plan.hectares[:-1] <= 100 + 1e-9).all())
+        free = self.optimizer.optimize(step=0.1, max_repeat=1.0)
+        self.assertGreaterEqual(free.expected_profit.sum(), plan.expected_profit.sum())
+        self.assertEqual(list(plan.to_frame().index), [2024, 2025, 2026])
+
+    def test_risk_constraint(self):
+        mean, cvar = self.optimizer.evaluate(allocation_grid(5, 0.1) * 0.1)
+        threshold = float(np.sort(cvar, axis=0)[-20].min())
+        plan = self.optimizer.optimize(step=0.1, min_profit_cvar=threshold, max_repeat=1.0)
+        self.assertTrue((plan.profit_cvar >= threshold).all())
+        with self.assertRaises(ValueError):
+            self.optimizer.optimize(step=0.1, min_profit_cvar=float(cvar.max()) + 1)
+
+    def test_process_pool_matches_serial(self):
+        fractions = allocation_grid(5, 0.2) * 0.2
+        serial = evaluate_allocations(fractions, self.optimizer.revenue, self.optimizer.base_var_costs, 100.0, 0.05)
+        parallel = AllocationOptimizer(100, n_years=3, n_members=60, seed=3, workers=2)
+        threshold = optimizer.POOL_THRESHOLD
+        optimizer.POOL_THRESHOLD = 0
+        try:
+            pooled = parallel.evaluate(fractions)
+        finally:
+            optimizer.POOL_THRESHOLD = threshold
+        np.testing.assert_allclose(pooled[0], serial[0])
+        np.testing.assert_allclose(pooled[1], serial[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.portfolio import simulate_portfolio
+
+
+class TestPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.parcels = pd.DataFrame({
+            'parcel_id': ['A', 'B', 'C', 'D'],
+            'crop_type': ['grano', 'grano', 'mais', 'soia'],
+            'farm_size': [10, 20, 50, 5],
+            'location': ['Nord', 'Nord', 'Nord', 'Sud'],
+            'start_date': '2024-01-01',
+            'end_date': '2024-03-31',
+        })
+
+    def test_summary_rows(self):
+        summary = simulate_portfolio(self.parcels, seed=1)
+        self.assertEqual(list(summary['parcel_id']), ['A', 'B', 'C', 'D'])
+        self.assertTrue((summary['n_days'] == 91).all())
+        self.assertTrue((summary['total_yield'] >= 0).all())
+
+    def test_shared_weather_scales_with_hectares(self):
+        summary = simulate_portfolio(self.parcels, seed=1).set_index('parcel_id')
+        self.assertAlmostEqual(summary.loc['B', 'total_yield'], 2 * summary.loc['A', 'total_yield'])
+        self.assertAlmostEqual(summary.loc['A', 'yield_per_ha'], summary.loc['B', 'yield_per_ha'])
+
+    def test_order_does_not_change_results(self):
+        forward = simulate_portfolio(self.parcels, seed=3).set_index('parcel_id')
+        backward = simulate_portfolio(self.parcels.iloc[::-1], seed=3).set_index('parcel_id')
+        np.testing.assert_allclose(forward['profit'], backward.loc[forward.index, 'profit'])
+
+    def test_detail_matches_summary(self):
+        summary, daily = simulate_portfolio(self.parcels, seed=1, detail=True)
+        totals = daily.groupby('parcel_id')['yield'].sum()
+        np.testing.assert_allclose(totals.loc[summary['parcel_id']].to_numpy(), summary['total_yield'])
+
+    def test_missing_columns(self):
+        with self.assertRaises(ValueError):
+            simulate_portfolio(self.parcels.drop(columns=['location']))
+
+
+if __name__ == '__main__':
+    unittest.main()
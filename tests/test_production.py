@@ -1,12 +1,16 @@
 import unittest
 import sys
 import os
+import numpy as np
+import pandas as pd
 
 # Aggiungi la directory src al path (sola riga necessaria)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 from simulator.environmental import EnvironmentalDataGenerator
-from simulator.production import AgriculturalProductionGenerator
+from simulator.production import (
+    AgriculturalProductionGenerator, CROP_PARAMETERS, daily_factors, temperature_factor, yield_kernel, yield_totals
+)
 
 class TestAgriculturalProductionGenerator(unittest.TestCase):
     def setUp(self):
@@ -32,5 +36,84 @@ class TestAgriculturalProductionGenerator(unittest.TestCase):
     def test_profit_column(self):
         self.assertIn('profit', self.prod_data.columns)
 
+    def test_weather_columns_not_copied(self):
+        self.assertTrue(np.shares_memory(self.prod_data['temperature'].to_numpy(),
+                                         self.env_data['temperature'].to_numpy()))
+
+    def test_summarize_matches_daily_totals(self):
+        totals = self.prod_gen.summarize()
+        for col in ['yield', 'revenue', 'cost', 'profit']:
+            self.assertAlmostEqual(totals[col], self.prod_data[col].sum(), places=6)
+
+
+class TestYieldKernel(unittest.TestCase):
+    def setUp(self):
+        env_gen = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', seed=0)
+        self.ensemble = env_gen.generate_ensemble(8, variables=('temperature', 'precipitation'))
+        self.params = CROP_PARAMETERS['mais']
+
+    def test_temperature_factor_shape(self):
+        factor = temperature_factor(np.array([10.0, 18.0, 24.0, 30.0, 36.0, 45.0]), (18, 30))
+        np.testing.assert_allclose(factor, [0.0, 1.0, 1.0, 1.0, 0.0, 0.0])
+        factor = temperature_factor(np.array([17.0, 31.0]), (10, 40))
+        np.testing.assert_allclose(factor, [1.0, 1.0])
+
+    def test_kernel_shapes(self):
+        output = yield_kernel(self.ensemble['temperature'], self.ensemble['precipitation'], self.params, 50)
+        for name in ['yield', 'revenue', 'cost', 'profit']:
+            self.assertEqual(output[name].shape, self.ensemble['temperature'].shape)
+        self.assertTrue((output['yield'] >= 0).all())
+
+    def test_totals_match_kernel(self):
+        output = yield_kernel(self.ensemble['temperature'], self.ensemble['precipitation'], self.params, 50)
+        totals = yield_totals(self.ensemble['temperature'], self.ensemble['precipitation'], self.params, 50)
+        for name in ['yield', 'revenue', 'cost', 'profit']:
+            np.testing.assert_allclose(totals[name], output[name].sum(axis=-1))
+
+    def test_member_matches_simulate(self):
+        env = self.ensemble
+        member = pd.DataFrame({'temperature': env['temperature'][3], 'precipitation': env['precipitation'][3]})
+        prod = AgriculturalProductionGenerator(member, 'mais', 50).simulate()
+        output = yield_kernel(env['temperature'], env['precipitation'], self.params, 50)
+        np.testing.assert_allclose(prod['yield'].to_numpy(), output['yield'][3])
+
+
+class TestHourlyProduction(unittest.TestCase):
+    def setUp(self):
+        generator = EnvironmentalDataGenerator('TestFarm', '2024-04-01', '2024-09-30', frequency='h', seed=2)
+        self.hourly = generator.generate()
+        self.params = CROP_PARAMETERS['mais']
+
+    def test_simulate_aggregates_to_days(self):
+        prod = AgriculturalProductionGenerator(self.hourly, 'mais').simulate()
+        self.assertEqual(len(prod), 183)
+        np.testing.assert_allclose(
+            prod['precipitation'], self.hourly['precipitation'].to_numpy().reshape(-1, 24).sum(axis=1), rtol=1e-6
+        )
+
+    def test_temperature_factor_is_hourly_mean(self):
+        temp_factor, _ = daily_factors(
+            self.hourly['temperature'].to_numpy(), self.hourly['precipitation'].to_numpy(), self.params, 24
+        )
+        hourly_factor = temperature_factor(self.hourly['temperature'].to_numpy(), self.params['optimal_temp'])
+        np.testing.assert_allclose(temp_factor, hourly_factor.reshape(-1, 24).mean(axis=1), rtol=1e-6)
+
+    def test_totals_match_simulate(self):
+        generator = AgriculturalProductionGenerator(self.hourly, 'mais', farm_size=40)
+        totals = generator.summarize()
+        prod = generator.simulate()
+        for name in ['yield', 'revenue', 'cost', 'profit']:
+            self.assertAlmostEqual(totals[name] / prod[name].sum(), 1, places=4)
+
+    def test_ensemble_totals(self):
+        generator = EnvironmentalDataGenerator('TestFarm', '2024-04-01', '2024-09-30', frequency='h', seed=2)
+        ensemble = generator.generate_ensemble(4, variables=('temperature', 'precipitation'))
+        totals = yield_totals(ensemble['temperature'], ensemble['precipitation'], self.params, 100, steps_per_day=24,
+                              dates=ensemble['date'])
+        self.assertEqual(totals['yield'].shape, (4,))
+        single = AgriculturalProductionGenerator(self.hourly, 'mais').summarize()
+        self.assertAlmostEqual(float(totals['yield'][0]), single['yield'], places=2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.engine import SimulationEngine
+from simulator.results import ResultsStore, run_id
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(self.tmp.name)
+        self.metadata = {'kind': 'ensemble', 'crop_type': 'grano', 'seed': 1}
+        generator = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', seed=1)
+        self.ensemble = generator.generate_ensemble(20, variables=('temperature',), dtype=np.float32)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_is_memory_mapped(self):
+        rid = self.store.save_run(
+            {'date': self.ensemble['date'].to_numpy(), 'temperature': self.ensemble['temperature']},
+            self.metadata,
+        )
+        run = self.store.load_run(rid)
+        self.assertIsInstance(run['temperature'], np.memmap)
+        np.testing.assert_array_equal(run['temperature'], self.ensemble['temperature'])
+        self.assertEqual(run.metadata['crop_type'], 'grano')
+        self.assertIn('model_version', run.metadata)
+
+    def test_content_addressing(self):
+        first = self.store.save_run({'x': np.arange(3)}, self.metadata)
+        second = self.store.save_run({'x': np.arange(3)}, dict(reversed(list(self.metadata.items()))))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, run_id(dict(self.metadata, seed=2)))
+        self.assertIsNotNone(self.store.find_run(self.metadata))
+        self.assertIsNone(self.store.find_run(dict(self.metadata, seed=2)))
+
+    def test_list_and_delete(self):
+        self.store.save_run({'x': np.arange(3)}, self.metadata)
+        self.store.save_run({'x': np.arange(3)}, dict(self.metadata, crop_type='mais'))
+        self.assertEqual(len(self.store.list_runs()), 2)
+        runs = self.store.list_runs(crop_type='mais')
+        self.assertEqual(len(runs), 1)
+        self.store.delete_run(runs[0]['run_id'])
+        self.assertEqual(len(self.store.list_runs()), 1)
+
+    def test_engine_reloads_monte_carlo(self):
+        args = ('2024-01-01', '2024-03-31', 'orzo', 40)
+        first = SimulationEngine('TestFarm', store=self.store).monte_carlo(*args, seed=4, n_trajectories=50)
+        second = SimulationEngine('TestFarm', store=self.store).monte_carlo(*args, seed=4, n_trajectories=50)
+        self.assertIsInstance(second.samples['profit'], np.memmap)
+        np.testing.assert_array_equal(first.samples['profit'], second.samples['profit'])
+        self.assertEqual(first.bands, second.bands)
+
+    def test_other_model_version_misses(self):
+        self.store.save_run({'x': np.arange(3)}, dict(self.metadata, model_version='1'))
+        self.assertIsNone(self.store.find_run(self.metadata))
+        self.assertIsNotNone(self.store.find_run(dict(self.metadata, model_version='1')))
+        # Un Monte Carlo salvato con il modello precedente viene ricalcolato
+        args = ('2024-01-01', '2024-03-31', 'orzo', 40)
+        with mock.patch('simulator.engine.MODEL_VERSION', '1'):
+            SimulationEngine('TestFarm', store=self.store).monte_carlo(*args, seed=4, n_trajectories=50)
+        current = SimulationEngine('TestFarm', store=self.store).monte_carlo(*args, seed=4, n_trajectories=50)
+        self.assertNotIsInstance(current.samples['profit'], np.memmap)
+
+
+if __name__ == '__main__':
+    unittest.main()
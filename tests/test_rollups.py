@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.engine import SimulationEngine
+from simulator.rollups import RollupIndex, period_starts
+
+
+class TestRollupIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.result = SimulationEngine('TestFarm').run('2023-11-15', '2025-02-10', 'grano', 80, seed=4)
+        cls.fin = cls.result.financial_data.set_index('date')
+        cls.index = cls.result.rollups
+
+    def test_range_totals(self):
+        revenue = self.fin['revenue']
+        self.assertAlmostEqual(self.index.total('revenue'), revenue.sum(), places=6)
+        self.assertAlmostEqual(self.index.total('costs', '2024-03-10', '2024-07-02'),
+                               self.fin.loc['2024-03-10':'2024-07-02', 'costs'].sum(), places=6)
+        # Estremi fuori dalla simulazione e intervalli vuoti
+        self.assertAlmostEqual(self.index.total('revenue', '2020-01-01', '2024-01-31'),
+                               revenue.loc[:'2024-01-31'].sum(), places=6)
+        self.assertEqual(self.index.total('revenue', '2024-05-02', '2024-05-01'), 0)
+
+    def test_compare_and_trailing(self):
+        current, previous = self.index.compare('profit', '2024-06-01', '2024-06-30')
+        self.assertAlmostEqual(current, self.fin.loc['2024-06-01':'2024-06-30', 'profit'].sum(), places=6)
+        self.assertAlmostEqual(previous, self.fin.loc['2024-05-02':'2024-05-31', 'profit'].sum(), places=6)
+        last, previous = self.index.trailing('costs', 7)
+        self.assertAlmostEqual(last, self.fin['costs'].iloc[-7:].sum(), places=6)
+        self.assertAlmostEqual(previous, self.fin['costs'].iloc[-14:-7].sum(), places=6)
+
+    def test_period_rollups_match_resample(self):
+        for period, rule in [('W', 'W-SUN'), ('M', 'MS'), ('season', 'QS-DEC')]:
+            dates, totals = self.index.rollup('revenue', period)
+            expected = self.fin['revenue'].resample(rule).sum()
+            np.testing.assert_allclose(totals, expected.to_numpy(), rtol=1e-9)
+            self.assertEqual(len(dates), len(expected))
+        dates, means = self.index.rollup('temperature', 'M', how='mean')
+        expected = self.result.env_data.set_index('date')['temperature'].resample('MS').mean()
+        np.testing.assert_array_equal(dates, expected.index.to_numpy().astype('datetime64[D]'))
+        np.testing.assert_allclose(means, expected.to_numpy())
+
+    def test_cumulative_rollup(self):
+        dates, cumulative = self.index.rollup('yield', 'M', cumulative=True)
+        self.assertAlmostEqual(cumulative[-1], self.result.prod_data['yield'].sum(), places=6)
+        np.testing.assert_allclose(np.diff(cumulative), self.index.rollup('yield', 'M')[1][1:])
+
+    def test_period_starts(self):
+        dates = np.array(['2024-12-31', '2025-01-05', '2025-01-06', '2025-03-01', '2025-11-30'],
+                         dtype='datetime64[D]')
+        np.testing.assert_array_equal(period_starts(dates, 'W').astype(str),
+                                      ['2024-12-30', '2024-12-30', '2025-01-06', '2025-02-24', '2025-11-24'])
+        np.testing.assert_array_equal(period_starts(dates, 'season').astype(str),
+                                      ['2024-12-01', '2024-12-01', '2024-12-01', '2025-03-01', '2025-09-01'])
+        with self.assertRaises(ValueError):
+            period_starts(dates, 'Y')
+
+    def test_ensemble_and_irregular_calendar(self):
+        dates = pd.date_range('2024-01-01', periods=60).to_numpy()[::2]
+        values = np.arange(60, dtype=float).reshape(2, 30)
+        index = RollupIndex(dates, {'yield': values})
+        np.testing.assert_allclose(index.total('yield', '2024-01-02', '2024-01-05'), [1 + 2, 31 + 32])
+        months, totals = index.rollup('yield', 'M')
+        self.assertEqual(totals.shape, (2, 2))
+        np.testing.assert_allclose(totals.sum(axis=1), values.sum(axis=1))
+        with self.assertRaises(KeyError):
+            index.total('revenue')
+
+    def test_kpis_read_from_index(self):
+        kpis = self.result.kpis.snapshot()
+        self.assertAlmostEqual(kpis['total_profit'], self.fin['profit'].sum(), places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+import sys
+import os
+import json
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.production import AgriculturalProductionGenerator, CROP_REGISTRY, growth_factor
+from simulator.seasons import (
+    MAX_SEASON_FACTOR, GrowingSeason, _first_reaching, conventional_sowing, growing_season, simulate_seasons,
+    sowing_candidates,
+)
+
+
+class TestSeasonEngine(unittest.TestCase):
+    def setUp(self):
+        generator = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2026-12-31', seed=6)
+        self.ensemble = generator.generate_ensemble(5, variables=('temperature', 'precipitation'))
+        self.dates = self.ensemble['date'].to_numpy()
+
+    def reference_season(self, temperature, precipitation, start, params):
+        # Versione con un ciclo sui giorni, per confronto
+        degree_days = 0.0
+        for day in range(start, len(temperature)):
+            degree_days += max(temperature[day] - params['base_temp'], 0)
+            if degree_days >= params['gdd_requirement']:
+                growth = growth_factor(temperature[start:day + 1], precipitation[start:day + 1], params)
+                return day + 1 - start, growth.mean()
+        return None, None
+
+    def test_first_reaching_matches_search_per_row(self):
+        rng = np.random.default_rng(0)
+        cumulative = np.concatenate([np.zeros((4, 1)), np.cumsum(rng.uniform(0, 3, (4, 200)), axis=1)], axis=1)
+        start = np.array([0, 17, 150, 199])
+        found = _first_reaching(cumulative, start, 40.0)
+        for row in range(4):
+            expected = np.searchsorted(cumulative[row], cumulative[row, start] + 40.0, side='left')
+            np.testing.assert_array_equal(found[row], expected)
+        self.assertEqual(found[0, -1], cumulative.shape[1])
+
+    def test_matches_daily_loop(self):
+        params = CROP_REGISTRY['mais']
+        result = simulate_seasons(self.ensemble['temperature'], self.ensemble['precipitation'], self.dates, 'mais')
+        for member in (0, 4):
+            for candidate in (0, 30, 75):
+                start = np.flatnonzero(self.dates == result.sowing_dates[candidate])[0]
+                length, growth_index = self.reference_season(
+                    self.ensemble['temperature'][member], self.ensemble['precipitation'][member], start, params
+                )
+                self.assertEqual(result.values['length'][member, candidate], length)
+                self.assertAlmostEqual(result.values['growth_index'][member, candidate], growth_index)
+
+    def test_candidates_cover_planting_months(self):
+        result = simulate_seasons(self.ensemble['temperature'], self.ensemble['precipitation'], self.dates, 'grano')
+        self.assertEqual(result.values['yield'].shape, (5, 3 * 92))
+        months = result.sowing_dates.astype('datetime64[M]').astype(int) % 12 + 1
+        self.assertTrue(np.isin(months, [10, 11, 12]).all())
+        # Le semine del 2026 non arrivano al raccolto entro la fine dei dati
+        last_year = result.sowing_dates >= np.datetime64('2026-01-01')
+        self.assertFalse(result.complete[:, last_year].any())
+        self.assertTrue(np.isnan(result.values['yield'][:, last_year]).all())
+        self.assertEqual(list(result.best_sowing().index), [2024, 2025])
+
+    def test_member_matches_single_series(self):
+        batch = simulate_seasons(self.ensemble['temperature'], self.ensemble['precipitation'], self.dates, 'soia')
+        single = simulate_seasons(self.ensemble['temperature'][2], self.ensemble['precipitation'][2], self.dates, 'soia')
+        np.testing.assert_allclose(batch.values['profit'][2], single.values['profit'][0])
+
+    def test_cold_climate_fails(self):
+        temperature = np.full(3 * 365, 8.0)
+        precipitation = np.full(3 * 365, 6.0)
+        dates = np.datetime64('2024-01-01') + np.arange(3 * 365)
+        result = simulate_seasons(temperature, precipitation, dates, 'mais', sowing=[100])
+        self.assertFalse(result.matured[0, 0])
+        self.assertTrue(result.complete[0, 0])
+        self.assertEqual(result.values['yield'][0, 0], 0)
+        self.assertEqual(result.values['length'][0, 0], round(MAX_SEASON_FACTOR * CROP_REGISTRY['mais']['growth_days']))
+
+    def test_production_seasons_from_hourly_data(self):
+        hourly = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', frequency='h', seed=1).generate()
+        result = AgriculturalProductionGenerator(hourly, 'girasole', farm_size=20).seasons()
+        candidates = sowing_candidates(np.unique(hourly['date'].to_numpy().astype('datetime64[D]')), [3, 4, 5])
+        self.assertEqual(result.values['yield'].shape, (1, len(candidates)))
+        self.assertTrue((result.values['yield'][result.complete] <= 20 * CROP_REGISTRY['girasole']['base_yield']).all())
+
+
+
+class TestGrowingSeason(unittest.TestCase):
+    def setUp(self):
+        self.weather = EnvironmentalDataGenerator('TestFarm', '2023-01-01', '2025-12-31', seed=9).generate()
+
+    def test_no_yield_outside_season(self):
+        dates = self.weather['date'].to_numpy().astype('datetime64[D]')
+        for crop in CROP_REGISTRY:
+            params = CROP_REGISTRY[crop]
+            prod = AgriculturalProductionGenerator(self.weather, crop, farm_size=50).simulate()
+            # Finestre massime: dalla semina (anche quella dell'anno prima
+            # dei dati) a MAX_SEASON_FACTOR × growth_days dopo
+            sown = conventional_sowing(np.arange(2022, 2026), params['planting_months'])
+            max_days = round(MAX_SEASON_FACTOR * params['growth_days'])
+            allowed = ((dates[:, None] >= sown) & (dates[:, None] < sown + max_days)).any(axis=1)
+            self.assertTrue(prod['in_season'].any(), crop)
+            self.assertFalse(prod['in_season'][~allowed].any(), crop)
+            self.assertTrue((prod.loc[~prod['in_season'], ['yield', 'revenue']] == 0).all().all(), crop)
+            in_season = prod[prod['in_season']]
+            np.testing.assert_allclose(in_season['yield'], in_season['growth_factor'] * params['base_yield'] * 50 / 100)
+
+    def test_harvest_from_season_engine(self):
+        temperature = self.weather['temperature'].to_numpy()
+        precipitation = self.weather['precipitation'].to_numpy()
+        dates = self.weather['date'].to_numpy()
+        mask = growing_season(temperature, precipitation, dates, 'mais')
+        sowing = np.searchsorted(dates, conventional_sowing([2024], [4, 5]))
+        seasons = simulate_seasons(temperature, precipitation, dates, 'mais', sowing=sowing)
+        self.assertTrue(seasons.matured[0, 0])
+        harvest = sowing[0] + int(seasons.values['length'][0, 0])
+        self.assertTrue(mask[sowing[0]:harvest].all())
+        self.assertFalse(mask[sowing[0] - 1] or mask[harvest])
+        # Semina di grano del 2022, prima dei dati: durata nominale
+        nominal = np.searchsorted(dates, conventional_sowing([2022], [10, 11, 12]) + 180)[0]
+        self.assertTrue(growing_season(temperature, precipitation, dates, 'grano')[:nominal].all())
+
+    def test_chunks_match_whole_series(self):
+        temperature = self.weather['temperature'].to_numpy()
+        precipitation = self.weather['precipitation'].to_numpy()
+        dates = self.weather['date'].to_numpy()
+        whole = growing_season(temperature, precipitation, dates, 'grano')
+        season, parts = GrowingSeason('grano'), []
+        for start in range(0, len(dates), 30):
+            if start == 600:
+                # Stato serializzato a metà, come nei checkpoint dello streaming
+                restored = GrowingSeason('grano')
+                restored.set_state(json.loads(json.dumps(season.get_state())))
+                season = restored
+            parts.append(season.mask(temperature[start:start + 30], precipitation[start:start + 30],
+                                     dates[start:start + 30]))
+        np.testing.assert_array_equal(np.concatenate(parts), whole)
+        ensemble = np.stack([temperature, temperature + 2])
+        self.assertEqual(growing_season(ensemble, np.stack([precipitation] * 2), dates, 'grano').shape,
+                         ensemble.shape)
+
+
+if __name__ == '__main__':
+    unittest.main()
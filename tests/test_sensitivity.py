@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.production import AgriculturalProductionGenerator, CROP_REGISTRY
+from simulator.financial import compute_total_cost, scaled_total_cost
+from simulator.sensitivity import sensitivity_sweep, SWEEP_PARAMETERS
+
+
+class TestSensitivitySweep(unittest.TestCase):
+    def setUp(self):
+        self.env = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', seed=3).generate()
+        self.temperature = self.env['temperature'].to_numpy()
+        self.precipitation = self.env['precipitation'].to_numpy()
+
+    def test_unswept_point_matches_production_model(self):
+        result = sensitivity_sweep(self.temperature, self.precipitation, 'soia', {}, farm_size=40,
+                                   dates=self.env['date'])
+        self.assertEqual(result.shape, (1,) * len(SWEEP_PARAMETERS))
+        totals = AgriculturalProductionGenerator(self.env, 'soia', 40).summarize()
+        self.assertAlmostEqual(result.values['yield'].item(), totals['yield'])
+        self.assertAlmostEqual(result.values['costs'].item(), compute_total_cost('soia', 40))
+
+    def test_grid_matches_pointwise_evaluation(self):
+        grid = {
+            'farm_size': [10, 100, 1000],
+            'price_per_ton': [150, 250],
+            'cost_per_hectare': [700, 900],
+            'water_requirement': [3.0, 6.0],
+            'optimal_temp': [-2.0, 0.0, 3.0],
+        }
+        result = sensitivity_sweep(self.temperature, self.precipitation, 'mais', grid)
+        self.assertEqual(result.shape, (3, 2, 2, 2, 3))
+        base_yield = CROP_REGISTRY['mais']['base_yield']
+
+        for index in np.ndindex(result.shape):
+            farm, price, cost, water, shift = (grid[name][i] for name, i in zip(SWEEP_PARAMETERS, index))
+            growth = (CROP_REGISTRY.temperature_response(self.temperature - shift, 'mais')
+                      * np.clip(self.precipitation / water, 0, 1))
+            total_yield = base_yield * growth.sum() * farm / 100
+            profit = total_yield * price - scaled_total_cost(cost, farm)
+            self.assertAlmostEqual(result.values['yield'][index], total_yield)
+            self.assertAlmostEqual(result.values['profit'][index], profit, places=6)
+
+    def test_grid_slice_and_tidy_frame(self):
+        grid = {'farm_size': np.geomspace(10, 1000, 30), 'price_per_ton': np.linspace(140, 260, 20)}
+        result = sensitivity_sweep(self.temperature, self.precipitation, 'grano', grid)
+        plane = result.grid('profit', 'farm_size', 'price_per_ton')
+        self.assertEqual(plane.shape, (20, 30))
+        np.testing.assert_allclose(plane[5, 7], result.values['profit'][7, 5, 0, 0, 0])
+
+        frame = result.to_frame()
+        self.assertEqual(len(frame), 600)
+        row = frame[(frame['farm_size'] == grid['farm_size'][7]) & (frame['price_per_ton'] == grid['price_per_ton'][5])]
+        self.assertAlmostEqual(row['profit'].item(), plane[5, 7])
+
+    def test_unknown_parameter(self):
+        with self.assertRaises(ValueError):
+            sensitivity_sweep(self.temperature, self.precipitation, 'grano', {'rain': [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
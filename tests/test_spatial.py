@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.environmental import EnvironmentalDataGenerator, TEMPERATURE_MEAN, TEMPERATURE_STD
+from simulator.spatial import MultiSiteGenerator, cholesky_factor, site_correlation, site_distances
+
+
+class TestMultiSiteGenerator(unittest.TestCase):
+    def setUp(self):
+        self.correlation = np.array([[1.0, 0.8, 0.3], [0.8, 1.0, 0.5], [0.3, 0.5, 1.0]])
+        generator = MultiSiteGenerator(['a', 'b', 'c'], '2000-01-01', '2004-12-31',
+                                       correlation=self.correlation, seed=0)
+        self.ensemble = generator.generate_ensemble(40)
+
+    def test_shape(self):
+        self.assertEqual(self.ensemble['sites'], ['a', 'b', 'c'])
+        self.assertEqual(self.ensemble['temperature'].shape, (40, 3, len(self.ensemble['date'])))
+        self.assertEqual(self.ensemble['precipitation'].dtype, np.float32)
+
+    def test_temperature_correlation(self):
+        month = self.ensemble['date'].month.to_numpy() - 1
+        anomalies = (self.ensemble['temperature'] - TEMPERATURE_MEAN[month]) / TEMPERATURE_STD[month]
+        empirical = np.corrcoef(anomalies.transpose(1, 0, 2).reshape(3, -1))
+        np.testing.assert_allclose(empirical, self.correlation, atol=0.02)
+
+    def test_precipitation_is_exponential_and_correlated(self):
+        precipitation = self.ensemble['precipitation']
+        self.assertTrue((precipitation >= 0).all())
+        self.assertAlmostEqual(precipitation.mean(), 2.0, delta=0.05)
+        empirical = np.corrcoef(precipitation.transpose(1, 0, 2).reshape(3, -1))
+        np.testing.assert_allclose(empirical, self.correlation ** 2, atol=0.02)
+
+    def test_single_site_matches_generator(self):
+        multi = MultiSiteGenerator([(45.0, 9.0)], '2024-01-01', '2024-12-31', seed=7).generate_ensemble(5)
+        single = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-12-31', seed=7).generate_ensemble(
+            5, variables=('temperature',), dtype=np.float32)
+        np.testing.assert_allclose(multi['temperature'][:, 0], single['temperature'], atol=1e-5)
+
+    def test_correlation_decays_with_distance(self):
+        coordinates = [(45.0, 9.0), (45.1, 9.1), (44.0, 12.0)]
+        self.assertAlmostEqual(site_distances(coordinates)[0, 2], 258, delta=5)
+        correlation = site_correlation(coordinates)
+        self.assertGreater(correlation[0, 1], 0.9)
+        self.assertLess(correlation[0, 2], 0.2)
+
+    def test_factor_is_cached(self):
+        first = cholesky_factor(self.correlation)
+        self.assertIs(cholesky_factor(self.correlation.copy()), first)
+        np.testing.assert_allclose(first @ first.T, self.correlation)
+        with self.assertRaises(ValueError):
+            first[0, 0] = 2
+
+    def test_factor_cache_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from simulator import spatial
+        matrices = [site_correlation([(45.0, 9.0), (45.0 + k / 10, 9.5)]) for k in range(40)]
+        with ThreadPoolExecutor(8) as pool:
+            factors = list(pool.map(cholesky_factor, matrices * 4))
+        for matrix, factor in zip(matrices * 4, factors):
+            np.testing.assert_allclose(factor @ factor.T, matrix)
+        self.assertLessEqual(len(spatial._factors), spatial.FACTOR_CACHE_SIZE)
+
+    def test_not_positive_definite(self):
+        correlation = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+        factor = cholesky_factor(correlation)
+        np.testing.assert_allclose(np.diag(factor @ factor.T), 1.0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MultiSiteGenerator(['a', 'b'], '2024-01-01', '2024-01-31', correlation=np.eye(3))
+        generator = MultiSiteGenerator(['a'], '2024-01-01', '2024-01-31', correlation=[[1.0]])
+        with self.assertRaises(ValueError):
+            generator.generate_ensemble(2, variables=('humidity',))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Aggiungi la directory src al path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from simulator.environmental import EnvironmentalDataGenerator
+from simulator.engine import SimulationEngine
+from simulator.streaming import stream_simulation, LiveSimulation
+
+
+class TestStreaming(unittest.TestCase):
+    def test_environmental_stream_matches_generate(self):
+        generator = EnvironmentalDataGenerator('TestFarm', '2024-01-01', '2024-03-31', seed=8)
+        streamed = pd.concat(list(generator.stream(10)), ignore_index=True)
+        self.assertTrue(streamed.equals(generator.generate()))
+
+    def test_pipeline_matches_cached_run(self):
+        run = SimulationEngine('TestFarm').run('2024-01-01', '2024-03-31', 'soia', 30, seed=5)
+        chunks = list(stream_simulation('TestFarm', '2024-01-01', '2024-03-31', 'soia', 30, seed=5, chunk_size=7))
+        self.assertTrue(all(len(prod) <= 7 for _, prod, _ in chunks))
+        financial = pd.concat([fin for _, _, fin in chunks], ignore_index=True)
+        np.testing.assert_allclose(financial['profit'], run.financial_data['profit'])
+
+    def test_live_simulation_kpis(self):
+        run = SimulationEngine('TestFarm').run('2024-01-01', '2024-03-31', 'soia', 30, seed=5)
+        live = LiveSimulation('TestFarm', '2024-01-01', '2024-03-31', 'soia', 30, seed=5)
+        live.advance(2)
+        self.assertEqual(live.position, 14)
+        self.assertFalse(live.done)
+        live.skip_to(live.n_days)
+        self.assertTrue(live.done)
+        self.assertEqual(live.progress, 100)
+        expected = run.kpis.snapshot()
+        for name, value in live.kpis.snapshot().items():
+            self.assertAlmostEqual(value, expected[name], places=6)
+
+    def test_resume_from_checkpoint(self):
+        args = ('TestFarm', '2024-01-01', '2024-03-31', 'mais', 40)
+        full = LiveSimulation(*args, seed=8)
+        full.advance(3)
+        # Passaggio dal browser: il checkpoint viaggia come JSON
+        checkpoint = json.loads(json.dumps(full.checkpoint()))
+        resumed = LiveSimulation(*args, seed=8, checkpoint=checkpoint)
+        self.assertEqual(resumed.position, 21)
+        expected, actual = full.advance(2), resumed.advance(2)
+        for (env, prod, fin), (env_r, prod_r, fin_r) in zip(expected, actual):
+            np.testing.assert_array_equal(env['temperature'], env_r['temperature'])
+            np.testing.assert_array_equal(fin['profit'], fin_r['profit'])
+        full.skip_to(full.n_days)
+        resumed.skip_to(resumed.n_days)
+        self.assertEqual(resumed.kpis.snapshot(), full.kpis.snapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()